@@ -0,0 +1,129 @@
+"""
+backfill.py - Importação de registros a partir dos apelidos existentes
+Lê os membros em lotes, reconhece o formato de apelido do servidor (o mesmo
+template usado por update_user_nickname) e grava no RegistrationStore com
+checkpoints.
+"""
+
+import asyncio
+import re
+import time
+
+import nickname_template
+
+TAMANHO_LOTE = 1000
+
+
+def compilar_padrao(template, tag, regex_id=None):
+    """
+    Regex do apelido de registro a partir do template compilado do servidor
+    (tag opcional no apelido) e do formato do ID; None se o template não tiver
+    {nome} e {id}. Levanta TemplateInvalido para templates inválidos.
+    """
+    return nickname_template.compilar(template, tag).padrao(regex_id)
+
+
+def parse_nickname(padrao, nickname):
+    """Retorna (nome, game_id) ou None se o apelido não estiver no formato"""
+    if not nickname:
+        return None
+    match = padrao.match(nickname)
+    if not match:
+        return None
+    return match.group("nome").strip(), match.group("id")
+
+
+class BackfillJob:
+    """Importação resumível dos apelidos de um servidor"""
+
+    def __init__(self, store, guild_id, tag, buscar_membros, template=None, regex_id=None, tamanho_lote=TAMANHO_LOTE,
+                 on_progresso=None):
+        """
+        buscar_membros(after_id) deve retornar um iterador assíncrono de membros
+        em ordem crescente de ID, começando após after_id (ou do início se None).
+        Levanta ValueError se o template do servidor não permitir reconhecer
+        nome e ID nos apelidos.
+        """
+        self.store = store
+        self.guild_id = str(guild_id)
+        try:
+            self.padrao = compilar_padrao(template, tag or "", regex_id)
+        except re.error as e:
+            raise ValueError(f"regex do ID inválida: {e}")
+        if self.padrao is None:
+            raise ValueError("o template de apelido precisa ter {nome} e {id}")
+        self.buscar_membros = buscar_membros
+        self.tamanho_lote = tamanho_lote
+        self.on_progresso = on_progresso
+        self.chave = f"backfill:{self.guild_id}"
+
+        self.lidos = 0
+        self.reconhecidos = 0
+        self.inseridos = 0
+        self.retomado_de = None
+        self.cancelado = False
+        self.inicio = None
+        self.fim = None
+
+    @property
+    def duracao(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.monotonic()) - self.inicio
+
+    @property
+    def taxa(self):
+        """Membros processados por segundo"""
+        duracao = self.duracao
+        return self.lidos / duracao if duracao > 0 else 0.0
+
+    def cancelar(self):
+        self.cancelado = True
+
+    async def _gravar(self, lote, ultimo_id):
+        self.inseridos += await asyncio.to_thread(
+            self.store.inserir_lote, lote, self.chave, str(ultimo_id)
+        )
+        lote.clear()
+        if self.on_progresso:
+            try:
+                await self.on_progresso(self)
+            except Exception:
+                pass
+
+    async def executar(self, reiniciar=False):
+        self.inicio = time.monotonic()
+        if reiniciar:
+            self.store.remover_checkpoint(self.chave)
+        checkpoint = self.store.checkpoint(self.chave)
+        self.retomado_de = int(checkpoint) if checkpoint else None
+
+        lote = []
+        ultimo_id = self.retomado_de
+        pendentes = 0
+        try:
+            async for member in self.buscar_membros(self.retomado_de):
+                if self.cancelado:
+                    break
+                self.lidos += 1
+                pendentes += 1
+                ultimo_id = member.id
+
+                if not member.bot:
+                    dados = parse_nickname(self.padrao, member.nick)
+                    if dados:
+                        self.reconhecidos += 1
+                        lote.append((self.guild_id, member.id, dados[0], dados[1]))
+
+                if pendentes >= self.tamanho_lote:
+                    await self._gravar(lote, ultimo_id)
+                    pendentes = 0
+
+            if ultimo_id is not None and pendentes:
+                await self._gravar(lote, ultimo_id)
+            if not self.cancelado:
+                self.store.remover_checkpoint(self.chave)
+        finally:
+            self.fim = time.monotonic()
+
+        return self.inseridos
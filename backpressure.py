@@ -0,0 +1,177 @@
+"""
+backpressure.py - Controle adaptativo de carga do registro
+Detecta picos de solicitações (raids, fim de eventos) por servidor e
+passa o servidor para modo fila/descarte, mantendo o uso da API limitado.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+MODO_NORMAL = "normal"
+MODO_FILA = "fila"
+MODO_DESCARTE = "descarte"
+
+# Valores padrão (podem ser sobrescritos em config["settings"])
+PADROES = {
+    "raid_janela": 60,           # segundos da janela deslizante
+    "raid_limite_fila": 15,      # solicitações/janela para enfileirar
+    "raid_limite_descarte": 60,  # solicitações/janela para recusar novos formulários
+    "raid_tamanho_fila": 200,    # máximo de solicitações na fila por servidor
+    "raid_intervalo": 1.5        # segundos entre envios da fila
+}
+
+
+class EstadoServidor:
+    """Estado de carga de um servidor"""
+    __slots__ = ("eventos", "modo", "fila", "worker")
+
+    def __init__(self):
+        self.eventos = deque()
+        self.modo = MODO_NORMAL
+        self.fila = deque()
+        self.worker = None
+
+
+class RegistrationBackpressure:
+    """Controlador de taxa por servidor com janela deslizante"""
+
+    def __init__(self, on_mudanca_modo=None):
+        self.servidores = {}
+        self.on_mudanca_modo = on_mudanca_modo
+        self.removidos = 0
+        self._ultima_limpeza = time.monotonic()
+        self.configurar({})
+
+    def configurar(self, settings):
+        """Aplica limites a partir de config["settings"]"""
+        valores = {chave: settings.get(chave, padrao) for chave, padrao in PADROES.items()}
+        self.janela = float(valores["raid_janela"])
+        self.limite_fila = int(valores["raid_limite_fila"])
+        self.limite_descarte = int(valores["raid_limite_descarte"])
+        self.tamanho_fila = int(valores["raid_tamanho_fila"])
+        self.intervalo = float(valores["raid_intervalo"])
+
+    def _estado(self, guild_id):
+        estado = self.servidores.get(guild_id)
+        if estado is None:
+            estado = self.servidores[guild_id] = EstadoServidor()
+        return estado
+
+    def _podar(self, estado, agora):
+        limite = agora - self.janela
+        eventos = estado.eventos
+        while eventos and eventos[0] < limite:
+            eventos.popleft()
+
+    def taxa(self, guild_id):
+        """Solicitações dentro da janela atual"""
+        estado = self.servidores.get(guild_id)
+        if estado is None:
+            return 0
+        self._podar(estado, time.monotonic())
+        return len(estado.eventos)
+
+    def modo(self, guild_id):
+        """Modo atual do servidor (recalculado sem registrar evento)"""
+        estado = self.servidores.get(guild_id)
+        if estado is None:
+            return MODO_NORMAL
+        self._atualizar_modo(guild_id, estado)
+        return estado.modo
+
+    def registrar(self, guild_id):
+        """Registra uma solicitação e retorna o modo resultante"""
+        agora = time.monotonic()
+        if agora - self._ultima_limpeza >= self.janela:
+            self.limpar_ociosos(agora)
+        estado = self._estado(guild_id)
+        estado.eventos.append(agora)
+        self._atualizar_modo(guild_id, estado)
+        return estado.modo
+
+    def limpar_ociosos(self, agora=None):
+        """Remove servidores sem solicitações na janela, com a fila vazia e em modo normal"""
+        agora = time.monotonic() if agora is None else agora
+        self._ultima_limpeza = agora
+        ociosos = []
+        for guild_id, estado in self.servidores.items():
+            self._podar(estado, agora)
+            if (not estado.eventos and not estado.fila and estado.modo == MODO_NORMAL
+                    and (estado.worker is None or estado.worker.done())):
+                ociosos.append(guild_id)
+        for guild_id in ociosos:
+            del self.servidores[guild_id]
+        self.removidos += len(ociosos)
+        return len(ociosos)
+
+    def _atualizar_modo(self, guild_id, estado):
+        self._podar(estado, time.monotonic())
+        taxa = len(estado.eventos)
+
+        if taxa >= self.limite_descarte or len(estado.fila) >= self.tamanho_fila:
+            novo = MODO_DESCARTE
+        elif taxa >= self.limite_fila:
+            novo = MODO_FILA
+        elif estado.modo != MODO_NORMAL and (estado.fila or taxa > self.limite_fila // 2):
+            # Histerese: só volta ao normal com a fila vazia e a taxa baixa
+            novo = MODO_FILA
+        else:
+            novo = MODO_NORMAL
+
+        if novo != estado.modo:
+            anterior = estado.modo
+            estado.modo = novo
+            if self.on_mudanca_modo:
+                asyncio.get_running_loop().create_task(
+                    self.on_mudanca_modo(guild_id, anterior, novo, taxa)
+                )
+        if novo != MODO_NORMAL:
+            # Sem novas solicitações, é o worker que devolve o servidor ao modo normal
+            self._garantir_worker(guild_id, estado)
+
+    def _garantir_worker(self, guild_id, estado):
+        if estado.worker is None or estado.worker.done():
+            estado.worker = asyncio.get_running_loop().create_task(self._drenar(guild_id, estado))
+
+    def enfileirar(self, guild_id, trabalho):
+        """
+        Enfileira uma corrotina sem argumentos (trabalho) para envio ritmado.
+        Retorna a posição na fila ou None se a fila estiver cheia.
+        """
+        estado = self._estado(guild_id)
+        if len(estado.fila) >= self.tamanho_fila:
+            self._atualizar_modo(guild_id, estado)
+            return None
+
+        estado.fila.append(trabalho)
+        self._garantir_worker(guild_id, estado)
+        return len(estado.fila)
+
+    async def _drenar(self, guild_id, estado):
+        """
+        Envia a fila de um servidor respeitando o intervalo configurado e, com
+        ela vazia, reavalia o modo à medida que as solicitações saem da janela,
+        até o servidor voltar ao normal.
+        """
+        while True:
+            if estado.fila:
+                trabalho = estado.fila.popleft()
+                try:
+                    await trabalho()
+                except Exception as e:
+                    print(f"⚠️ Erro ao processar fila do servidor {guild_id}: {e}")
+                await asyncio.sleep(self.intervalo)
+                continue
+
+            self._atualizar_modo(guild_id, estado)
+            if estado.modo == MODO_NORMAL and not estado.fila:
+                break
+            # Próxima reavaliação: quando a solicitação mais antiga sair da janela
+            espera = estado.eventos[0] + self.janela - time.monotonic() if estado.eventos else 0
+            await asyncio.sleep(max(espera, self.intervalo))
+
+    def tamanho(self, guild_id):
+        """Quantidade de solicitações aguardando na fila"""
+        estado = self.servidores.get(guild_id)
+        return len(estado.fila) if estado else 0
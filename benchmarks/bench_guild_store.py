@@ -0,0 +1,78 @@
+"""
+bench_guild_store.py - Compara o config.json único com o GuildStore por servidor
+Uso: python benchmarks/bench_guild_store.py [servidores]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guild_store import GuildStore, CAMPOS_LEGADOS
+
+
+def gerar_config(total):
+    config = {chave: {} for chave in CAMPOS_LEGADOS}
+    for i in range(total):
+        guild_id = str(10**17 + i)
+        config["tag_config"][guild_id] = f"TAG{i % 100}"
+        config["auto_roles"][guild_id] = 10**17 + i * 3
+        config["register_channels"][guild_id] = 10**17 + i * 5
+        config["approval_channels"][guild_id] = 10**17 + i * 7
+    return config
+
+
+def medir(nome, funcao, repeticoes=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    duracao = (time.perf_counter() - inicio) / repeticoes
+    print(f"{nome:<40} {duracao * 1000:10.3f} ms")
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    config = gerar_config(total)
+    ids = list(config["tag_config"])
+    print(f"servidores sintéticos: {total}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_json = os.path.join(tmp, "config.json")
+        with open(caminho_json, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        def carregar_json():
+            with open(caminho_json, encoding="utf-8") as f:
+                return json.load(f)
+
+        def gravar_json():
+            config["tag_config"][random.choice(ids)] = "NOVA"
+            with open(caminho_json, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+
+        print("config.json único")
+        medir("  inicialização (carga completa)", carregar_json, 5)
+        medir("  gravação de 1 servidor", gravar_json, 20)
+
+        caminho_db = os.path.join(tmp, "bot.db")
+        store = GuildStore(caminho_db, capacidade=1000)
+        medir("  importação única para o GuildStore", lambda: store.importar_legado(config))
+        store.fechar()
+
+        print("\nGuildStore (SQLite + LRU)")
+        medir("  inicialização", lambda: GuildStore(caminho_db).fechar(), 5)
+        store = GuildStore(caminho_db, capacidade=1000)
+        quentes = ids[:500]
+        medir("  leitura fria (1 servidor)", lambda: store.get(random.choice(ids)), 2000)
+        medir("  leitura em cache (1 servidor)", lambda: store.get(random.choice(quentes)), 20000)
+        medir("  gravação de 1 servidor", lambda: store.update(random.choice(ids), tag="NOVA"), 200)
+        print(f"\ncache: {len(store.cache)} entradas, {store.hits} hits, {store.misses} misses")
+        store.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+bench_limpar.py - Mede a vazão do PurgeJob contra um canal REST simulado
+Uso: python benchmarks/bench_limpar.py [mensagens] [percentual_antigas]
+"""
+
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purge import PurgeJob
+
+# Latências simuladas (segundos) das rotas REST
+LATENCIA_BULK = 0.05
+LATENCIA_INDIVIDUAL = 0.02
+LATENCIA_HISTORICO = 0.03
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id, created_at):
+        self.channel = channel
+        self.id = message_id
+        self.created_at = created_at
+
+    async def delete(self):
+        await asyncio.sleep(LATENCIA_INDIVIDUAL)
+        self.channel.chamadas += 1
+        self.channel.apagadas.add(self.id)
+
+
+class FakeChannel:
+    """Canal em memória que imita a paginação e as rotas de exclusão"""
+
+    def __init__(self, total, antigas):
+        agora = datetime.datetime.now(datetime.timezone.utc)
+        self.apagadas = set()
+        self.chamadas = 0
+        novas = total - antigas
+        self.messages = []
+        for i in range(total):
+            idade = datetime.timedelta(minutes=i) if i < novas else datetime.timedelta(days=20, minutes=i)
+            self.messages.append(FakeMessage(self, i, agora - idade))
+
+    async def history(self, limit=100):
+        for inicio in range(0, min(limit, len(self.messages)), 100):
+            await asyncio.sleep(LATENCIA_HISTORICO)
+            self.chamadas += 1
+            for message in self.messages[inicio:min(inicio + 100, limit)]:
+                yield message
+
+    async def delete_messages(self, messages):
+        assert len(messages) <= 100
+        await asyncio.sleep(LATENCIA_BULK)
+        self.chamadas += 1
+        self.apagadas.update(m.id for m in messages)
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    percentual = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    antigas = int(total * percentual / 100)
+
+    channel = FakeChannel(total, antigas)
+    job = PurgeJob(channel, total, intervalo_individual=0.0)
+    inicio = time.perf_counter()
+    await job.executar()
+    duracao = time.perf_counter() - inicio
+
+    assert len(channel.apagadas) == total
+    print(f"mensagens: {total} ({antigas} antigas)")
+    print(f"chamadas REST: {channel.chamadas}")
+    print(f"duração: {duracao:.2f}s  vazão: {total / duracao:.0f} msg/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+bench_nickname.py - Vazão do template de apelido compilado
+Uso: python benchmarks/bench_nickname.py [iterações]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nickname_template
+
+NOMES = [
+    ("João Silva", "1001"),
+    ("Maria Eduarda dos Santos Oliveira", "1234567890"),
+    ("👨‍👩‍👧‍👦 Família Emoji Muito Longa 👍🏽👍🏽", "777"),
+    ("Ana", "42"),
+]
+
+
+def fstring_original(tag, nome, user_id_num):
+    """Implementação anterior (corte cego em 32 caracteres)"""
+    nickname = f"{tag}・{nome} | {user_id_num}" if tag else f"{nome} | {user_id_num}"
+    return nickname[:32]
+
+
+def medir(nome, funcao, iteracoes):
+    inicio = time.perf_counter()
+    for i in range(iteracoes):
+        funcao(*NOMES[i & 3])
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<36} {iteracoes / duracao:>12,.0f} apelidos/s  ({duracao / iteracoes * 1e6:.2f} µs)")
+
+
+def main():
+    iteracoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    template = nickname_template.compilar(None, "🇧🇷EGO")
+
+    medir("f-string original", lambda nome, i: fstring_original("🇧🇷EGO", nome, i), iteracoes)
+    medir("template compilado", template.format, iteracoes)
+    medir("compilar (cache) + format", lambda nome, i: nickname_template.compilar(None, "🇧🇷EGO").format(nome, i), iteracoes)
+    # O que a compilação evita: interpretar o template a cada apelido
+    medir("template interpretado a cada vez", lambda nome, i: nickname_template.NicknameTemplate(
+        nickname_template.TEMPLATE_PADRAO, "🇧🇷EGO").format(nome, i), iteracoes // 10)
+
+    print()
+    for nome, game_id in NOMES:
+        print(f"{fstring_original('🇧🇷EGO', nome, game_id)!r:<40} -> {template.format(nome, game_id)!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+bench_router.py - Custo de despacho por interação de componente
+Compara a cadeia antiga de startswith/replace (com um teste por tipo de
+botão) com o ComponentRouter, numa mistura de registros, aprovações,
+recusas e cliques de views comuns que o roteador só ignora.
+Uso: python benchmarks/bench_router.py [interacoes] [servidores] [tipos_extras]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from component_router import ComponentRouter, montar
+
+
+class Resposta:
+    async def send_message(self, *args, **kwargs):
+        pass
+
+
+class Interacao:
+    __slots__ = ("data", "guild_id", "channel_id", "response")
+
+    def __init__(self, custom_id, guild_id, channel_id):
+        self.data = {"custom_id": custom_id}
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.response = Resposta()
+
+
+def gerar(total, servidores):
+    settings = {str(g): {"canal_registro": g * 10, "canal_aprovacao": g * 10 + 1} for g in range(1, servidores + 1)}
+    interacoes = []
+    for _ in range(total):
+        g = random.randint(1, servidores)
+        membro = random.randint(10**17, 10**18)
+        tipo = random.random()
+        if tipo < 0.4:
+            interacoes.append(Interacao(montar("registrar", g), g, g * 10))
+        elif tipo < 0.6:
+            interacoes.append(Interacao(montar("aprovar", g, membro), g, g * 10 + 1))
+        elif tipo < 0.7:
+            interacoes.append(Interacao(montar("recusar", g, membro), g, g * 10 + 1))
+        elif tipo < 0.8:
+            interacoes.append(Interacao(montar("limpeza", g, g * 10 + 2), g, g * 10 + 2))
+        else:
+            interacoes.append(Interacao(os.urandom(16).hex(), g, g * 10))
+    return settings, interacoes
+
+
+async def cadeia_antiga(interacao, settings, prefixos, handler):
+    """Equivalente ao on_interaction anterior: um startswith por tipo de botão, em sequência"""
+    custom_id = interacao.data.get("custom_id", "")
+    for prefixo, canal in prefixos:
+        if custom_id.startswith(prefixo + ":"):
+            args = custom_id.replace(prefixo + ":", "").split(":")
+            if args[0] != str(interacao.guild_id):
+                return
+            guild_settings = settings.get(args[0], {})
+            if canal and interacao.channel_id != guild_settings.get(canal):
+                await interacao.response.send_message("❌ Use no canal correto!", ephemeral=True)
+                return
+            await handler(interacao, guild_settings, *args)
+            return
+
+
+async def main(total, servidores, extras):
+    settings, interacoes = gerar(total, servidores)
+    # Tipos de botão além dos atuais (paginação, resumos...) testados antes dos existentes
+    prefixos = [(f"extra{i}", None) for i in range(extras)]
+    prefixos += [("registrar", "canal_registro"), ("aprovar", "canal_aprovacao"), ("recusar", "canal_aprovacao"), ("limpeza", None)]
+    print(f"interações: {total}, servidores: {servidores}, tipos de botão: {len(prefixos)}\n")
+
+    contagem = {}
+
+    async def handler(interaction, settings, guild_id, *args):
+        prefixo = interaction.data["custom_id"].partition(":")[0]
+        contagem[prefixo] = contagem.get(prefixo, 0) + 1
+
+    inicio = time.perf_counter()
+    for interacao in interacoes:
+        await cadeia_antiga(interacao, settings, prefixos, handler)
+    antiga = time.perf_counter() - inicio
+    da_cadeia, contagem = dict(contagem), {}
+
+    roteador = ComponentRouter(lambda guild_id: settings.get(guild_id, {}))
+    for prefixo, canal in prefixos:
+        roteador.rota(prefixo, canal=canal)(handler)
+
+    inicio = time.perf_counter()
+    for interacao in interacoes:
+        await roteador.despachar(interacao)
+    roteado = time.perf_counter() - inicio
+
+    print(f"{'cadeia startswith/replace':<30} {antiga / total * 1e9:8.0f} ns/interação")
+    print(f"{'ComponentRouter':<30} {roteado / total * 1e9:8.0f} ns/interação")
+    print(f"\ncadeia:    {da_cadeia}")
+    estatisticas = roteador.estatisticas()
+    print(f"roteador:  {estatisticas['despachados']} ignorados={estatisticas['ignorados']} rejeitados={estatisticas['rejeitados']}")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    servidores = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    extras = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    asyncio.run(main(total, servidores, extras))
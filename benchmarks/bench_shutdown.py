@@ -0,0 +1,85 @@
+"""
+bench_shutdown.py - Mede o tempo de drenagem do encerramento gracioso
+Simula aprovações em andamento (apelido → cargo → embed) e uma fila de
+solicitações ritmada, envia SIGTERM e confere que nada ficou pela metade.
+Uso: python benchmarks/bench_shutdown.py [aprovacoes] [fila] [prazo]
+"""
+
+import asyncio
+import os
+import random
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shutdown import GracefulShutdown
+
+# Latência simulada de cada chamada REST da aprovação
+LATENCIA = (0.05, 0.3)
+INTERVALO_FILA = 0.05
+
+
+async def main(aprovacoes, tamanho_fila, prazo):
+    desligamento = GracefulShutdown(prazo)
+    fila = list(range(tamanho_fila))
+    etapas = {"iniciadas": 0, "completas": 0, "recusadas": 0, "enviadas": 0}
+    fechado = asyncio.Event()
+
+    @desligamento.rastrear
+    async def aprovar():
+        etapas["iniciadas"] += 1
+        for _ in range(3):  # apelido, cargo, embed
+            await asyncio.sleep(random.uniform(*LATENCIA))
+        etapas["completas"] += 1
+
+    async def interacao():
+        if desligamento.encerrando:
+            etapas["recusadas"] += 1
+            return
+        await aprovar()
+
+    async def drenar_fila():
+        while fila:
+            fila.pop()
+            await asyncio.sleep(INTERVALO_FILA)
+            etapas["enviadas"] += 1
+
+    async def fechar():
+        await asyncio.sleep(0.05)  # fechamento do websocket
+        fechado.set()
+
+    async def encerrar(motivo):
+        await desligamento.encerrar(fechar)
+
+    desligamento.registrar_fila("fila", lambda: len(fila))
+    desligamento.instalar(encerrar)
+
+    tarefas = [asyncio.create_task(interacao()) for _ in range(aprovacoes)]
+    asyncio.create_task(drenar_fila())
+    await asyncio.sleep(0.1)
+
+    inicio = time.perf_counter()
+    os.kill(os.getpid(), signal.SIGTERM)
+    while not desligamento.encerrando:
+        await asyncio.sleep(0.001)
+    # Interações que chegam depois do sinal devem ser recusadas
+    tarefas += [asyncio.create_task(interacao()) for _ in range(aprovacoes)]
+    await fechado.wait()
+    duracao = time.perf_counter() - inicio
+    await asyncio.gather(*tarefas)
+
+    print(f"Aprovações em andamento: {etapas['iniciadas']} • completas: {etapas['completas']}")
+    print(f"Recusadas após o sinal: {etapas['recusadas']}")
+    print(f"Fila: {etapas['enviadas']}/{tamanho_fila} enviadas • restantes: {desligamento.restantes}")
+    print(f"Encerramento total: {duracao * 1000:.0f}ms (prazo {prazo:.0f}s)")
+    for fase, tempo in desligamento.fases.items():
+        print(f"  {fase}: {tempo * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    aprovacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    tamanho_fila = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    prazo = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    asyncio.run(main(aprovacoes, tamanho_fila, prazo))
@@ -0,0 +1,158 @@
+"""
+bench_state.py - Backends de estado compartilhado: latência e invalidação
+Sobe um stand-in local do protocolo Redis (sem dependências) para exercitar o
+RedisBackend, e simula duas réplicas por backend para medir o tempo até a
+mudança de uma aparecer na outra.
+Uso: python benchmarks/bench_state.py [leituras]
+"""
+
+import fnmatch
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_backend import CachedState, MemoryBackend, SQLiteBackend, RedisBackend
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Subconjunto do Redis usado pelo RedisBackend: GET/SET/DEL/GETDEL/SCAN/PUBLISH/SUBSCRIBE"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.dados = {}
+        self.assinantes = {}
+        self.lock = threading.Lock()
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def _ler_comando(self):
+        linha = self.rfile.readline()
+        if not linha:
+            return None
+        partes = []
+        for _ in range(int(linha[1:])):
+            tamanho = int(self.rfile.readline()[1:])
+            partes.append(self.rfile.read(tamanho + 2)[:-2].decode())
+        return partes
+
+    def _bulk(self, valor):
+        if valor is None:
+            return b"$-1\r\n"
+        valor = valor.encode()
+        return b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+    def _array(self, itens):
+        return b"*%d\r\n" % len(itens) + b"".join(itens)
+
+    def handle(self):
+        servidor = self.server
+        while True:
+            partes = self._ler_comando()
+            if partes is None:
+                return
+            comando, argumentos = partes[0].upper(), partes[1:]
+            with servidor.lock:
+                if comando in ("AUTH", "SELECT"):
+                    resposta = b"+OK\r\n"
+                elif comando == "GET":
+                    resposta = self._bulk(servidor.dados.get(argumentos[0]))
+                elif comando == "SET":
+                    servidor.dados[argumentos[0]] = argumentos[1]
+                    resposta = b"+OK\r\n"
+                elif comando == "DEL":
+                    resposta = b":%d\r\n" % (servidor.dados.pop(argumentos[0], None) is not None)
+                elif comando == "GETDEL":
+                    resposta = self._bulk(servidor.dados.pop(argumentos[0], None))
+                elif comando == "SCAN":
+                    padrao = argumentos[argumentos.index("MATCH") + 1]
+                    chaves = [self._bulk(c) for c in servidor.dados if fnmatch.fnmatchcase(c, padrao)]
+                    resposta = self._array([self._bulk("0"), self._array(chaves)])
+                elif comando == "PUBLISH":
+                    destinos = list(servidor.assinantes.get(argumentos[0], ()))
+                    mensagem = self._array([self._bulk("message"), self._bulk(argumentos[0]), self._bulk(argumentos[1])])
+                    for destino in destinos:
+                        try:
+                            destino.wfile.write(mensagem)
+                        except OSError:
+                            servidor.assinantes[argumentos[0]].discard(destino)
+                    resposta = b":%d\r\n" % len(destinos)
+                elif comando == "SUBSCRIBE":
+                    servidor.assinantes.setdefault(argumentos[0], set()).add(self)
+                    resposta = self._array([self._bulk("subscribe"), self._bulk(argumentos[0]), b":1\r\n"])
+                else:
+                    resposta = b"-ERR unknown command\r\n"
+            self.wfile.write(resposta)
+
+
+def medir(nome, funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    duracao = (time.perf_counter() - inicio) / repeticoes
+    print(f"  {nome:<36} {duracao * 1e6:10.1f} µs")
+
+
+def propagacao(a, b, chave="guild:1"):
+    """Tempo até a réplica B enxergar a gravação feita pela réplica A"""
+    b.get(chave)  # aquece o cache de B
+    valor = {"tag": str(random.random())}
+    inicio = time.perf_counter()
+    a.set(chave, valor)
+    while b.get(chave) != valor:
+        if time.perf_counter() - inicio > 5:
+            return None
+        time.sleep(0.001)
+    return time.perf_counter() - inicio
+
+
+def main():
+    leituras = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    standin = RespStandIn()
+    threading.Thread(target=standin.serve_forever, daemon=True).start()
+    porta = standin.server_address[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "estado.db")
+        memoria = MemoryBackend()
+        replicas = {
+            "memory": (memoria, memoria),
+            "sqlite": (SQLiteBackend(caminho), SQLiteBackend(caminho)),
+            "redis (stand-in)": (RedisBackend(porta=porta), RedisBackend(porta=porta)),
+        }
+
+        for nome, (backend_a, backend_b) in replicas.items():
+            a = CachedState(backend_a)
+            b = a if backend_b is backend_a else CachedState(backend_b)  # memória: réplica única
+            for i in range(500):
+                a.set(f"guild:{i}", {"tag": f"T{i}", "cargo": i})
+            print(f"\n{nome}")
+            medir("gravação", lambda: a.set(f"guild:{random.randrange(500)}", {"tag": "X"}), 500)
+            medir("leitura sem cache (backend)", lambda: backend_b.get(f"guild:{random.randrange(500)}"), 2000)
+            medir("leitura read-through (cache)", lambda: b.get(f"guild:{random.randrange(500)}"), leituras)
+
+            a.set("pendente:1:1", {"nome": "x"})
+            tomados = [a.tomar("pendente:1:1"), b.tomar("pendente:1:1")]
+            print(f"  tomar() concorrente: {sum(t is not None for t in tomados)} de 2 receberam o valor")
+
+            tempo = propagacao(a, b)
+            print(f"  propagação A → B: {'não propagou' if tempo is None else f'{tempo * 1000:.1f} ms'}")
+            print(f"  cache B: {b.estatisticas()}")
+            a.fechar()
+            if backend_b is not backend_a:
+                b.fechar()
+
+    standin.shutdown()
+
+
+if __name__ == "__main__":
+    main()
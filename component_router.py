@@ -0,0 +1,113 @@
+"""
+component_router.py - Roteamento das interações de componentes por custom_id
+Os custom_ids seguem o formato compacto "prefixo:arg1:arg2" (o primeiro
+argumento é o servidor). O prefixo é separado uma única vez e despachado por
+uma tabela de handlers (os argumentos só são divididos se a rota existir),
+com a validação de servidor/canal feita a partir das configurações já em
+cache, em vez de uma cadeia de startswith a cada clique.
+"""
+
+import inspect
+from collections import Counter
+
+SEPARADOR = ":"
+
+# custom_id antigo (painéis publicados antes do roteador) -> prefixo atual
+LEGADO = "registrar_"
+LEGADO_PREFIXO = "registrar"
+
+
+def analisar(custom_id):
+    """'prefixo:a:b' -> ('prefixo', 'a:b'); o formato antigo é convertido"""
+    prefixo, separador, resto = custom_id.partition(SEPARADOR)
+    if not separador and custom_id.startswith(LEGADO):
+        return LEGADO_PREFIXO, custom_id[len(LEGADO):]
+    return prefixo, resto
+
+
+def montar(prefixo, *args):
+    """Monta o custom_id de um componente roteado"""
+    return SEPARADOR.join((prefixo, *map(str, args)))
+
+
+class Rota:
+    __slots__ = ("handler", "canal", "erro_canal", "aridade")
+
+    def __init__(self, handler, canal, erro_canal):
+        self.handler = handler
+        self.canal = canal
+        self.erro_canal = erro_canal
+        # Argumentos do custom_id esperados pelo handler (além de interaction e settings);
+        # None se o handler aceitar *args
+        parametros = inspect.signature(handler).parameters.values()
+        if any(p.kind is p.VAR_POSITIONAL for p in parametros):
+            self.aridade = None
+        else:
+            self.aridade = len(parametros) - 2
+
+
+class ComponentRouter:
+    """
+    handler(interaction, settings, guild_id, *args) para cada prefixo.
+    settings_de(guild_id) -> configurações do servidor; antes(interaction) é
+    uma corrotina opcional que, retornando True, impede o despacho (ela mesma
+    responde à interação).
+    """
+
+    def __init__(self, settings_de, antes=None):
+        self.settings_de = settings_de
+        self.antes = antes
+        self.rotas = {}
+        self.despachados = Counter()
+        self.rejeitados = Counter()
+        self.ignorados = 0
+
+    def rota(self, prefixo, canal=None, erro_canal="❌ Use no canal correto!"):
+        """Registra o handler do prefixo; canal: campo das configurações exigido como canal de origem"""
+        def decorador(handler):
+            self.rotas[prefixo] = Rota(handler, canal, erro_canal)
+            return handler
+        return decorador
+
+    async def despachar(self, interaction):
+        """Retorna True se a interação pertencia a uma rota (mesmo que rejeitada)"""
+        prefixo, resto = analisar(interaction.data.get("custom_id", ""))
+        rota = self.rotas.get(prefixo)
+        if rota is None:
+            # Componentes de views comuns (IDs gerados pelo discord.py) seguem o fluxo normal
+            self.ignorados += 1
+            return False
+
+        if self.antes and await self.antes(interaction):
+            self.rejeitados["encerrando"] += 1
+            return True
+
+        args = resto.split(SEPARADOR)
+        if rota.aridade is not None and len(args) != rota.aridade:
+            self.rejeitados["malformado"] += 1
+            await interaction.response.send_message("❌ Botão inválido ou desatualizado.", ephemeral=True)
+            return True
+        guild_id = args[0]
+        if not interaction.guild_id or guild_id != str(interaction.guild_id):
+            self.rejeitados["servidor"] += 1
+            await interaction.response.send_message("❌ Este botão não pertence a este servidor!", ephemeral=True)
+            return True
+
+        settings = self.settings_de(guild_id)
+        if rota.canal:
+            canal_id = settings.get(rota.canal)
+            if not canal_id or interaction.channel_id != canal_id:
+                self.rejeitados["canal"] += 1
+                await interaction.response.send_message(rota.erro_canal, ephemeral=True)
+                return True
+
+        self.despachados[prefixo] += 1
+        await rota.handler(interaction, settings, *args)
+        return True
+
+    def estatisticas(self):
+        return {
+            "despachados": dict(self.despachados),
+            "rejeitados": dict(self.rejeitados),
+            "ignorados": self.ignorados
+        }
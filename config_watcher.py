@@ -0,0 +1,161 @@
+"""
+config_watcher.py - Recarga do config.json sem reiniciar o bot
+Usa inotify quando disponível (Linux) e verificação de mtime como alternativa.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+# Chaves do config.json indexadas por ID do servidor
+CHAVES_SERVIDOR = ("auto_roles", "tag_config", "register_channels", "approval_channels")
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_EVENTO = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Observa um diretório via inotify (libc) e filtra por nome de arquivo"""
+
+    def __init__(self, caminho):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.nome = os.fsencode(os.path.basename(caminho))
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        diretorio = os.fsencode(os.path.dirname(os.path.abspath(caminho)))
+        mascara = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self.fd, diretorio, mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, "inotify_add_watch")
+
+    def ler(self):
+        """Consome os eventos pendentes e indica se algum é do arquivo observado"""
+        relevante = False
+        while True:
+            try:
+                dados = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return relevante
+            pos = 0
+            while pos < len(dados):
+                _, _, _, tamanho = _EVENTO.unpack_from(dados, pos)
+                pos += _EVENTO.size
+                nome = dados[pos:pos + tamanho].rstrip(b"\0")
+                pos += tamanho
+                if nome == self.nome:
+                    relevante = True
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+def diff_servidores(antigo, novo):
+    """Retorna {guild_id: {chave: (valor_antigo, valor_novo)}} das configurações alteradas"""
+    mudancas = {}
+    for chave in CHAVES_SERVIDOR:
+        antes = antigo.get(chave, {})
+        depois = novo.get(chave, {})
+        for guild_id in antes.keys() | depois.keys():
+            if antes.get(guild_id) != depois.get(guild_id):
+                mudancas.setdefault(guild_id, {})[chave] = (antes.get(guild_id), depois.get(guild_id))
+    return mudancas
+
+
+class ConfigWatcher:
+    """
+    Observa o arquivo de configuração e chama on_mudanca(novo) no event loop
+    quando o conteúdo muda. A leitura/parse roda em thread separada.
+    """
+
+    def __init__(self, caminho, carregar, on_mudanca, intervalo=2.0, debounce=0.25):
+        self.caminho = caminho
+        self.carregar = carregar
+        self.on_mudanca = on_mudanca
+        self.intervalo = intervalo
+        self.debounce = debounce
+        self.modo = None
+        self.recargas = 0
+        self._assinatura = self._ler_assinatura()
+        self._task = None
+        self._inotify = None
+        self._evento = None
+
+    def _ler_assinatura(self):
+        try:
+            st = os.stat(self.caminho)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def marcar_gravacao(self):
+        """Registra uma gravação feita pelo próprio bot (não dispara recarga)"""
+        self._assinatura = self._ler_assinatura()
+
+    def iniciar(self):
+        loop = asyncio.get_running_loop()
+        self._evento = asyncio.Event()
+
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(self.caminho)
+                loop.add_reader(self._inotify.fd, self._on_inotify)
+            except Exception:
+                self._inotify = None
+
+        self.modo = "inotify" if self._inotify else "polling"
+        self._task = loop.create_task(self._executar())
+        return self._task
+
+    def parar(self):
+        if self._inotify:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.fechar()
+            self._inotify = None
+        if self._task:
+            self._task.cancel()
+
+    def _on_inotify(self):
+        if self._inotify.ler():
+            self._evento.set()
+
+    async def _esperar(self):
+        if self._inotify:
+            # Além dos eventos, verifica periodicamente (volumes montados nem sempre notificam)
+            try:
+                await asyncio.wait_for(self._evento.wait(), timeout=self.intervalo * 15)
+            except asyncio.TimeoutError:
+                pass
+            self._evento.clear()
+            await asyncio.sleep(self.debounce)
+        else:
+            await asyncio.sleep(self.intervalo)
+
+    async def _executar(self):
+        while True:
+            await self._esperar()
+
+            assinatura = self._ler_assinatura()
+            if assinatura is None or assinatura == self._assinatura:
+                continue
+            self._assinatura = assinatura
+
+            try:
+                novo = await asyncio.to_thread(self.carregar)
+            except Exception as e:
+                print(f"⚠️ config.json inválido, mantendo configuração atual: {e}")
+                continue
+
+            self.recargas += 1
+            try:
+                self.on_mudanca(novo)
+            except Exception as e:
+                print(f"⚠️ Erro ao aplicar nova configuração: {e}")
@@ -0,0 +1,220 @@
+"""
+coordination.py - Eleição de líder entre réplicas
+Só o líder conecta ao gateway; as demais réplicas atendem HTTP/API e tentam
+assumir a liderança periodicamente. O backend do lease é plugável:
+  - arquivo: flock em um arquivo local (liberado pelo SO se o processo morrer)
+  - sqlite: lease com expiração em uma tabela (volume compartilhado)
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LeaseBackend:
+    """Interface dos backends de lease"""
+
+    def adquirir(self, nome, dono, ttl):
+        """Adquire ou renova o lease; True se `dono` for o detentor"""
+        raise NotImplementedError
+
+    def liberar(self, nome, dono):
+        raise NotImplementedError
+
+    def detentor(self, nome):
+        """(dono, expira_em) do lease atual ou None"""
+        raise NotImplementedError
+
+
+class FileLease(LeaseBackend):
+    """Lock exclusivo de arquivo; o TTL é irrelevante (o SO libera ao morrer)"""
+
+    def __init__(self, caminho):
+        if fcntl is None:
+            raise RuntimeError("backend 'arquivo' requer fcntl (Linux/macOS)")
+        self.caminho = caminho
+        self._arquivos = {}
+
+    def _caminho(self, nome):
+        return f"{self.caminho}.{nome}.lock"
+
+    def adquirir(self, nome, dono, ttl):
+        if nome in self._arquivos:
+            return True
+        arquivo = open(self._caminho(nome), "a+")
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        arquivo.seek(0)
+        arquivo.truncate()
+        arquivo.write(dono)
+        arquivo.flush()
+        self._arquivos[nome] = arquivo
+        return True
+
+    def liberar(self, nome, dono):
+        arquivo = self._arquivos.pop(nome, None)
+        if arquivo:
+            arquivo.truncate(0)
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+            arquivo.close()
+
+    def detentor(self, nome):
+        try:
+            with open(self._caminho(nome)) as f:
+                dono = f.read().strip()
+        except OSError:
+            return None
+        return (dono, None) if dono else None
+
+
+class SQLiteLease(LeaseBackend):
+    """Lease com expiração; adquirir e renovar são um único UPSERT condicional"""
+
+    def __init__(self, caminho):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " nome TEXT PRIMARY KEY,"
+            " dono TEXT NOT NULL,"
+            " expira_em REAL NOT NULL)"
+        )
+
+    def adquirir(self, nome, dono, ttl):
+        agora = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO leases (nome, dono, expira_em) VALUES (?, ?, ?)"
+                " ON CONFLICT (nome) DO UPDATE SET dono = excluded.dono, expira_em = excluded.expira_em"
+                " WHERE leases.dono = excluded.dono OR leases.expira_em < ?",
+                (nome, dono, agora + ttl, agora)
+            )
+            linha = self.conn.execute("SELECT dono FROM leases WHERE nome = ?", (nome,)).fetchone()
+        return linha is not None and linha[0] == dono
+
+    def liberar(self, nome, dono):
+        with self.lock:
+            self.conn.execute("DELETE FROM leases WHERE nome = ? AND dono = ?", (nome, dono))
+
+    def detentor(self, nome):
+        with self.lock:
+            linha = self.conn.execute("SELECT dono, expira_em FROM leases WHERE nome = ?", (nome,)).fetchone()
+        if linha is None or linha[1] < time.time():
+            return None
+        return linha[0], linha[1]
+
+
+BACKENDS = {
+    "arquivo": FileLease,
+    "sqlite": SQLiteLease
+}
+
+
+def registrar_backend(nome, classe):
+    """Registra um backend de lease adicional (ex: Redis, etcd)"""
+    BACKENDS[nome] = classe
+
+
+def id_replica():
+    return os.environ.get("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaderElector:
+    """
+    Mantém (ou disputa) a liderança de um recurso. Enquanto líder, uma thread
+    renova o lease a cada `intervalo`; se a renovação falhar, on_perda é
+    chamado para largar o gateway imediatamente.
+    """
+
+    def __init__(self, backend, nome="gateway", dono=None, ttl=15.0, intervalo=None):
+        self.backend = backend
+        self.nome = nome
+        self.dono = dono or id_replica()
+        self.ttl = ttl
+        self.intervalo = intervalo or ttl / 3
+        self.lider = False
+        self.desde = None
+        self.tentativas = 0
+        self.on_perda = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def tentar(self):
+        try:
+            self.lider = self.backend.adquirir(self.nome, self.dono, self.ttl)
+        except Exception as e:
+            print(f"⚠️ Erro no lease de {self.nome}: {e}")
+            self.lider = False
+        return self.lider
+
+    def aguardar(self, parar=None):
+        """Bloqueia até virar líder; retorna False se `parar` for sinalizado antes"""
+        parar = parar or self._parar
+        while not parar.is_set():
+            self.tentativas += 1
+            if self.tentar():
+                self.desde = time.time()
+                self._iniciar_renovacao()
+                return True
+            parar.wait(self.intervalo)
+        return False
+
+    def _iniciar_renovacao(self):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._renovar, name="lease", daemon=True)
+        self._thread.start()
+
+    def _renovar(self):
+        while not self._parar.wait(self.intervalo):
+            if not self.tentar():
+                print(f"🚨 Liderança de '{self.nome}' perdida para {self.detentor()}")
+                if self.on_perda:
+                    self.on_perda()
+                return
+
+    def liberar(self):
+        """Libera o lease para outra réplica assumir sem esperar o TTL"""
+        self._parar.set()
+        if self.lider:
+            try:
+                self.backend.liberar(self.nome, self.dono)
+            except Exception as e:
+                print(f"⚠️ Erro ao liberar o lease: {e}")
+        self.lider = False
+
+    def detentor(self):
+        try:
+            atual = self.backend.detentor(self.nome)
+        except Exception:
+            return None
+        return atual[0] if atual else None
+
+    def estado(self):
+        return {
+            "replica": self.dono,
+            "lider": self.lider,
+            "lider_atual": self.dono if self.lider else self.detentor(),
+            "desde": self.desde,
+            "ttl": self.ttl,
+            "backend": type(self.backend).__name__
+        }
+
+
+def criar_eleicao(tipo, caminho, **opcoes):
+    """LeaderElector para o backend `tipo` ou None se a coordenação estiver desligada"""
+    if not tipo or tipo == "nenhum":
+        return None
+    if tipo not in BACKENDS:
+        raise ValueError(f"backend de coordenação desconhecido: {tipo} (use {', '.join(BACKENDS)})")
+    return LeaderElector(BACKENDS[tipo](caminho), **opcoes)
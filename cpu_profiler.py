@@ -0,0 +1,111 @@
+"""
+cpu_profiler.py - Profiler de CPU por amostragem sob demanda
+Uma thread lê as pilhas de todas as threads (event loop e servidor web) via
+sys._current_frames em intervalo fixo e agrega em "collapsed stacks", o
+formato de entrada do flamegraph.pl / speedscope. Nada roda fora de uma coleta.
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+class ProfilerOcupado(RuntimeError):
+    pass
+
+
+def _nome_frame(frame):
+    codigo = frame.f_code
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Amostragem de pilhas de todas as threads; uma coleta por vez"""
+
+    def __init__(self, profundidade=64):
+        self.profundidade = profundidade
+        self._lock = threading.Lock()
+        self.ultima = None
+
+    @property
+    def ocupado(self):
+        return self._lock.locked()
+
+    def coletar(self, segundos, intervalo=0.01, ociosas=False):
+        """
+        Amostra por `segundos` e retorna o texto em collapsed stacks
+        ("thread;f1;f2 N" por linha). Bloqueia quem chama; levanta
+        ProfilerOcupado se já houver uma coleta em andamento.
+        ociosas=False descarta amostras de threads paradas em espera (select/wait).
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerOcupado("já existe um profiling em andamento")
+        try:
+            return self._coletar(segundos, intervalo, ociosas)
+        finally:
+            self._lock.release()
+
+    def _coletar(self, segundos, intervalo, ociosas):
+        proprio = threading.get_ident()
+        pilhas = {}
+        amostras = 0
+        inicio = time.perf_counter()
+        fim = inicio + segundos
+        proximo = inicio
+
+        while True:
+            agora = time.perf_counter()
+            if agora >= fim:
+                break
+            nomes = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                if not ociosas and self._ociosa(frame):
+                    continue
+                partes = []
+                while frame is not None and len(partes) < self.profundidade:
+                    partes.append(_nome_frame(frame))
+                    frame = frame.f_back
+                partes.append(nomes.get(ident, f"thread-{ident}"))
+                chave = ";".join(reversed(partes))
+                pilhas[chave] = pilhas.get(chave, 0) + 1
+            amostras += 1
+            del frame
+
+            proximo += intervalo
+            espera = proximo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                proximo = time.perf_counter()  # atrasado: não tenta compensar
+
+        duracao = time.perf_counter() - inicio
+        self.ultima = {
+            "amostras": amostras,
+            "duracao": duracao,
+            "intervalo_ms": intervalo * 1000,
+            "pilhas": len(pilhas),
+            "em": time.time()
+        }
+        return "\n".join(
+            f"{pilha} {total}" for pilha, total in sorted(pilhas.items(), key=lambda item: -item[1])
+        ) + "\n"
+
+    @staticmethod
+    def _ociosa(frame):
+        """Thread bloqueada esperando I/O ou lock (não consome CPU)"""
+        codigo = frame.f_code
+        nome = codigo.co_name
+        arquivo = os.path.basename(codigo.co_filename)
+        return (
+            (arquivo == "selectors.py" and nome == "select")
+            or (arquivo == "threading.py" and nome in ("wait", "_wait_for_tstate_lock"))
+            or (arquivo == "socketserver.py" and nome == "serve_forever")
+            or (arquivo == "queue.py" and nome == "get")
+        )
+
+
+# Instância única compartilhada pelo endpoint HTTP e pelo comando /perfil_cpu
+profiler = SamplingProfiler()
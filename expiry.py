@@ -0,0 +1,77 @@
+"""
+expiry.py - Expiração de solicitações pendentes sem decisão
+Um único task avança a roda de temporizadores a cada segundo; os pedidos
+vencidos vão para uma fila drenada em lotes ritmados (edição dos embeds
+abaixo do rate limit), sem um task por solicitação.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from jobs import Pacer
+from timer_wheel import HierarchicalTimerWheel
+
+
+class PendingExpiry:
+    """Agenda e expira pedidos pendentes: on_expirar(guild_id, discord_id) é uma corrotina"""
+
+    def __init__(self, on_expirar, resolucao=1.0, intervalo=0.5, lote=50):
+        self.on_expirar = on_expirar
+        self.resolucao = resolucao
+        self.lote = lote
+        self.roda = HierarchicalTimerWheel(resolucao, agora=time.time())
+        self.pacer = Pacer(intervalo)
+        self.fila = deque()
+        self.expirados = 0
+        self.falhas = 0
+        self._task = None
+        self._worker = None
+
+    def agendar(self, guild_id, discord_id, instante):
+        self.roda.agendar((str(guild_id), int(discord_id)), instante)
+
+    def cancelar(self, guild_id, discord_id):
+        return self.roda.cancelar((str(guild_id), int(discord_id)))
+
+    def iniciar(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._executar())
+        return self._task
+
+    def parar(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _executar(self):
+        while True:
+            await asyncio.sleep(self.resolucao)
+            vencidos = self.roda.avancar(time.time())
+            if not vencidos:
+                continue
+            self.fila.extend(vencidos)
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.get_running_loop().create_task(self._drenar())
+
+    async def _drenar(self):
+        """Processa a fila em lotes ritmados"""
+        while self.fila:
+            lote = [self.fila.popleft() for _ in range(min(self.lote, len(self.fila)))]
+            for guild_id, discord_id in lote:
+                try:
+                    # Só os pedidos realmente expirados (com edição na API) esperam o pacer
+                    if await self.on_expirar(guild_id, discord_id):
+                        self.expirados += 1
+                        await self.pacer.aguardar()
+                except Exception as e:
+                    self.falhas += 1
+                    print(f"⚠️ Erro ao expirar pedido {guild_id}/{discord_id}: {e}")
+            await asyncio.sleep(0)
+
+    def estatisticas(self):
+        return {
+            "agendados": len(self.roda),
+            "na_fila": len(self.fila),
+            "expirados": self.expirados,
+            "falhas": self.falhas
+        }
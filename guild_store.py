@@ -0,0 +1,162 @@
+"""
+guild_store.py - Configurações por servidor em registros individuais
+Cada servidor é uma chave ("guild:<id>") no estado compartilhado
+(state_backend), lida pelo cache local read-through e gravada individualmente
+(custo constante com milhares de servidores, visível a todas as réplicas).
+"""
+
+import json
+import os
+import sqlite3
+
+from state_backend import CachedState, SQLiteBackend
+
+PREFIXO = "guild:"
+
+# Última versão das chaves antigas do config.json aplicada ao estado
+CHAVE_LEGADO = "config_legado"
+
+# Mapeamento das chaves antigas do config.json para os campos do registro
+CAMPOS_LEGADOS = {
+    "tag_config": "tag",
+    "auto_roles": "cargo",
+    "register_channels": "canal_registro",
+    "approval_channels": "canal_aprovacao"
+}
+
+
+class GuildStore:
+    """Configurações por servidor sobre o estado compartilhado"""
+
+    def __init__(self, estado="bot.db", capacidade=1000):
+        """estado: CachedState ou caminho de um banco SQLite"""
+        if not isinstance(estado, CachedState):
+            estado = CachedState(SQLiteBackend(estado), capacidade)
+        self.estado = estado
+
+    # Estatísticas do cache local (compatibilidade)
+    @property
+    def cache(self):
+        return self.estado.cache
+
+    @property
+    def hits(self):
+        return self.estado.hits
+
+    @property
+    def misses(self):
+        return self.estado.misses
+
+    def get(self, guild_id):
+        """Retorna as configurações do servidor (somente leitura; dict vazio se não configurado)"""
+        return self.estado.get(f"{PREFIXO}{guild_id}", {})
+
+    def set(self, guild_id, dados):
+        """Grava o registro completo de um servidor"""
+        return self.estado.set(f"{PREFIXO}{guild_id}", dict(dados))
+
+    def update(self, guild_id, **campos):
+        """Atualiza campos de um servidor e grava apenas esse registro"""
+        with self.estado.lock:
+            dados = dict(self.get(guild_id))
+            dados.update(campos)
+            return self.set(guild_id, dados)
+
+    def delete(self, guild_id):
+        self.estado.delete(f"{PREFIXO}{guild_id}")
+
+    def ids(self):
+        """Itera os IDs de todos os servidores configurados"""
+        for chave in self.estado.chaves(PREFIXO):
+            yield chave[len(PREFIXO):]
+
+    def __len__(self):
+        return len(self.estado.chaves(PREFIXO))
+
+    def importar_legado(self, config, sobrescrever=False):
+        """
+        Importa as chaves antigas do config.json (tag_config, auto_roles, ...).
+        Na primeira vez não sobrescreve servidores já existentes; depois disso
+        só aplica o que mudou no arquivo desde a última leitura (inclusive com o
+        bot desligado), sem desfazer o que foi alterado por comandos.
+        Retorna quantos servidores foram gravados.
+        """
+        if not sobrescrever and self.estado.get(CHAVE_LEGADO) is not None:
+            return len(self.sincronizar_legado(config))
+
+        registros = {}
+        for chave, campo in CAMPOS_LEGADOS.items():
+            for guild_id, valor in config.get(chave, {}).items():
+                registros.setdefault(str(guild_id), {})[campo] = valor
+
+        if not sobrescrever:
+            total = self.estado.importar({f"{PREFIXO}{guild_id}": campos for guild_id, campos in registros.items()})
+        else:
+            for guild_id, campos in registros.items():
+                self.update(guild_id, **campos)
+            total = len(registros)
+        self.estado.set(CHAVE_LEGADO, _secoes_legadas(config))
+        return total
+
+    def sincronizar_legado(self, config):
+        """
+        Aplica as diferenças entre as chaves antigas do config.json e a última
+        versão aplicada: valores novos ou alterados são gravados e os removidos
+        do arquivo (ex: servidor apagado) saem do registro do servidor.
+        Retorna {guild_id: {campo: valor ou None}} do que foi aplicado.
+        """
+        secoes = _secoes_legadas(config)
+        with self.estado.lock:
+            anteriores = self.estado.get(CHAVE_LEGADO) or {}
+            mudancas = {}
+            for chave, campo in CAMPOS_LEGADOS.items():
+                antes = anteriores.get(chave, {})
+                depois = secoes[chave]
+                for guild_id in antes.keys() | depois.keys():
+                    if antes.get(guild_id) != depois.get(guild_id):
+                        mudancas.setdefault(guild_id, {})[campo] = depois.get(guild_id)
+
+            for guild_id, campos in mudancas.items():
+                dados = dict(self.get(guild_id))
+                for campo, valor in campos.items():
+                    if valor is None:
+                        dados.pop(campo, None)
+                    else:
+                        dados[campo] = valor
+                if dados:
+                    self.set(guild_id, dados)
+                else:
+                    self.delete(guild_id)
+            if secoes != anteriores:
+                self.estado.set(CHAVE_LEGADO, secoes)
+        return mudancas
+
+    def migrar_tabela(self, caminho):
+        """
+        Move a antiga tabela guild_settings (um JSON por servidor) para o estado
+        compartilhado. A tabela é renomeada para não ser importada de novo.
+        """
+        if not os.path.exists(caminho):
+            return 0
+        conn = sqlite3.connect(caminho, isolation_level=None, timeout=5)
+        try:
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'guild_settings'"
+            ).fetchone()
+            if not existe:
+                return 0
+            linhas = conn.execute("SELECT guild_id, dados FROM guild_settings").fetchall()
+            migrados = self.estado.importar({f"{PREFIXO}{guild_id}": json.loads(dados) for guild_id, dados in linhas})
+            conn.execute("ALTER TABLE guild_settings RENAME TO guild_settings_migrada")
+            return migrados
+        finally:
+            conn.close()
+
+    def fechar(self):
+        self.estado.fechar()
+
+
+def _secoes_legadas(config):
+    """Chaves antigas do config.json com os IDs de servidor como texto"""
+    return {chave: {str(guild_id): valor for guild_id, valor in config.get(chave, {}).items()}
+            for chave in CAMPOS_LEGADOS}
@@ -0,0 +1,136 @@
+"""
+health.py - Saúde real do bot (gateway, heartbeat, lag do event loop, filas)
+Um task no event loop recalcula o estado a cada intervalo; os endpoints HTTP
+apenas leem o último snapshot, então cada probe custa microssegundos.
+"""
+
+import asyncio
+import time
+
+
+class HealthMonitor:
+    """Amostra o estado do bot e expõe liveness/readiness"""
+
+    def __init__(self, intervalo=1.0, lag_maximo=5.0, ack_maximo=90.0, desconectado_maximo=300.0):
+        self.bot = None
+        self.intervalo = intervalo
+        self.lag_maximo = lag_maximo
+        self.ack_maximo = ack_maximo
+        self.desconectado_maximo = desconectado_maximo
+        self.filas = {}
+        self.pronto = True
+        # "lider" conecta ao gateway; "seguidor" só atende HTTP (ver coordination.py)
+        self.papel = "lider"
+        self.coordenacao = None
+        self.lag = 0.0
+        self.lag_pico = 0.0
+        self.snapshot = None
+        self._desconectado_desde = None
+        self._task = None
+
+    def attach(self, bot):
+        """Associa o cliente Discord monitorado"""
+        self.bot = bot
+
+    def registrar_fila(self, nome, profundidade):
+        """Registra uma função que retorna o tamanho de uma fila de saída"""
+        self.filas[nome] = profundidade
+
+    def iniciar(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._executar())
+        return self._task
+
+    async def _executar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            antes = loop.time()
+            await asyncio.sleep(self.intervalo)
+            self.lag = max(0.0, loop.time() - antes - self.intervalo)
+            self.lag_pico = max(self.lag_pico * 0.9, self.lag)
+            try:
+                self.snapshot = self._amostrar()
+            except Exception as e:
+                print(f"⚠️ Erro ao amostrar saúde: {e}")
+
+    def _gateway(self):
+        bot = self.bot
+        ws = getattr(bot, "ws", None)
+        conectado = bool(ws) and not bot.is_closed() and getattr(ws, "open", True)
+        keep_alive = getattr(ws, "_keep_alive", None)
+        ultimo_ack = getattr(keep_alive, "_last_ack", None)
+        ack_idade = time.perf_counter() - ultimo_ack if ultimo_ack else None
+        latencia = bot.latency if conectado else None
+        if latencia is not None and latencia != latencia:  # NaN antes do primeiro heartbeat
+            latencia = None
+        return {
+            "conectado": conectado,
+            "ready": bot.is_ready(),
+            "latencia": latencia,
+            "ack_idade": ack_idade,
+            "servidores": len(bot.guilds)
+        }
+
+    def _amostrar(self):
+        agora = time.monotonic()
+        filas = {}
+        for nome, profundidade in self.filas.items():
+            try:
+                filas[nome] = profundidade()
+            except Exception:
+                filas[nome] = None
+
+        gateway = self._gateway() if self.bot else None
+        if gateway and not gateway["conectado"]:
+            if self._desconectado_desde is None:
+                self._desconectado_desde = agora
+        else:
+            self._desconectado_desde = None
+
+        return {
+            "instante": agora,
+            "lag": self.lag,
+            "lag_pico": self.lag_pico,
+            "gateway": gateway,
+            "desconectado_ha": agora - self._desconectado_desde if self._desconectado_desde else 0.0,
+            "filas": filas
+        }
+
+    def liveness(self):
+        """(vivo, motivos, snapshot) - falha com loop travado ou gateway sem ACK"""
+        snapshot = self.snapshot
+        if self.bot is None or self.papel == "seguidor":
+            return True, [], snapshot
+        if snapshot is None:
+            # Ainda inicializando: o loop não rodou a primeira amostra
+            return True, ["inicializando"], snapshot
+
+        motivos = []
+        idade = time.monotonic() - snapshot["instante"]
+        if idade > self.intervalo + self.lag_maximo:
+            motivos.append(f"event loop sem resposta há {idade:.1f}s")
+        if snapshot["lag"] > self.lag_maximo:
+            motivos.append(f"lag do event loop {snapshot['lag']:.2f}s")
+
+        gateway = snapshot["gateway"]
+        if gateway["ack_idade"] is not None and gateway["ack_idade"] > self.ack_maximo:
+            motivos.append(f"último heartbeat ACK há {gateway['ack_idade']:.0f}s")
+        if snapshot["desconectado_ha"] > self.desconectado_maximo:
+            motivos.append(f"gateway desconectado há {snapshot['desconectado_ha']:.0f}s")
+
+        return not motivos, motivos, snapshot
+
+    def readiness(self):
+        """(pronto, motivos, snapshot) - pronto para receber interações"""
+        vivo, motivos, snapshot = self.liveness()
+        motivos = list(motivos)
+        if not self.pronto:
+            motivos.append("encerrando")
+        if self.bot is not None and self.papel != "seguidor":
+            gateway = snapshot["gateway"] if snapshot else None
+            if not gateway or not gateway["ready"] or not gateway["conectado"]:
+                motivos.append("gateway não conectado")
+        return vivo and not motivos, motivos, snapshot
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,122 @@
+"""
+jobs.py - Infraestrutura de trabalhos em segundo plano
+Progresso/ETA, ritmo de chamadas à API e registro dos trabalhos em execução.
+"""
+
+import asyncio
+import time
+
+
+class Pacer:
+    """Garante um intervalo mínimo entre chamadas (ritmo abaixo do rate limit)"""
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._proximo = 0.0
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self):
+        async with self._lock:
+            agora = time.monotonic()
+            if self._proximo > agora:
+                await asyncio.sleep(self._proximo - agora)
+                agora = self._proximo
+            self._proximo = agora + self.intervalo
+
+
+class BackgroundJob:
+    """Base dos trabalhos em segundo plano com progresso e ETA"""
+
+    tipo = "job"
+    descricao = "Trabalho"
+
+    def __init__(self, guild_id):
+        self.guild_id = str(guild_id)
+        self.total = 0
+        self.processados = 0
+        self.cancelado = False
+        self.retomar = False
+        self.erro = None
+        self.inicio = None
+        self.fim = None
+        self._processados_inicio = 0
+
+    @property
+    def chave(self):
+        return f"{self.tipo}:{self.guild_id}"
+
+    @property
+    def duracao(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.monotonic()) - self.inicio
+
+    @property
+    def taxa(self):
+        """Itens processados por segundo nesta execução"""
+        duracao = self.duracao
+        feitos = self.processados - self._processados_inicio
+        return feitos / duracao if duracao > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Segundos estimados até o fim (None se ainda sem taxa)"""
+        taxa = self.taxa
+        if not taxa or self.total <= self.processados:
+            return None
+        return (self.total - self.processados) / taxa
+
+    @property
+    def percentual(self):
+        return 100.0 * self.processados / self.total if self.total else 0.0
+
+    def cancelar(self, retomar=False):
+        """retomar=True (encerramento do bot) mantém o checkpoint para continuar no próximo boot"""
+        self.cancelado = True
+        self.retomar = retomar
+
+    def resumo(self):
+        """Linha de progresso legível"""
+        texto = f"{self.processados}/{self.total} ({self.percentual:.0f}%)"
+        if self.fim is None and self.eta is not None:
+            texto += f" • ETA {int(self.eta // 60)}min {int(self.eta % 60)}s"
+        return texto
+
+    async def executar(self):
+        raise NotImplementedError
+
+
+class JobManager:
+    """Registro dos trabalhos em execução (um por tipo e servidor)"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def get(self, tipo, guild_id):
+        return self.jobs.get(f"{tipo}:{guild_id}")
+
+    def listar(self, guild_id=None):
+        return [job for job in self.jobs.values() if guild_id is None or job.guild_id == str(guild_id)]
+
+    def iniciar(self, job, on_fim=None):
+        """Agenda o trabalho; retorna None se já houver um igual em execução"""
+        if job.chave in self.jobs:
+            return None
+        self.jobs[job.chave] = job
+        return asyncio.get_running_loop().create_task(self._executar(job, on_fim))
+
+    async def _executar(self, job, on_fim):
+        job.inicio = time.monotonic()
+        try:
+            await job.executar()
+        except Exception as e:
+            job.erro = e
+            print(f"⚠️ Erro no trabalho {job.chave}: {e}")
+        finally:
+            job.fim = time.monotonic()
+            self.jobs.pop(job.chave, None)
+            if on_fim:
+                try:
+                    await on_fim(job)
+                except Exception:
+                    pass
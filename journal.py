@@ -0,0 +1,240 @@
+"""
+journal.py - Diário de auditoria append-only (JSONL) com group commit
+Eventos (solicitação, aprovação, recusa, mudanças de configuração) são
+enfileirados sem bloquear o event loop; uma thread grava em lotes e faz
+fsync uma vez por lote, com rotação de segmentos.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+PREFIXO = "journal-"
+EXTENSAO = ".jsonl"
+
+
+def _segmentos(diretorio):
+    """Lista (seq_inicial, caminho) dos segmentos em ordem"""
+    try:
+        nomes = os.listdir(diretorio)
+    except FileNotFoundError:
+        return []
+    segmentos = []
+    for nome in nomes:
+        if nome.startswith(PREFIXO) and nome.endswith(EXTENSAO):
+            try:
+                inicio = int(nome[len(PREFIXO):-len(EXTENSAO)])
+            except ValueError:
+                continue
+            segmentos.append((inicio, os.path.join(diretorio, nome)))
+    segmentos.sort()
+    return segmentos
+
+
+def _ultima_linha(caminho):
+    """Última linha completa de um arquivo (lendo apenas o final)"""
+    with open(caminho, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        tamanho = f.tell()
+        bloco = min(tamanho, 65536)
+        f.seek(tamanho - bloco)
+        linhas = f.read(bloco).split(b"\n")
+    for linha in reversed(linhas):
+        if linha.strip():
+            try:
+                return json.loads(linha)
+            except ValueError:
+                continue  # linha parcial de uma gravação interrompida
+    return None
+
+
+def ler(diretorio, desde_seq=0):
+    """Itera as entradas com seq >= desde_seq, em ordem"""
+    segmentos = _segmentos(diretorio)
+    for i, (inicio, caminho) in enumerate(segmentos):
+        proximo = segmentos[i + 1][0] if i + 1 < len(segmentos) else None
+        if proximo is not None and proximo <= desde_seq:
+            continue  # segmento inteiro antes do ponto pedido
+        with open(caminho, "rb") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break  # cauda parcial
+                try:
+                    entrada = json.loads(linha)
+                except ValueError:
+                    continue
+                if entrada["seq"] >= desde_seq:
+                    yield entrada
+
+
+class AuditJournal:
+    """Escritor em segundo plano com lotes, fsync por grupo e rotação"""
+
+    def __init__(self, diretorio, tamanho_segmento=16 * 1024 * 1024, intervalo=0.05, lote_maximo=1000):
+        self.diretorio = diretorio
+        self.tamanho_segmento = tamanho_segmento
+        self.intervalo = intervalo
+        self.lote_maximo = lote_maximo
+        self.fila = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        # Tomado pela thread de gravação durante cada lote (e pela troca de segmento)
+        self._escrita = threading.Lock()
+
+        self.gravadas = 0
+        self.lotes = 0
+        self.fsyncs = 0
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.seq = 0
+        self._arquivo = None
+        self._continuar_do_disco()
+
+        self._parar = threading.Event()
+        # Contador de pendentes com lock próprio: a thread de gravação nunca precisa de self.lock
+        self._vazio = threading.Condition()
+        self._pendentes = 0
+        self._thread = threading.Thread(target=self._executar, name="journal", daemon=True)
+        self._thread.start()
+
+    def _continuar_do_disco(self):
+        """Próximo seq a partir do último segmento gravado (por qualquer réplica)"""
+        segmentos = _segmentos(self.diretorio)
+        if segmentos:
+            ultima = _ultima_linha(segmentos[-1][1])
+            self.seq = max(self.seq, ultima["seq"] + 1 if ultima else segmentos[-1][0])
+        self._abrir_segmento(segmentos[-1][1] if segmentos else None)
+
+    def sincronizar(self, timeout=5.0):
+        """
+        Relê o seq do disco: chamado ao assumir a liderança, já que o líder
+        anterior pode ter gravado no mesmo diretório desde a construção.
+        registrar() fica bloqueado enquanto isso. Retorna o novo seq, ou None
+        se a fila não esvaziou a tempo (o seq não é alterado).
+        """
+        marcador = threading.Event()
+        with self.lock:
+            # O marcador é o último da fila: quando a thread de gravação chega
+            # nele, todos os eventos com o seq antigo já estão em disco
+            self.fila.put(marcador)
+            if not marcador.wait(timeout):
+                print("⚠️ Diário de auditoria: fila não esvaziou, seq não ressincronizado", file=sys.stderr)
+                return None
+            with self._escrita:
+                self._continuar_do_disco()
+            return self.seq
+
+    def _abrir_segmento(self, caminho=None):
+        if self._arquivo:
+            self._arquivo.close()
+        if caminho is None:
+            caminho = os.path.join(self.diretorio, f"{PREFIXO}{self.seq:012d}{EXTENSAO}")
+        self._arquivo = open(caminho, "ab+")
+        # Linha parcial de uma gravação interrompida: isola antes de continuar
+        if self._arquivo.tell() > 0:
+            self._arquivo.seek(-1, os.SEEK_END)
+            if self._arquivo.read(1) != b"\n":
+                self._arquivo.write(b"\n")
+
+    def registrar(self, tipo, **dados):
+        """Enfileira um evento (não bloqueia; seguro em qualquer thread)"""
+        dados["ts"] = time.time()
+        dados["tipo"] = tipo
+        with self.lock:
+            # Enfileirado sob o lock para manter a ordem dos seq no arquivo
+            seq = dados["seq"] = self.seq
+            self.seq += 1
+            with self._vazio:
+                self._pendentes += 1
+            self.fila.put(dados)
+        return seq
+
+    def _executar(self):
+        while not (self._parar.is_set() and self.fila.empty()):
+            try:
+                lote = [self.fila.get(timeout=self.intervalo)]
+            except queue.Empty:
+                continue
+            # Agrupa tudo que chegou enquanto o lote anterior era gravado
+            while len(lote) < self.lote_maximo:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            marcadores = [entrada for entrada in lote if isinstance(entrada, threading.Event)]
+            if marcadores:
+                lote = [entrada for entrada in lote if not isinstance(entrada, threading.Event)]
+            try:
+                if lote:
+                    with self._escrita:
+                        self._gravar(lote)
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar diário de auditoria: {e}", file=sys.stderr)
+            for marcador in marcadores:
+                marcador.set()
+            with self._vazio:
+                self._pendentes -= len(lote)
+                self._vazio.notify_all()
+
+    def _gravar(self, lote):
+        dados = b"".join(
+            json.dumps(entrada, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for entrada in lote
+        )
+        self._arquivo.write(dados)
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self.gravadas += len(lote)
+        self.lotes += 1
+        self.fsyncs += 1
+
+        if self._arquivo.tell() >= self.tamanho_segmento:
+            # O próximo segmento começa no seq seguinte ao último gravado
+            self._abrir_segmento(os.path.join(
+                self.diretorio, f"{PREFIXO}{lote[-1]['seq'] + 1:012d}{EXTENSAO}"
+            ))
+
+    def flush(self, timeout=5.0):
+        """Aguarda até que todos os eventos enfileirados estejam em disco"""
+        limite = time.monotonic() + timeout
+        with self._vazio:
+            while self._pendentes:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._vazio.wait(restante)
+        return True
+
+    def fechar(self, timeout=5.0):
+        self.flush(timeout)
+        self._parar.set()
+        self._thread.join(timeout)
+        if self._arquivo:
+            self._arquivo.close()
+
+    def estatisticas(self):
+        return {
+            "seq": self.seq,
+            "gravadas": self.gravadas,
+            "lotes": self.lotes,
+            "fsyncs": self.fsyncs,
+            "pendentes": self._pendentes
+        }
+
+
+# Leitura rápida do diário: python journal.py DIRETORIO [desde_seq]
+if __name__ == "__main__":
+    diretorio = sys.argv[1] if len(sys.argv) > 1 else "journal"
+    desde = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    inicio = time.perf_counter()
+    tipos = {}
+    total = 0
+    for entrada in ler(diretorio, desde):
+        tipos[entrada["tipo"]] = tipos.get(entrada["tipo"], 0) + 1
+        total += 1
+    duracao = time.perf_counter() - inicio
+    print(f"{total} entradas em {duracao:.2f}s ({total / duracao if duracao else 0:.0f}/s)")
+    for tipo, quantidade in sorted(tipos.items()):
+        print(f"  {tipo}: {quantidade}")
@@ -3,14 +3,34 @@ keep_alive.py - Servidor web universal com suporte a HTTP traffic
 Otimizado para: Railway, Render, Heroku, VPS com domínio, etc.
 """
 
-from flask import Flask, jsonify, request, redirect
-from threading import Thread
+from flask import Flask, jsonify, request, redirect, Response, stream_with_context
+from threading import Thread, Event
+from werkzeug.serving import make_server
 import time
 import os
 import socket
 import sys
 from datetime import datetime
 import logging
+import csv
+import io
+import json
+import hmac
+import hashlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import urlencode
+
+from health import monitor
+from loop_watchdog import watchdog
+from memory_debug import diagnostico
+from cpu_profiler import profiler, ProfilerOcupado
+from sla import sla
+from registration_store import abrir_leitura, consultar, versao, COLUNAS
+from outbox import contagens as contagens_dm
 
 # Configurar logging
 logging.basicConfig(
@@ -54,7 +74,8 @@ def get_config():
         config['service'] = 'vps/local'
         
         # Verificar se podemos usar porta 80 (HTTP) ou 443 (HTTPS)
-        if hasattr(os, 'geteuid') and os.geteuid() == 0:  # Se executando como root
+        # (apenas sem PORT definida: em containers o healthcheck usa a PORT)
+        if 'PORT' not in os.environ and hasattr(os, 'geteuid') and os.geteuid() == 0:
             config['port'] = 80  # HTTP padrão
             if os.path.exists('/etc/ssl/certs') or os.path.exists('/ssl'):
                 config['enable_https'] = True
@@ -89,6 +110,16 @@ def get_config():
 
 config = get_config()
 
+DATABASE_FILE = os.environ.get("DATABASE_PATH", "bot.db")
+API_TOKEN = os.environ.get("API_TOKEN", "")
+API_CACHE_TTL = float(os.environ.get("API_CACHE_TTL", "2"))
+API_LIMITE_PADRAO = 100
+API_LIMITE_MAXIMO = 1000
+
+# Sinal de prontidão: setado quando o socket HTTP está escutando
+servidor_pronto = Event()
+servidor = None
+
 # Middleware para logging de requests
 @app.before_request
 def log_request_info():
@@ -666,11 +697,38 @@ def home():
     """
     return html
 
+def _estado_bot(motivos, snapshot):
+    """Resumo do snapshot de saúde do bot para as respostas JSON"""
+    if snapshot is None:
+        return {'motivos': motivos, 'papel': monitor.papel}
+    return {
+        'motivos': motivos,
+        'papel': monitor.papel,
+        'gateway': snapshot['gateway'],
+        'event_loop_lag': round(snapshot['lag'], 4),
+        'event_loop_lag_pico': round(snapshot['lag_pico'], 4),
+        'filas': snapshot['filas'],
+        'amostra_idade': round(time.monotonic() - snapshot['instante'], 3)
+    }
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: o processo e o event loop respondem"""
+    vivo, motivos, snapshot = monitor.liveness()
+    return jsonify({'status': 'alive' if vivo else 'dead', 'bot': _estado_bot(motivos, snapshot)}), 200 if vivo else 503
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: gateway conectado e aceitando interações"""
+    pronto, motivos, snapshot = monitor.readiness()
+    return jsonify({'status': 'ready' if pronto else 'not_ready', 'bot': _estado_bot(motivos, snapshot)}), 200 if pronto else 503
+
 @app.route('/health')
 def health():
-    """Endpoint de saúde para monitoramento"""
+    """Endpoint de saúde para monitoramento (reflete a liveness do bot)"""
+    vivo, motivos, snapshot = monitor.liveness()
     health_data = {
-        'status': 'healthy',
+        'status': 'healthy' if vivo else 'unhealthy',
         'timestamp': time.time(),
         'service': 'discord-registration-bot',
         'version': '2.0.0',
@@ -684,9 +742,12 @@ def health():
             'python': sys.version.split()[0],
             'platform': sys.platform,
             'uptime': time.time() - app.start_time if hasattr(app, 'start_time') else 0
-        }
+        },
+        'bot': _estado_bot(motivos, snapshot)
     }
-    return jsonify(health_data)
+    if monitor.coordenacao:
+        health_data['coordenacao'] = monitor.coordenacao()
+    return jsonify(health_data), 200 if vivo else 503
 
 @app.route('/ping')
 def ping():
@@ -726,10 +787,17 @@ def status():
         'endpoints': [
             {'path': '/', 'method': 'GET', 'description': 'Página web principal'},
             {'path': '/health', 'method': 'GET', 'description': 'Health check do sistema'},
+            {'path': '/health/live', 'method': 'GET', 'description': 'Liveness do bot'},
+            {'path': '/health/ready', 'method': 'GET', 'description': 'Readiness do bot'},
             {'path': '/ping', 'method': 'GET', 'description': 'Teste de conectividade'},
             {'path': '/status', 'method': 'GET', 'description': 'Status completo em JSON'},
             {'path': '/metrics', 'method': 'GET', 'description': 'Métricas do sistema'},
-            {'path': '/api/v1/info', 'method': 'GET', 'description': 'Informações da API'}
+            {'path': '/api/v1/info', 'method': 'GET', 'description': 'Informações da API'},
+            {'path': '/export/<guild_id>', 'method': 'GET', 'description': 'Export de registros CSV/NDJSON (Authorization: Bearer API_TOKEN)'},
+            {'path': '/api/v1/guilds/<guild_id>/registrations', 'method': 'GET', 'description': 'Registros paginados com ETag (Authorization: Bearer API_TOKEN)'},
+            {'path': '/api/v1/guilds/<guild_id>/registrations/<user_id>', 'method': 'GET', 'description': 'Registro de um membro (Authorization: Bearer API_TOKEN)'},
+            {'path': '/debug/memory', 'method': 'GET/POST', 'description': 'Diagnóstico de memória (Authorization: Bearer API_TOKEN)'},
+            {'path': '/debug/cpu', 'method': 'GET', 'description': 'Profiling de CPU em collapsed stacks (Authorization: Bearer API_TOKEN)'}
         ]
     }
     return jsonify(status_data)
@@ -748,10 +816,306 @@ def metrics():
             '3xx': getattr(app, 'response_3xx', 0),
             '4xx': getattr(app, 'response_4xx', 0),
             '5xx': getattr(app, 'response_5xx', 0)
-        }
+        },
+        'event_loop_watchdog': watchdog.estatisticas(),
+        'api_cache': api_cache.estatisticas(),
+        'tempo_decisao': sla.estatisticas()
     }
+    try:
+        with _leitura() as conn:
+            metrics_data['notificacoes_dm'] = contagens_dm(conn)
+    except sqlite3.Error:
+        metrics_data['notificacoes_dm'] = {}
     return jsonify(metrics_data)
 
+def requer_token(funcao):
+    """
+    Exige o API_TOKEN no header Authorization: Bearer. Não é aceito na query
+    string: a linha da requisição vai para o log e para a chave do cache.
+    """
+    @wraps(funcao)
+    def verificar(*args, **kwargs):
+        if not API_TOKEN:
+            return jsonify({'error': 'API desabilitada (defina API_TOKEN)', 'status': 403}), 403
+        enviado = request.headers.get('Authorization', '')
+        enviado = enviado[7:] if enviado.startswith('Bearer ') else ''
+        if not hmac.compare_digest(enviado.encode(), API_TOKEN.encode()):
+            return jsonify({'error': 'Não autorizado', 'status': 401}), 401
+        return funcao(*args, **kwargs)
+    return verificar
+
+def _parse_data(valor):
+    """Aceita YYYY-MM-DD, ISO 8601 ou timestamp; retorna epoch ou None"""
+    if not valor:
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        return datetime.fromisoformat(valor).timestamp()
+
+def _filtros_registros():
+    """Filtros comuns (?desde, ?ate, ?status, ?recrutador) dos endpoints de registros"""
+    return {
+        'desde': _parse_data(request.args.get('desde')),
+        'ate': _parse_data(request.args.get('ate')),
+        'status': request.args.get('status') or None,
+        'recrutador': request.args.get('recrutador') or None
+    }
+
+def _gerar_export(guild_id, filtros, formato):
+    """Gera o export em blocos a partir de um cursor (memória constante)"""
+    conn = abrir_leitura(DATABASE_FILE)
+    try:
+        buffer = io.StringIO()
+        if formato == 'csv':
+            escritor = csv.writer(buffer)
+            escritor.writerow(COLUNAS)
+        bloco = 0
+        for linha in consultar(conn, guild_id, **filtros):
+            if formato == 'csv':
+                escritor.writerow(tuple(linha))
+            else:
+                buffer.write(json.dumps(dict(linha), ensure_ascii=False))
+                buffer.write('\n')
+            bloco += 1
+            if bloco >= 200:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                bloco = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
+@app.route('/export/<int:guild_id>')
+@requer_token
+def export_registros(guild_id):
+    """Exporta registros de um servidor em CSV ou NDJSON (streaming)"""
+    formato = request.args.get('formato', 'csv').lower()
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'error': 'formato deve ser csv ou ndjson', 'status': 400}), 400
+    try:
+        filtros = _filtros_registros()
+    except ValueError:
+        return jsonify({'error': 'data inválida (use YYYY-MM-DD)', 'status': 400}), 400
+    if not os.path.exists(DATABASE_FILE):
+        return jsonify({'error': 'Banco de dados não encontrado', 'status': 404}), 404
+
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    nome = f"registros-{guild_id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{formato}"
+    return Response(
+        stream_with_context(_gerar_export(guild_id, filtros, formato)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{nome}"'}
+    )
+
+# ================= API DE REGISTROS =================
+_conexoes = queue.SimpleQueue()
+
+@contextmanager
+def _leitura():
+    """Conexão somente leitura reaproveitada entre requisições"""
+    try:
+        conn = _conexoes.get_nowait()
+    except queue.Empty:
+        conn = abrir_leitura(DATABASE_FILE)
+    try:
+        yield conn
+    except Exception:
+        conn.close()
+        raise
+    _conexoes.put(conn)
+
+class RespostaCache:
+    """
+    Cache curto de respostas da API por URL. Dentro do TTL a resposta é servida
+    sem tocar no banco; depois disso basta conferir a versão do servidor.
+    """
+
+    def __init__(self, ttl, capacidade=512):
+        self.ttl = ttl
+        self.capacidade = capacidade
+        self.itens = {}
+        self.lock = threading.Lock()
+        self.acertos = 0
+        self.revalidacoes = 0
+        self.faltas = 0
+
+    def get(self, chave):
+        with self.lock:
+            item = self.itens.get(chave)
+            if item and item[0] > time.monotonic():
+                self.acertos += 1
+                return item
+        return None
+
+    def revalidar(self, chave, versao_atual):
+        """Reaproveita a resposta expirada se a versão não mudou"""
+        with self.lock:
+            item = self.itens.get(chave)
+            if item and item[1] == versao_atual:
+                self.revalidacoes += 1
+                item = self.itens[chave] = (time.monotonic() + self.ttl,) + item[1:]
+                return item
+            self.faltas += 1
+        return None
+
+    def set(self, chave, versao_atual, etag, corpo):
+        with self.lock:
+            if len(self.itens) >= self.capacidade and chave not in self.itens:
+                self.itens.pop(next(iter(self.itens)))
+            item = self.itens[chave] = (time.monotonic() + self.ttl, versao_atual, etag, corpo)
+        return item
+
+    def estatisticas(self):
+        return {
+            'itens': len(self.itens),
+            'acertos': self.acertos,
+            'revalidacoes': self.revalidacoes,
+            'faltas': self.faltas
+        }
+
+api_cache = RespostaCache(API_CACHE_TTL)
+
+def _responder_api(guild_id, gerar):
+    """
+    Resposta JSON com ETag (versão do servidor + URL) e GET condicional.
+    gerar(conn) monta o corpo; retorna None para 404.
+    """
+    chave = request.full_path
+    item = api_cache.get(chave)
+    if item is None:
+        if not os.path.exists(DATABASE_FILE):
+            return jsonify({'error': 'Banco de dados não encontrado', 'status': 404}), 404
+        with _leitura() as conn:
+            versao_atual = versao(conn, guild_id)
+            item = api_cache.revalidar(chave, versao_atual)
+            if item is None:
+                corpo = gerar(conn)
+                if corpo is None:
+                    return jsonify({'error': 'Registro não encontrado', 'status': 404}), 404
+                corpo = json.dumps(corpo, ensure_ascii=False)
+                etag = f'W/"{guild_id}-{versao_atual}-{hashlib.sha1(chave.encode()).hexdigest()[:12]}"'
+                item = api_cache.set(chave, versao_atual, etag, corpo)
+
+    etag = item[2]
+    cabecalhos = {'ETag': etag, 'Cache-Control': f'private, max-age={int(API_CACHE_TTL)}'}
+    enviados = [valor.strip() for valor in request.headers.get('If-None-Match', '').split(',')]
+    if etag in enviados or '*' in enviados:
+        return Response(status=304, headers=cabecalhos)
+    return Response(item[3], mimetype='application/json', headers=cabecalhos)
+
+@app.route('/api/v1/guilds/<int:guild_id>/registrations')
+@requer_token
+def api_registros(guild_id):
+    """Lista registros com paginação por chave (?after=<discord_id>&limit=N)"""
+    try:
+        filtros = _filtros_registros()
+    except ValueError:
+        return jsonify({'error': 'data inválida (use YYYY-MM-DD)', 'status': 400}), 400
+    try:
+        after = _parametro_inteiro('after')
+        limite = min(max(_parametro_inteiro('limit', API_LIMITE_PADRAO), 1), API_LIMITE_MAXIMO)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 400}), 400
+
+    def gerar(conn):
+        # Busca um a mais para saber se há próxima página
+        linhas = [dict(linha) for linha in consultar(conn, guild_id, after_id=after, limite=limite + 1, **filtros)]
+        proximo = None
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            proximo = linhas[-1]['discord_id']
+        return {
+            'guild_id': str(guild_id),
+            'data': linhas,
+            'next': proximo,
+            'next_url': f"{request.path}?{_query_proxima(proximo)}" if proximo else None
+        }
+
+    return _responder_api(guild_id, gerar)
+
+def _parametro_inteiro(nome, padrao=None):
+    """Inteiro da query string; ValueError (→ 400) em vez de cair no padrão silenciosamente"""
+    valor = request.args.get(nome)
+    if valor is None or valor == '':
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"{nome} deve ser um número inteiro")
+
+def _query_proxima(proximo):
+    argumentos = request.args.to_dict()
+    argumentos['after'] = proximo
+    return urlencode(argumentos)
+
+@app.route('/api/v1/guilds/<int:guild_id>/registrations/<int:user_id>')
+@requer_token
+def api_registro(guild_id, user_id):
+    """Registro de um membro no servidor"""
+    def gerar(conn):
+        linha = conn.execute(
+            f"SELECT {', '.join(COLUNAS)} FROM registros WHERE guild_id = ? AND discord_id = ?",
+            (str(guild_id), user_id)
+        ).fetchone()
+        return dict(linha) if linha else None
+
+    return _responder_api(guild_id, gerar)
+
+# ================= DIAGNÓSTICO =================
+@app.route('/debug/memory')
+@requer_token
+def debug_memory():
+    """Contagens de cache e, com tracemalloc ativo, maiores alocações e diff"""
+    try:
+        limite = min(max(_parametro_inteiro('limit', 20), 1), 200)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 400}), 400
+    agrupar = request.args.get('agrupar', 'lineno')
+    if agrupar not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': 'agrupar deve ser lineno, filename ou traceback', 'status': 400}), 400
+    tipos = [nome for nome in request.args.get('objetos', '').split(',') if nome]
+    return jsonify({
+        'tracemalloc': diagnostico.ativo,
+        'contagens': diagnostico.contagens(monitor.bot, tipos),
+        'alocacoes': diagnostico.alocacoes(limite, agrupar),
+        'timestamp': time.time()
+    })
+
+@app.route('/debug/memory/<acao>', methods=['POST'])
+@requer_token
+def debug_memory_acao(acao):
+    """iniciar (com ?frames=N), marcar (novo snapshot base) ou parar o tracemalloc"""
+    if acao == 'iniciar':
+        diagnostico.iniciar(min(max(request.args.get('frames', 1, type=int), 1), 25))
+    elif acao == 'marcar':
+        if not diagnostico.marcar():
+            return jsonify({'error': 'tracemalloc não está ativo', 'status': 409}), 409
+    elif acao == 'parar':
+        diagnostico.parar()
+    else:
+        return jsonify({'error': 'ação deve ser iniciar, marcar ou parar', 'status': 400}), 400
+    return jsonify({'acao': acao, 'tracemalloc': diagnostico.ativo})
+
+@app.route('/debug/cpu')
+@requer_token
+def debug_cpu():
+    """Profiling por amostragem de todas as threads (?segundos=N) em collapsed stacks"""
+    segundos = min(max(request.args.get('segundos', 10, type=float), 0.1), 120)
+    intervalo = min(max(request.args.get('intervalo_ms', 10, type=float), 1), 1000) / 1000
+    ociosas = request.args.get('ociosas', '0') in ('1', 'true')
+    try:
+        pilhas = profiler.coletar(segundos, intervalo, ociosas)
+    except ProfilerOcupado as e:
+        return jsonify({'error': str(e), 'status': 409}), 409
+    resumo = profiler.ultima
+    return Response(pilhas, mimetype='text/plain', headers={
+        'Content-Disposition': f'inline; filename="cpu-{int(resumo["em"])}.folded"',
+        'X-Profile-Samples': str(resumo['amostras'])
+    })
+
 @app.route('/api/v1/info')
 def api_info():
     """Informações da API"""
@@ -762,7 +1126,9 @@ def api_info():
             'description': 'API para monitoramento do bot de registro Discord',
             'documentation': '/',
             'health': '/health',
-            'status': '/status'
+            'status': '/status',
+            'registrations': '/api/v1/guilds/<guild_id>/registrations',
+            'registration': '/api/v1/guilds/<guild_id>/registrations/<user_id>'
         },
         'author': {
             'name': 'Discord Bot System',
@@ -796,7 +1162,31 @@ def server_error(error):
         'timestamp': time.time()
     }), 500
 
-def run_server():
+def _servir(port, ssl_context=None, on_pronto=None):
+    """Abre o socket, sinaliza prontidão e atende requisições até o encerramento"""
+    global servidor
+    servidor = make_server(
+        config['host'],
+        port,
+        app,
+        threaded=True,
+        ssl_context=ssl_context
+    )
+    config['port'] = port
+    servidor_pronto.set()
+    logger.info(f"✅ Servidor HTTP escutando na porta {port}")
+    if on_pronto:
+        on_pronto()
+    servidor.serve_forever()
+
+def parar_servidor():
+    """Encerra o servidor HTTP (chamado no fim do encerramento gracioso)"""
+    if servidor is not None:
+        servidor.shutdown()
+        servidor.server_close()
+        logger.info("👋 Servidor HTTP finalizado")
+
+def run_server(on_pronto=None):
     """Inicia o servidor Flask com suporte a HTTP/HTTPS"""
     try:
         logger.info(f"🚀 Iniciando servidor web em {config['host']}:{config['port']}")
@@ -823,36 +1213,21 @@ def run_server():
                 context.load_cert_chain(config['ssl_cert'], config['ssl_key'])
                 
                 # Iniciar servidor HTTPS
-                app.run(
-                    host=config['host'],
-                    port=config['port'],
-                    debug=config['debug'],
-                    threaded=True,
-                    use_reloader=False,
-                    ssl_context=context
-                )
+                _servir(config['port'], ssl_context=context, on_pronto=on_pronto)
             except Exception as ssl_error:
+                if servidor_pronto.is_set():
+                    raise
                 logger.error(f"❌ Erro SSL: {ssl_error}")
                 logger.info("🔄 Voltando para HTTP...")
-                app.run(
-                    host=config['host'],
-                    port=config['port'],
-                    debug=config['debug'],
-                    threaded=True,
-                    use_reloader=False
-                )
+                _servir(config['port'], on_pronto=on_pronto)
         else:
             # Iniciar servidor HTTP normal
-            app.run(
-                host=config['host'],
-                port=config['port'],
-                debug=config['debug'],
-                threaded=True,
-                use_reloader=False
-            )
+            _servir(config['port'], on_pronto=on_pronto)
             
     except Exception as e:
         logger.error(f"❌ Erro ao iniciar servidor: {e}")
+        if servidor_pronto.is_set():
+            return
         
         # Tentar portas alternativas
         alt_ports = [5000, 3000, 8000, 8080]
@@ -860,20 +1235,14 @@ def run_server():
             if port != config['port']:
                 logger.info(f"🔄 Tentando porta alternativa {port}...")
                 try:
-                    app.run(
-                        host=config['host'],
-                        port=port,
-                        debug=False,
-                        threaded=True,
-                        use_reloader=False
-                    )
+                    _servir(port, on_pronto=on_pronto)
                     break
                 except:
                     continue
         
         logger.error("💡 Dica: Verifique permissões de porta ou use outra PORT no ambiente")
 
-def keep_alive():
+def keep_alive(timeout=5):
     """
     Inicia o servidor web em uma thread separada
     Suporta HTTP traffic em qualquer porta
@@ -882,8 +1251,10 @@ def keep_alive():
         server_thread = Thread(target=run_server, daemon=True)
         server_thread.start()
         
-        # Pequena pausa para garantir inicialização
-        time.sleep(3)
+        # Aguarda o socket estar escutando (sem pausa fixa)
+        if not servidor_pronto.wait(timeout):
+            logger.error("⚠️ Servidor HTTP ainda não respondeu, seguindo sem aguardar")
+            return False
         
         logger.info(f"✅ Servidor HTTP iniciado na porta {config['port']}")
         logger.info(f"🏠 Hospedagem: {config['service'].upper()}")
@@ -0,0 +1,115 @@
+"""
+loop_watchdog.py - Detecção de callbacks lentos no event loop
+Um task no loop atualiza um batimento em alta frequência; uma thread auxiliar
+verifica o batimento e, quando o loop fica travado além do limite, captura a
+pilha da thread do loop para identificar o código bloqueante.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+DIRETORIO_BOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopWatchdog:
+    """Vigia de lag do event loop com captura da pilha do callback lento"""
+
+    def __init__(self, intervalo=0.05, limite=0.25):
+        self.intervalo = intervalo
+        self.limite = limite
+        self.ativo = False
+        self.bloqueios = 0
+        self.maior_bloqueio = 0.0
+        self.locais = Counter()
+        self.ultimo = None
+        self._batimento = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._parar = threading.Event()
+
+    def iniciar(self, limite=None):
+        """Ativa o watchdog (deve ser chamado de dentro do event loop)"""
+        if limite is not None:
+            self.limite = limite
+        if self.ativo:
+            return
+        self.ativo = True
+        self._loop_thread = threading.get_ident()
+        self._batimento = time.monotonic()
+        # Evento próprio de cada thread: um parar()/iniciar() seguido não deixa a anterior viva
+        self._parar = threading.Event()
+        self._task = asyncio.get_running_loop().create_task(self._bater())
+        self._thread = threading.Thread(target=self._vigiar, args=(self._parar,), name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        if not self.ativo:
+            return
+        self.ativo = False
+        self._parar.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _bater(self):
+        while True:
+            self._batimento = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+
+    def _capturar(self):
+        """Retorna (local, pilha) da thread do event loop"""
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return "desconhecido", []
+        pilha = traceback.extract_stack(frame)
+
+        # Frame mais interno do código do bot; se não houver, o mais interno de todos
+        local = pilha[-1]
+        for item in reversed(pilha):
+            if item.filename.startswith(DIRETORIO_BOT):
+                local = item
+                break
+        descricao = f"{os.path.basename(local.filename)}:{local.lineno} em {local.name}"
+        return descricao, traceback.format_list(pilha[-8:])
+
+    def _vigiar(self, parar):
+        capturado = None
+        while not parar.wait(self.intervalo):
+            batimento = self._batimento
+            atraso = time.monotonic() - batimento - self.intervalo
+            if atraso > self.limite:
+                if capturado is None:
+                    capturado = (batimento, self._capturar())
+                continue
+
+            if capturado is not None:
+                # Loop voltou: a duração vai do último batimento antes do travamento até o novo
+                inicio, (local, pilha) = capturado
+                self._registrar(local, pilha, batimento - inicio - self.intervalo)
+                capturado = None
+
+    def _registrar(self, local, pilha, duracao):
+        self.bloqueios += 1
+        self.maior_bloqueio = max(self.maior_bloqueio, duracao)
+        self.locais[local] += 1
+        self.ultimo = {"local": local, "duracao": duracao, "quando": time.time()}
+        print(f"🐢 Event loop bloqueado por ~{duracao * 1000:.0f}ms em {local}")
+        print("".join(pilha).rstrip())
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "limite_ms": round(self.limite * 1000),
+            "bloqueios": self.bloqueios,
+            "maior_bloqueio_ms": round(self.maior_bloqueio * 1000),
+            "ultimo": self.ultimo,
+            "locais": dict(self.locais.most_common(10))
+        }
+
+
+watchdog = LoopWatchdog()
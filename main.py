@@ -3,6 +3,9 @@ main.py - Bot de Registro Discord 100% Funcional
 Compatível com: Shard Cloud, Railway, Render, VPS, etc.
 """
 
+# Importado primeiro para medir o tempo dos demais imports (--profile-startup)
+from startup_profile import perfil
+
 import discord
 from discord import app_commands
 import os
@@ -10,8 +13,36 @@ import json
 import datetime
 import asyncio
 import time
+import functools
+import io
+import sys
 from typing import Optional
 
+from backpressure import RegistrationBackpressure, MODO_NORMAL, MODO_DESCARTE
+from purge import PurgeJob
+from config_watcher import ConfigWatcher, diff_servidores
+from guild_store import GuildStore
+from health import monitor as health_monitor
+from loop_watchdog import watchdog
+from cpu_profiler import profiler, ProfilerOcupado
+from registration_store import RegistrationStore, PENDENTE, APROVADO, RECUSADO, REGISTRADOS
+from expiry import PendingExpiry
+from sla import sla, LembreteSLA, formatar_duracao
+from backfill import BackfillJob
+from journal import AuditJournal
+from jobs import JobManager
+from member_jobs import TagPropagationJob, RoleMigrationJob
+from shutdown import GracefulShutdown
+from coordination import criar_eleicao
+from state_backend import CachedState, criar_backend
+from validation import validador_de, RegraInvalida
+from component_router import ComponentRouter, montar
+from outbox import DMOutbox, EntregaImpossivel
+from resolved_config import ResolvedGuildConfig
+import nickname_template
+
+perfil.marcar("imports")
+
 # ================= CONFIGURAÇÃO INICIAL =================
 print("=" * 60)
 print("🤖 BOT DE REGISTRO DISCORD - 100% GARANTIDO")
@@ -33,20 +64,35 @@ class RegistrationBot(discord.Client):
         self.start_time = time.time()
 
     async def setup_hook(self):
+        perfil.marcar("login")
         try:
             synced = await self.tree.sync()
             print(f"✅ {len(synced)} comandos sincronizados")
         except Exception as e:
             print(f"⚠️ Erro ao sincronizar: {e}")
+        perfil.marcar("sync de comandos")
+        health_monitor.iniciar()
+        if config["settings"].get("loop_watchdog"):
+            watchdog.iniciar(config["settings"].get("loop_watchdog_limite_ms", 250) / 1000)
+        config_watcher.iniciar()
+        print(f"👀 Observando {CONFIG_FILE} ({config_watcher.modo})")
+        desligamento.instalar(encerrar_bot)
+        expiracao.iniciar()
+        carregar_expiracoes()
+        carregar_sla()
+        lembrete_sla.iniciar()
+        notificacoes.iniciar()
+        print(f"⌛ {len(expiracao.roda)} solicitação(ões) pendente(s) com expiração agendada")
         print("✅ Bot pronto para uso!")
 
 bot = RegistrationBot()
 
 # ================= CONFIGURAÇÕES =================
 CONFIG_FILE = "config.json"
+DATABASE_FILE = os.environ.get("DATABASE_PATH", "bot.db")
 
-def load_config():
-    """Carrega ou cria configuração"""
+def load_config(strict=False):
+    """Carrega ou cria configuração (strict=True propaga erros de leitura)"""
     default_config = {
         "TOKEN": os.environ.get("DISCORD_TOKEN", "SEU_TOKEN_AQUI"),
         "auto_roles": {},
@@ -73,6 +119,8 @@ def load_config():
         else:
             return default_config
     except Exception:
+        if strict:
+            raise
         return default_config
 
 def save_config(config):
@@ -80,12 +128,217 @@ def save_config(config):
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
+        config_watcher.marcar_gravacao()
         return True
     except Exception:
         return False
 
 config = load_config()
 
+# Estado compartilhado entre réplicas (configurações por servidor, admins, pedidos pendentes)
+# STATE_BACKEND: memory://, sqlite:///caminho.db (padrão: DATABASE_PATH) ou redis://host:6379/0
+estado = CachedState(criar_backend(os.environ.get("STATE_BACKEND", DATABASE_FILE)))
+
+# Configurações por servidor (tag, cargo, canais), um registro por servidor
+guild_store = GuildStore(estado)
+_migrados = guild_store.migrar_tabela(DATABASE_FILE)
+if _migrados:
+    print(f"📦 {_migrados} servidor(es) migrados para o estado compartilhado")
+_importados = guild_store.importar_legado(config)
+if _importados:
+    print(f"📦 {_importados} servidor(es) importados do config.json")
+
+def listar_admins():
+    return estado.get("admins", [])
+
+def sincronizar_admins(ids, removidos=()):
+    """
+    O estado compartilhado é a fonte dos admins (/add_admin em qualquer réplica):
+    os admins do config.json local são somados a ele, e só saem os que foram
+    removidos do arquivo durante uma recarga.
+    """
+    with estado.lock:
+        atuais = listar_admins()
+        novos = [i for i in dict.fromkeys(atuais + list(ids)) if i not in removidos]
+        if novos != atuais:
+            estado.set("admins", novos)
+
+sincronizar_admins(config.get("admins", []))
+
+# Registros de membros (solicitações, aprovações e importações)
+registros = RegistrationStore(DATABASE_FILE)
+
+# Caixa de saída das DMs aos membros (entregue em segundo plano)
+async def enviar_dm(discord_id, conteudo):
+    try:
+        usuario = bot.get_user(discord_id) or await bot.fetch_user(discord_id)
+        await usuario.send(conteudo)
+    except (discord.Forbidden, discord.NotFound) as e:
+        raise EntregaImpossivel(f"{e.status}: {e.text or 'DM indisponível'}") from e
+
+notificacoes = DMOutbox(DATABASE_FILE, enviar_dm, intervalo=config["settings"].get("dm_intervalo", 1.0))
+
+# Eleição de líder entre réplicas: só o líder conecta ao gateway
+# COORDINATION_BACKEND: nenhum (padrão, réplica única), arquivo ou sqlite
+eleicao = criar_eleicao(
+    os.environ.get("COORDINATION_BACKEND", "nenhum"),
+    os.environ.get("COORDINATION_PATH", DATABASE_FILE),
+    ttl=float(os.environ.get("LEASE_TTL", "10"))
+)
+
+# Diário de auditoria append-only (sobrevive a limpezas de canal)
+JOURNAL_DIR = os.environ.get("JOURNAL_PATH", os.path.join(os.path.dirname(DATABASE_FILE), "journal"))
+auditoria = AuditJournal(JOURNAL_DIR)
+
+perfil.marcar("carga da configuração")
+
+def save_guild(guild_id, autor=None, **campos):
+    """Salva configurações de um servidor"""
+    try:
+        guild_store.update(guild_id, **campos)
+        auditoria.registrar("config", guild_id=str(guild_id), autor=autor, campos=campos)
+        return True
+    except Exception:
+        return False
+
+# ================= CANAIS E CARGO RESOLVIDOS =================
+async def avisar_config_quebrada(guild, resolucao):
+    """Avisa a staff uma vez: no canal de aprovação se ele ainda funciona, senão por DM ao dono"""
+    embed = discord.Embed(
+        title="⚠️ CONFIGURAÇÃO DO REGISTRO QUEBRADA",
+        description="\n".join(f"• {problema}" for problema in resolucao.problemas),
+        color=discord.Color.red()
+    )
+    embed.add_field(name="🔧 Como corrigir", value="Use `/setup` para reconfigurar os canais e o cargo.", inline=False)
+    
+    if resolucao.canal_aprovacao:
+        await resolucao.canal_aprovacao.send(embed=embed)
+    elif guild.owner_id:
+        notificacoes.enfileirar(
+            guild.id, guild.owner_id, "config",
+            f"⚠️ A configuração do registro em **{guild.name}** está quebrada:\n"
+            + "\n".join(f"• {problema}" for problema in resolucao.problemas)
+            + "\nUse `/setup` no servidor para corrigir."
+        )
+
+config_resolvida = ResolvedGuildConfig(guild_store.get, on_quebra=avisar_config_quebrada)
+REGISTRO_INDISPONIVEL = "⚠️ O registro está temporariamente indisponível. A staff já foi avisada!"
+
+def canal_aprovacao(guild_id):
+    """Canal de aprovação resolvido (None se o servidor não existe/não está configurado/quebrado)"""
+    guild = bot.get_guild(int(guild_id))
+    return config_resolvida.resolver(guild).canal_aprovacao if guild else None
+
+def revalidar_config(guild, objeto_id):
+    """Evento de canal/cargo: se era um dos configurados, resolve de novo (e avisa se quebrou)"""
+    if config_resolvida.invalidar(guild.id, objeto_id):
+        config_resolvida.resolver(guild)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    revalidar_config(channel.guild, channel.id)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    revalidar_config(after.guild, after.id)
+
+@bot.event
+async def on_guild_role_delete(role):
+    revalidar_config(role.guild, role.id)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    # Mudanças nos cargos do próprio bot afetam permissões e hierarquia
+    if after.guild.me and after in after.guild.me.roles:
+        if config_resolvida.invalidar(after.guild.id):
+            config_resolvida.resolver(after.guild)
+        return
+    revalidar_config(after.guild, after.id)
+
+@bot.event
+async def on_member_update(before, after):
+    # Cargos do próprio bot mudaram: permissões e hierarquia precisam ser reavaliadas
+    if after.id == bot.user.id and before.roles != after.roles:
+        if config_resolvida.invalidar(after.guild.id):
+            config_resolvida.resolver(after.guild)
+
+@bot.event
+async def on_guild_remove(guild):
+    config_resolvida.esquecer(guild.id)
+
+# ================= CONTROLE DE CARGA =================
+async def alertar_staff_carga(guild_id, anterior, novo, taxa):
+    """Avisa a staff quando o servidor entra ou sai do modo de pico"""
+    channel = canal_aprovacao(guild_id)
+    if not channel:
+        return
+    
+    if novo == MODO_NORMAL:
+        embed = discord.Embed(
+            title="✅ VOLUME NORMALIZADO",
+            description="A fila de registros foi processada.",
+            color=discord.Color.green()
+        )
+    else:
+        embed = discord.Embed(
+            title="🚨 PICO DE REGISTROS",
+            description=f"{taxa} solicitações em {int(backpressure.janela)}s. Modo: **{novo}**",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="📥 Na fila", value=backpressure.tamanho(guild_id), inline=True)
+    
+    try:
+        await channel.send(embed=embed)
+    except Exception:
+        pass
+
+backpressure = RegistrationBackpressure(on_mudanca_modo=alertar_staff_carga)
+backpressure.configurar(config["settings"])
+
+# ================= SAÚDE =================
+health_monitor.attach(bot)
+health_monitor.registrar_fila("registros", lambda: sum(len(e.fila) for e in backpressure.servidores.values()))
+health_monitor.registrar_fila("auditoria", lambda: auditoria.estatisticas()["pendentes"])
+health_monitor.registrar_fila("expiracoes", lambda: len(expiracao.fila))
+health_monitor.registrar_fila("notificacoes", notificacoes.pendentes)
+
+# ================= ENCERRAMENTO GRACIOSO =================
+desligamento = GracefulShutdown(float(os.environ.get("SHUTDOWN_TIMEOUT", "20")))
+desligamento.registrar_fila("registros", lambda: sum(len(e.fila) for e in backpressure.servidores.values()))
+desligamento.registrar_fila("trabalhos", lambda: len(job_manager.jobs) + len(backfill_jobs) + len(purge_jobs))
+desligamento.registrar_flush("auditoria", lambda: asyncio.to_thread(auditoria.flush))
+
+async def recusar_se_encerrando(interaction):
+    """Responde e retorna True se o bot estiver encerrando"""
+    if not desligamento.encerrando:
+        return False
+    await interaction.response.send_message("🔄 O bot está reiniciando, tente novamente em instantes.", ephemeral=True)
+    return True
+
+# ================= RECARGA DO CONFIG.JSON =================
+def aplicar_config(novo):
+    """Troca atomicamente o snapshot da configuração em memória"""
+    global config
+    mudancas = diff_servidores(config, novo)
+    removidos = set(config.get("admins", [])) - set(novo.get("admins", []))
+    config = novo
+    backpressure.configurar(config["settings"])
+    sincronizar_admins(config.get("admins", []), removidos)
+    
+    print(f"🔄 config.json recarregado: {len(mudancas)} servidor(es) alterado(s)")
+    for guild_id, chaves in mudancas.items():
+        print(f"   • {guild_id}: {', '.join(chaves)}")
+    # Edições manuais nas chaves antigas são aplicadas ao registro do servidor (remoções inclusive)
+    try:
+        aplicadas = guild_store.sincronizar_legado(config)
+    except Exception as e:
+        print(f"⚠️ Erro ao aplicar o config.json aos servidores: {e}")
+        return
+    for guild_id, campos in aplicadas.items():
+        auditoria.registrar("config", guild_id=guild_id, autor=CONFIG_FILE, campos=campos)
+
+config_watcher = ConfigWatcher(CONFIG_FILE, lambda: load_config(strict=True), aplicar_config)
+
 # ================= FUNÇÕES AUXILIARES =================
 def is_admin(interaction):
     """Verifica se é admin"""
@@ -94,23 +347,20 @@ def is_admin(interaction):
         return True
     if user.id in config.get("super_admins", []):
         return True
-    if user.id in config.get("admins", []):
+    if user.id in listar_admins():
         return True
     if user.guild_permissions.administrator:
         return True
     return False
 
+def montar_nickname(tag, nome, user_id_num, template=None):
+    """Monta o nickname de registro pelo template compilado do servidor"""
+    return nickname_template.compilar(template, tag).format(nome, user_id_num)
+
 async def update_user_nickname(member, nome, user_id_num, guild_id):
     """Atualiza nickname"""
-    tag = config["tag_config"].get(str(guild_id), "")
-    
-    if tag:
-        nickname = f"{tag}・{nome} | {user_id_num}"
-    else:
-        nickname = f"{nome} | {user_id_num}"
-    
-    if len(nickname) > 32:
-        nickname = nickname[:32]
+    settings = guild_store.get(guild_id)
+    nickname = montar_nickname(settings.get("tag", ""), nome, user_id_num, settings.get("template"))
     
     try:
         await member.edit(nick=nickname)
@@ -118,6 +368,105 @@ async def update_user_nickname(member, nome, user_id_num, guild_id):
     except:
         return False, "Erro"
 
+# ================= TRABALHOS EM SEGUNDO PLANO =================
+job_manager = JobManager()
+
+def iniciar_propagacao_tag(guild, tag, template=None):
+    """Agenda a atualização da tag/template nos apelidos dos membros registrados"""
+    existente = job_manager.get(TagPropagationJob.tipo, guild.id)
+    if existente:
+        existente.cancelar()
+    
+    job = TagPropagationJob(
+        registros,
+        guild,
+        tag,
+        functools.partial(montar_nickname, template=template),
+        intervalo=config["settings"].get("intervalo_edicao_membro", 1.0),
+        template=template
+    )
+    if existente:
+        # Aguarda o anterior liberar o registro antes de iniciar o novo
+        async def reiniciar():
+            while job_manager.get(TagPropagationJob.tipo, guild.id):
+                await asyncio.sleep(0.5)
+            job_manager.iniciar(job, on_fim=relatar_trabalho)
+        asyncio.get_running_loop().create_task(reiniciar())
+        return job
+    
+    if job_manager.iniciar(job, on_fim=relatar_trabalho):
+        return job
+    return None
+
+async def relatar_trabalho(job):
+    """Informa a conclusão de um trabalho no canal de aprovação"""
+    if job.cancelado:
+        return
+    channel = canal_aprovacao(job.guild_id)
+    if not channel:
+        return
+    
+    embed = discord.Embed(
+        title=f"{'❌' if job.erro else '✅'} {job.descricao.upper()} {'COM ERRO' if job.erro else 'CONCLUÍDA'}",
+        description=job.resumo(),
+        color=discord.Color.red() if job.erro else discord.Color.green()
+    )
+    for campo, valor in detalhes_trabalho(job).items():
+        embed.add_field(name=campo, value=valor, inline=True)
+    embed.add_field(name="⏱️ Duração", value=f"{job.duracao:.0f}s", inline=True)
+    await channel.send(embed=embed)
+
+def detalhes_trabalho(job):
+    """Contadores específicos de cada tipo de trabalho"""
+    if isinstance(job, TagPropagationJob):
+        return {
+            "✏️ Editados": job.editados,
+            "✔️ Já corretos": job.iguais,
+            "👻 Fora do servidor": job.ausentes,
+            "⚠️ Falhas": job.falhas
+        }
+    if isinstance(job, RoleMigrationJob):
+        return {
+            "🔁 Migrados" if not job.simular else "🔁 A migrar": job.migrados,
+            "✔️ Já no cargo novo": job.ja_migrados,
+            "➖ Sem o cargo antigo": job.sem_cargo,
+            "👻 Fora do servidor": job.ausentes,
+            "⚠️ Falhas": job.falhas
+        }
+    return {}
+
+def iniciar_migracao_cargo(guild, cargo_antigo_id, cargo_novo_id):
+    """Agenda a migração de cargo dos membros registrados"""
+    job = RoleMigrationJob(
+        registros,
+        guild,
+        cargo_antigo_id,
+        cargo_novo_id,
+        intervalo=config["settings"].get("intervalo_edicao_membro", 1.0),
+        concorrencia=config["settings"].get("concorrencia_edicao_membro", 3)
+    )
+    if job_manager.iniciar(job, on_fim=relatar_trabalho):
+        return job
+    return None
+
+def retomar_trabalhos():
+    """Retoma trabalhos interrompidos a partir dos checkpoints salvos"""
+    for chave, valor in registros.checkpoints(f"{TagPropagationJob.tipo}:").items():
+        guild = bot.get_guild(int(chave.split(":", 1)[1]))
+        if not guild or job_manager.get(TagPropagationJob.tipo, guild.id):
+            continue
+        estado = json.loads(valor)
+        if iniciar_propagacao_tag(guild, estado.get("tag", ""), estado.get("template")):
+            print(f"🔄 Retomando atualização de tag em {guild.name}")
+    
+    for chave, valor in registros.checkpoints(f"{RoleMigrationJob.tipo}:").items():
+        guild = bot.get_guild(int(chave.split(":", 1)[1]))
+        if not guild or job_manager.get(RoleMigrationJob.tipo, guild.id):
+            continue
+        estado = json.loads(valor)
+        if iniciar_migracao_cargo(guild, estado["de"], estado["para"]):
+            print(f"🔄 Retomando migração de cargo em {guild.name}")
+
 # ================= COMANDOS SLASH =================
 
 # === CONFIGURAÇÃO ===
@@ -139,13 +488,22 @@ async def setup(interaction: discord.Interaction,
         return
     
     guild_id = str(interaction.guild.id)
+    anterior = guild_store.get(guild_id)
+    tag_anterior = anterior.get("tag")
+    template = anterior.get("template")
+    cargo_anterior = anterior.get("cargo")
     
-    config["tag_config"][guild_id] = tag
-    config["auto_roles"][guild_id] = cargo.id
-    config["register_channels"][guild_id] = canal_registro.id
-    config["approval_channels"][guild_id] = canal_aprovacao.id
+    campos = dict(
+        tag=tag,
+        cargo=cargo.id,
+        canal_registro=canal_registro.id,
+        canal_aprovacao=canal_aprovacao.id
+    )
+    if cargo_anterior and cargo_anterior != cargo.id:
+        campos["cargo_anterior"] = cargo_anterior
+    salvo = save_guild(guild_id, autor=interaction.user.id, **campos)
     
-    if save_config(config):
+    if salvo:
         embed = discord.Embed(
             title="✅ SISTEMA CONFIGURADO",
             color=discord.Color.green()
@@ -155,15 +513,32 @@ async def setup(interaction: discord.Interaction,
         embed.add_field(name="📝 Registro", value=canal_registro.mention, inline=True)
         embed.add_field(name="✅ Aprovação", value=canal_aprovacao.mention, inline=True)
         
+        # Tag alterada: reaplicar aos membros já registrados em segundo plano
+        if tag_anterior is not None and tag_anterior != tag:
+            job = iniciar_propagacao_tag(interaction.guild, tag, template)
+            if job:
+                embed.add_field(
+                    name="🔄 Apelidos",
+                    value="Atualizando a tag dos membros registrados em segundo plano (`/tarefas`)",
+                    inline=False
+                )
+        
+        if "cargo_anterior" in campos:
+            embed.add_field(
+                name="🎭 Cargo alterado",
+                value="Membros já registrados continuam no cargo antigo. Use `/migrar_cargo` para migrá-los.",
+                inline=False
+            )
+        
         await interaction.response.send_message(embed=embed, ephemeral=True)
         
         # Criar painéis
-        await create_painel_registro(canal_registro, guild_id, tag, cargo)
+        await create_painel_registro(canal_registro, guild_id, tag, cargo, template)
         await create_painel_aprovacao(canal_aprovacao, guild_id)
     else:
         await interaction.response.send_message("❌ Erro ao salvar!", ephemeral=True)
 
-async def create_painel_registro(channel, guild_id, tag, cargo):
+async def create_painel_registro(channel, guild_id, tag, cargo, template=None):
     """Cria painel de registro"""
     embed = discord.Embed(
         title="📝 REGISTRO NO SERVIDOR",
@@ -171,13 +546,14 @@ async def create_painel_registro(channel, guild_id, tag, cargo):
         color=discord.Color.blue()
     )
     
-    embed.add_field(name="🏷️ Seu nickname será", value=f"`{tag}・NOME | ID`", inline=False)
+    exemplo = nickname_template.compilar(template, tag).exemplo()
+    embed.add_field(name="🏷️ Seu nickname será", value=f"`{exemplo}`", inline=False)
     embed.add_field(name="🎭 Cargo recebido", value=cargo.mention, inline=False)
     
     button = discord.ui.Button(
         style=discord.ButtonStyle.primary,
         label="📝 Solicitar Registro",
-        custom_id=f"registrar_{guild_id}"
+        custom_id=montar("registrar", guild_id)
     )
     
     view = discord.ui.View(timeout=None)
@@ -201,6 +577,9 @@ class RegistroModal(discord.ui.Modal, title="📝 Formulário de Registro"):
         super().__init__()
         self.guild_id = guild_id
     
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return not await recusar_se_encerrando(interaction)
+    
     nome = discord.ui.TextInput(
         label="Nome completo",
         placeholder="Ex: João Silva",
@@ -222,47 +601,219 @@ class RegistroModal(discord.ui.Modal, title="📝 Formulário de Registro"):
         required=True
     )
     
+    @desligamento.rastrear
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
+        settings = guild_store.get(self.guild_id)
         
-        guild = interaction.guild
-        app_channel_id = config["approval_channels"].get(self.guild_id)
+        # Validação local antes de qualquer chamada à API: erros voltam todos juntos
+        dados, erros = validador_de(settings).validar(
+            self.nome.value,
+            self.user_id.value,
+            self.recrutador.value,
+            functools.partial(registros.buscar_registrado, self.guild_id)
+        )
+        if erros:
+            await interaction.response.send_message("❌ **Corrija o formulário:**\n" + "\n".join(erros), ephemeral=True)
+            return
+        nome, game_id, recrutador = dados["nome"], dados["game_id"], dados["recrutador"]
         
-        if not app_channel_id:
-            await interaction.followup.send("❌ Sistema não configurado!", ephemeral=True)
+        if not settings.get("canal_aprovacao"):
+            await interaction.response.send_message("❌ Sistema não configurado!", ephemeral=True)
             return
         
-        app_channel = guild.get_channel(app_channel_id)
+        registro = registros.get(self.guild_id, interaction.user.id)
+        if registro and registro["status"] in REGISTRADOS:
+            await interaction.response.send_message("⚠️ Você já está registrado neste servidor!", ephemeral=True)
+            return
+        
+        app_channel = config_resolvida.resolver(interaction.guild).canal_aprovacao
         if not app_channel:
-            await interaction.followup.send("❌ Canal não encontrado!", ephemeral=True)
+            await interaction.response.send_message(REGISTRO_INDISPONIVEL, ephemeral=True)
             return
         
-        # Criar embed da solicitação
-        embed = discord.Embed(
-            title="🔄 NOVA SOLICITAÇÃO",
-            description=f"Usuário: {interaction.user.mention}",
-            color=discord.Color.orange()
-        )
+        await interaction.response.defer(ephemeral=True)
         
-        embed.add_field(name="👤 Nome", value=self.nome.value, inline=True)
-        embed.add_field(name="#️⃣ ID", value=self.user_id.value, inline=True)
-        embed.add_field(name="👥 Recrutador", value=self.recrutador.value, inline=True)
-        embed.add_field(name="🆔 Discord ID", value=interaction.user.id, inline=True)
-        embed.add_field(name="📅 Data", value=datetime.datetime.now().strftime("%d/%m %H:%M"), inline=True)
+        def gravar_pedido():
+            """Só depois que o controle de carga aceitou a solicitação"""
+            if not registros.registrar_pedido(
+                self.guild_id,
+                interaction.user.id,
+                nome,
+                game_id,
+                recrutador
+            ):
+                return  # registrado nesse meio-tempo (importação/aprovação)
+            sla.solicitado(self.guild_id, interaction.user.id, time.time())
+            estado.set(f"pendente:{self.guild_id}:{interaction.user.id}", {
+                "nome": nome,
+                "game_id": game_id,
+                "recrutador": recrutador,
+                "em": time.time()
+            })
+            auditoria.registrar(
+                "solicitacao",
+                guild_id=self.guild_id,
+                discord_id=interaction.user.id,
+                nome=nome,
+                game_id=game_id,
+                recrutador=recrutador
+            )
         
-        # Botões de aprovação
-        view = AprovacaoView(
-            user_id=interaction.user.id,
-            nome=self.nome.value,
-            user_id_num=self.user_id.value,
-            recrutador=self.recrutador.value,
-            guild_id=self.guild_id
+        trabalho = functools.partial(
+            enviar_solicitacao,
+            app_channel,
+            interaction.user,
+            nome,
+            game_id,
+            recrutador,
+            self.guild_id
         )
         
-        await app_channel.send(embed=embed, view=view)
-        await interaction.followup.send("✅ Solicitação enviada para aprovação!", ephemeral=True)
+        # Controle de carga: em pico, a solicitação vai para a fila do servidor
+        if backpressure.registrar(self.guild_id) == MODO_NORMAL:
+            gravar_pedido()
+            await trabalho()
+            await interaction.followup.send("✅ Solicitação enviada para aprovação!", ephemeral=True)
+            return
+        
+        posicao = backpressure.enfileirar(self.guild_id, trabalho)
+        if posicao is None:
+            await interaction.followup.send("❌ Muitas solicitações no momento, tente novamente em alguns minutos.", ephemeral=True)
+        else:
+            gravar_pedido()
+            await interaction.followup.send(f"⏳ Alto volume de registros! Sua solicitação está na fila (posição {posicao}).", ephemeral=True)
+
+async def enviar_solicitacao(app_channel, user, nome, user_id_num, recrutador, guild_id):
+    """Publica a solicitação no canal de aprovação"""
+    embed = discord.Embed(
+        title="🔄 NOVA SOLICITAÇÃO",
+        description=f"Usuário: {user.mention}",
+        color=discord.Color.orange()
+    )
+    
+    embed.add_field(name="👤 Nome", value=nome, inline=True)
+    embed.add_field(name="#️⃣ ID", value=user_id_num, inline=True)
+    embed.add_field(name="👥 Recrutador", value=recrutador, inline=True)
+    embed.add_field(name="🆔 Discord ID", value=user.id, inline=True)
+    embed.add_field(name="📅 Data", value=datetime.datetime.now().strftime("%d/%m %H:%M"), inline=True)
+    
+    # Botões de aprovação
+    view = AprovacaoView(
+        user_id=user.id,
+        nome=nome,
+        user_id_num=user_id_num,
+        recrutador=recrutador,
+        guild_id=guild_id
+    )
+    
+    mensagem = await app_channel.send(embed=embed, view=view)
+    views_pendentes[(str(guild_id), user.id)] = view
+    
+    # Guarda onde está o embed para a expiração poder editá-lo
+    chave = f"pendente:{guild_id}:{user.id}"
+    pedido = estado.get(chave)
+    if pedido:
+        estado.set(chave, {**pedido, "canal": app_channel.id, "mensagem": mensagem.id})
+        agendar_expiracao(guild_id, user.id, pedido.get("em", time.time()))
+
+# ================= EXPIRAÇÃO DE PENDENTES =================
+# Views das solicitações aguardando decisão (liberadas ao decidir ou expirar)
+views_pendentes = {}
+
+def ttl_pendente(guild_id):
+    """Horas até um pedido sem decisão expirar (0 = nunca)"""
+    padrao = config["settings"].get("pendente_ttl_horas", 72)
+    return guild_store.get(guild_id).get("ttl_pendente_horas", padrao)
+
+def agendar_expiracao(guild_id, discord_id, criado_em):
+    horas = ttl_pendente(guild_id)
+    if horas:
+        expiracao.agendar(guild_id, discord_id, criado_em + horas * 3600)
+    else:
+        expiracao.cancelar(guild_id, discord_id)
+
+def carregar_expiracoes(guild_id=None):
+    """(Re)agenda os pedidos pendentes do banco; os já vencidos expiram no próximo tick"""
+    pendentes = registros.listar_pendentes(guild_id)
+    for guild, discord_id, criado_em in pendentes:
+        agendar_expiracao(guild, discord_id, criado_em)
+    return len(pendentes)
+
+def liberar_pedido(guild_id, discord_id):
+    """Cancela a expiração e libera a view de um pedido decidido"""
+    expiracao.cancelar(guild_id, discord_id)
+    view = views_pendentes.pop((str(guild_id), discord_id), None)
+    if view:
+        view.stop()
+
+async def expirar_pedido(guild_id, discord_id):
+    """Expira um pedido pendente; retorna True se o embed foi editado"""
+    if not registros.expirar(guild_id, discord_id):
+        return False  # decidido nesse meio-tempo
+    pedido = estado.tomar(f"pendente:{guild_id}:{discord_id}")
+    sla.expirado(guild_id, discord_id)
+    auditoria.registrar("expiracao", guild_id=guild_id, discord_id=discord_id)
+    liberar_pedido(guild_id, discord_id)
+    
+    guild = bot.get_guild(int(guild_id))
+    notificacoes.enfileirar(
+        guild_id, discord_id, "expiracao",
+        f"⌛ Sua solicitação de registro{f' em **{guild.name}**' if guild else ''} expirou sem decisão. "
+        "Você pode enviar uma nova pelo painel de registro."
+    )
+    if not pedido or not pedido.get("mensagem"):
+        return False
+    
+    embed = discord.Embed(
+        title="⌛ SOLICITAÇÃO EXPIRADA",
+        description=f"Usuário: <@{discord_id}>",
+        color=discord.Color.dark_grey()
+    )
+    embed.add_field(name="👤 Nome", value=pedido.get("nome", "?"), inline=True)
+    embed.add_field(name="#️⃣ ID", value=pedido.get("game_id", "?"), inline=True)
+    embed.add_field(name="👥 Recrutador", value=pedido.get("recrutador", "?"), inline=True)
+    embed.set_footer(text=f"Sem decisão em {ttl_pendente(guild_id)}h")
+    
+    mensagem = bot.get_partial_messageable(pedido["canal"]).get_partial_message(pedido["mensagem"])
+    try:
+        await mensagem.edit(embed=embed, view=None)
+    except discord.NotFound:
+        return False
+    return True
+
+expiracao = PendingExpiry(expirar_pedido)
+
+# ================= SLA DE DECISÃO =================
+def sla_segundos(guild_id):
+    """SLA do servidor em segundos (0 = sem lembretes)"""
+    padrao = config["settings"].get("sla_minutos", 0)
+    return guild_store.get(guild_id).get("sla_minutos", padrao) * 60
+
+def carregar_sla(dias=30):
+    """Pendentes atuais + tempos de decisão recentes do banco"""
+    for guild_id, discord_id, criado_em in registros.listar_pendentes():
+        sla.solicitado(guild_id, discord_id, criado_em)
+    for guild_id, espera in registros.tempos_decisao(time.time() - dias * 86400):
+        sla.observar(guild_id, espera)
+
+async def lembrar_staff_sla(guild_id, pendentes, idade):
+    """Avisa o canal de aprovação que há pedidos esperando além do SLA"""
+    channel = canal_aprovacao(guild_id)
+    if not channel:
+        return
+    
+    embed = discord.Embed(
+        title="⏰ PEDIDOS AGUARDANDO DECISÃO",
+        description=f"**{pendentes}** solicitação(ões) pendente(s); a mais antiga espera há **{formatar_duracao(idade)}**.",
+        color=discord.Color.gold()
+    )
+    embed.set_footer(text=f"SLA: {formatar_duracao(sla_segundos(guild_id))}")
+    await channel.send(embed=embed)
+
+lembrete_sla = LembreteSLA(sla, sla_segundos, lembrar_staff_sla)
 
 class AprovacaoView(discord.ui.View):
+    """Botões de um pedido; os cliques chegam pelo roteador (prefixos aprovar/recusar)"""
     def __init__(self, user_id, nome, user_id_num, recrutador, guild_id):
         super().__init__(timeout=None)
         self.user_id = user_id
@@ -270,17 +821,70 @@ class AprovacaoView(discord.ui.View):
         self.user_id_num = user_id_num
         self.recrutador = recrutador
         self.guild_id = guild_id
+        
+        self.add_item(discord.ui.Button(
+            label="✅ Aprovar",
+            style=discord.ButtonStyle.success,
+            custom_id=montar("aprovar", guild_id, user_id)
+        ))
+        self.add_item(discord.ui.Button(
+            label="❌ Recusar",
+            style=discord.ButtonStyle.danger,
+            custom_id=montar("recusar", guild_id, user_id)
+        ))
+    
+    @classmethod
+    def do_pedido(cls, guild_id, user_id):
+        """View viva do pedido ou reconstruída do banco (botões publicados antes de um reinício)"""
+        view = views_pendentes.get((str(guild_id), user_id))
+        if view:
+            return view
+        registro = registros.get(guild_id, user_id)
+        if not registro:
+            return None
+        return cls(user_id, registro["nome"], registro["game_id"], registro["recrutador"], str(guild_id))
+    
+    async def tomar_pedido(self, interaction):
+        """
+        Reserva a decisão no estado compartilhado: só um clique (em qualquer
+        réplica) processa o pedido. Retorna False se já foi decidido.
+        """
+        if estado.tomar(f"pendente:{self.guild_id}:{self.user_id}") is not None:
+            return True
+        # Pedidos anteriores ao estado compartilhado: confere o status no banco
+        registro = registros.get(self.guild_id, self.user_id)
+        if registro is None or registro["status"] == PENDENTE:
+            return True
+        await interaction.response.send_message("⚠️ Esta solicitação já foi processada.", ephemeral=True)
+        return False
     
-    @discord.ui.button(label="✅ Aprovar", style=discord.ButtonStyle.success)
-    async def aprovar(self, interaction: discord.Interaction, button: discord.ui.Button):
+    @desligamento.rastrear
+    async def aprovar(self, interaction: discord.Interaction):
         if not is_admin(interaction):
             await interaction.response.send_message("❌ Apenas staff!", ephemeral=True)
             return
+        # Cargo quebrado ou sem permissão de apelido: não aprova pela metade (o pedido continua pendente)
+        resolucao = config_resolvida.resolver(interaction.guild)
+        if resolucao.aprovacao_bloqueada():
+            await interaction.response.send_message(
+                "❌ O bot não consegue concluir a aprovação:\n"
+                + "\n".join(f"• {problema}" for problema in resolucao.problemas)
+                + "\nCorrija com `/setup` e aprove novamente.",
+                ephemeral=True
+            )
+            return
+        if not await self.tomar_pedido(interaction):
+            return
+        liberar_pedido(self.guild_id, self.user_id)
         
         await interaction.response.defer()
         
         member = interaction.guild.get_member(self.user_id)
         if not member:
+            # Membro saiu do servidor: o pedido é encerrado como expirado
+            registros.expirar(self.guild_id, self.user_id)
+            sla.expirado(self.guild_id, self.user_id)
+            auditoria.registrar("saiu", guild_id=self.guild_id, discord_id=self.user_id, por=interaction.user.id)
             embed = interaction.message.embeds[0]
             embed.title = "❌ USUÁRIO NÃO ENCONTRADO"
             embed.color = discord.Color.red()
@@ -291,16 +895,15 @@ class AprovacaoView(discord.ui.View):
         success_nick, nickname = await update_user_nickname(member, self.nome, self.user_id_num, self.guild_id)
         
         # Aplicar cargo
-        cargo_id = config["auto_roles"].get(self.guild_id)
+        cargo = resolucao.cargo
+        cargo_id = cargo.id if cargo else None
         cargo_added = False
-        if cargo_id:
-            cargo = interaction.guild.get_role(cargo_id)
-            if cargo:
-                try:
-                    await member.add_roles(cargo)
-                    cargo_added = True
-                except:
-                    pass
+        if cargo:
+            try:
+                await member.add_roles(cargo)
+                cargo_added = True
+            except:
+                pass
         
         # Atualizar embed
         embed = interaction.message.embeds[0]
@@ -312,30 +915,77 @@ class AprovacaoView(discord.ui.View):
             embed.add_field(name="🏷️ Nickname", value=nickname, inline=True)
         
         await interaction.message.edit(embed=embed, view=None)
+        registros.decidir(self.guild_id, member.id, APROVADO, interaction.user.id)
+        sla.decidido(self.guild_id, member.id, time.time())
+        auditoria.registrar(
+            "aprovacao",
+            guild_id=self.guild_id,
+            discord_id=member.id,
+            por=interaction.user.id,
+            nickname=nickname if success_nick else None,
+            cargo=cargo_id if cargo_added else None
+        )
         
-        # Notificar usuário
-        try:
-            await member.send(f"🎉 Seu registro foi aprovado por {interaction.user.name}!")
-        except:
-            pass
+        notificacoes.enfileirar(
+            self.guild_id, member.id, "aprovacao",
+            f"🎉 Seu registro em **{interaction.guild.name}** foi aprovado por {interaction.user.name}!"
+        )
         
         await interaction.followup.send(f"✅ {member.mention} registrado com sucesso!", ephemeral=True)
     
-    @discord.ui.button(label="❌ Recusar", style=discord.ButtonStyle.danger)
-    async def recusar(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def recusar(self, interaction: discord.Interaction):
         if not is_admin(interaction):
             await interaction.response.send_message("❌ Apenas staff!", ephemeral=True)
             return
+        await interaction.response.send_modal(MotivoRecusaModal(self))
+    
+    @desligamento.rastrear
+    async def concluir_recusa(self, interaction: discord.Interaction, motivo):
+        if not await self.tomar_pedido(interaction):
+            return
+        liberar_pedido(self.guild_id, self.user_id)
         
         embed = interaction.message.embeds[0]
         embed.title = "❌ REGISTRO RECUSADO"
         embed.color = discord.Color.red()
         embed.add_field(name="👤 Recusado por", value=interaction.user.mention, inline=True)
+        if motivo:
+            embed.add_field(name="📝 Motivo", value=motivo, inline=False)
         
         await interaction.message.edit(embed=embed, view=None)
+        registros.decidir(self.guild_id, self.user_id, RECUSADO, interaction.user.id)
+        sla.decidido(self.guild_id, self.user_id, time.time())
+        auditoria.registrar("recusa", guild_id=self.guild_id, discord_id=self.user_id, por=interaction.user.id, motivo=motivo)
+        
+        mensagem = f"❌ Seu registro em **{interaction.guild.name}** foi recusado."
+        if motivo:
+            mensagem += f"\n📝 Motivo: {motivo}"
+        notificacoes.enfileirar(self.guild_id, self.user_id, "recusa", mensagem)
+        
         await interaction.response.send_message("❌ Registro recusado!", ephemeral=True)
 
+class MotivoRecusaModal(discord.ui.Modal, title="❌ Recusar Registro"):
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return not await recusar_se_encerrando(interaction)
+    
+    motivo = discord.ui.TextInput(
+        label="Motivo (enviado ao membro)",
+        style=discord.TextStyle.paragraph,
+        placeholder="Opcional",
+        max_length=300,
+        required=False
+    )
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        await self.view.concluir_recusa(interaction, self.motivo.value.strip())
+
 # === COMANDOS ADMIN ===
+backfill_jobs = {}
+
 @bot.tree.command(name="add_admin", description="Adicionar administrador")
 @app_commands.describe(usuario="Usuário para tornar admin")
 async def add_admin(interaction: discord.Interaction, usuario: discord.User):
@@ -343,8 +993,10 @@ async def add_admin(interaction: discord.Interaction, usuario: discord.User):
         await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
         return
     
-    if usuario.id not in config["admins"]:
+    if usuario.id not in listar_admins():
+        estado.set("admins", listar_admins() + [usuario.id])
         config["admins"].append(usuario.id)
+        auditoria.registrar("admin", guild_id=str(interaction.guild.id), autor=interaction.user.id, adicionado=usuario.id)
         if save_config(config):
             await interaction.response.send_message(f"✅ {usuario.mention} adicionado como admin!", ephemeral=True)
         else:
@@ -360,9 +1012,9 @@ async def list_admins(interaction: discord.Interaction):
     
     embed = discord.Embed(title="👥 ADMINISTRADORES", color=discord.Color.blue())
     
-    if config["admins"]:
+    if listar_admins():
         admins_text = ""
-        for user_id in config["admins"]:
+        for user_id in listar_admins():
             user = interaction.guild.get_member(user_id)
             if user:
                 admins_text += f"• {user.mention}\n"
@@ -372,7 +1024,298 @@ async def list_admins(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+@bot.tree.command(name="importar_registros", description="Importar registros a partir dos apelidos atuais")
+@app_commands.describe(reiniciar="Ignorar o checkpoint e recomeçar do início")
+async def importar_registros(interaction: discord.Interaction, reiniciar: bool = False):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild = interaction.guild
+    guild_id = str(guild.id)
+    if guild_id in backfill_jobs:
+        await interaction.response.send_message("⚠️ Já existe uma importação em andamento!", ephemeral=True)
+        return
+    
+    def buscar_membros(after_id):
+        if after_id:
+            return guild.fetch_members(limit=None, after=discord.Object(id=after_id))
+        return guild.fetch_members(limit=None)
+    
+    # Reconhece os apelidos no formato do próprio servidor (/template_apelido)
+    settings = guild_store.get(guild_id)
+    try:
+        job = BackfillJob(registros, guild_id, settings.get("tag", ""), buscar_membros,
+                          template=settings.get("template"), regex_id=settings.get("regex_id"))
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ Não é possível importar: {e}", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    progresso = await interaction.followup.send("📥 Importando registros dos apelidos...", ephemeral=True, wait=True)
+    
+    async def on_progresso(job):
+        await progresso.edit(
+            content=f"📥 {job.lidos} membros lidos, {job.reconhecidos} reconhecidos, "
+                    f"{job.inseridos} importados ({job.taxa:.0f}/s)"
+        )
+    
+    job.on_progresso = on_progresso
+    backfill_jobs[guild_id] = job
+    try:
+        await job.executar(reiniciar=reiniciar)
+        retomado = " (retomado do checkpoint)" if job.retomado_de else ""
+        await progresso.edit(
+            content=f"✅ Importação concluída{retomado}: {job.inseridos} registros novos de "
+                    f"{job.reconhecidos} apelidos reconhecidos em {job.lidos} membros "
+                    f"({job.duracao:.1f}s, {job.taxa:.0f} membros/s)"
+        )
+    except Exception as e:
+        await interaction.followup.send(f"❌ Erro na importação (progresso salvo): {str(e)[:100]}", ephemeral=True)
+    finally:
+        backfill_jobs.pop(guild_id, None)
+
+@bot.tree.command(name="template_apelido", description="Definir o formato do apelido dos registrados")
+@app_commands.describe(template="Ex: {tag}・{nome} | {id} (campos: {tag}, {nome}, {id})")
+async def template_apelido(interaction: discord.Interaction, template: str):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild_id = str(interaction.guild.id)
+    settings = guild_store.get(guild_id)
+    tag = settings.get("tag", "")
+    
+    try:
+        compilado = nickname_template.compilar(template, tag)
+    except nickname_template.TemplateInvalido as e:
+        await interaction.response.send_message(f"❌ Template inválido: {e}", ephemeral=True)
+        return
+    if not compilado.tem_id:
+        await interaction.response.send_message("❌ O template precisa conter {id}!", ephemeral=True)
+        return
+    
+    if not save_guild(guild_id, autor=interaction.user.id, template=template):
+        await interaction.response.send_message("❌ Erro ao salvar!", ephemeral=True)
+        return
+    
+    embed = discord.Embed(title="✅ TEMPLATE DE APELIDO ATUALIZADO", color=discord.Color.green())
+    embed.add_field(name="📐 Template", value=f"`{template}`", inline=False)
+    embed.add_field(name="👀 Exemplo", value=f"`{compilado.format('João Silva', '1001')}`", inline=False)
+    
+    if template != settings.get("template") and "tag" in settings:
+        iniciar_propagacao_tag(interaction.guild, tag, template)
+        embed.add_field(name="🔄 Apelidos", value="Atualizando os membros registrados em segundo plano (`/tarefas`)", inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="expiracao", description="Definir em quantas horas um pedido sem decisão expira")
+@app_commands.describe(horas="Horas até expirar (0 = nunca)")
+async def expiracao_cmd(interaction: discord.Interaction, horas: app_commands.Range[int, 0, 720]):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild_id = str(interaction.guild.id)
+    if not save_guild(guild_id, autor=interaction.user.id, ttl_pendente_horas=horas):
+        await interaction.response.send_message("❌ Erro ao salvar!", ephemeral=True)
+        return
+    
+    pendentes = carregar_expiracoes(guild_id)
+    if horas:
+        mensagem = f"✅ Pedidos sem decisão expiram após **{horas}h**."
+    else:
+        mensagem = "✅ Pedidos pendentes não expiram mais."
+    await interaction.response.send_message(f"{mensagem}\n⌛ {pendentes} pendente(s) reagendado(s).", ephemeral=True)
+
+@bot.tree.command(name="notificacoes", description="Entrega das DMs aos membros e falhas recentes")
+async def notificacoes_cmd(interaction: discord.Interaction):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    estatisticas = notificacoes.estatisticas()
+    por_estado = estatisticas.get("por_estado", {})
+    latencia = estatisticas.get("latencia_media_segundos")
+    
+    embed = discord.Embed(title="✉️ NOTIFICAÇÕES POR DM", color=discord.Color.blue())
+    embed.add_field(name="📤 Na fila", value=por_estado.get("pendente", 0), inline=True)
+    embed.add_field(name="✅ Entregues (1h)", value=estatisticas.get("entregues_ultima_hora", 0), inline=True)
+    embed.add_field(name="⏱️ Latência média", value=formatar_duracao(latencia) if latencia is not None else "—", inline=True)
+    
+    mortas = notificacoes.mortas_recentes(interaction.guild.id)
+    if mortas:
+        embed.add_field(
+            name="📭 Não entregues (recentes)",
+            value="\n".join(f"• <@{discord_id}> ({tipo}): {erro}"[:200] for discord_id, tipo, erro, _ in mortas),
+            inline=False
+        )
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="validacao", description="Regras de validação do formulário de registro")
+@app_commands.describe(
+    regex_id="Expressão regular para o ID do jogo (vazio = padrão: 1 a 10 dígitos)",
+    nome_minimo="Mínimo de letras no nome",
+    recrutador_registrado="Exigir que o recrutador seja um membro registrado (nome ou ID)"
+)
+async def validacao_cmd(
+    interaction: discord.Interaction,
+    regex_id: Optional[str] = None,
+    nome_minimo: Optional[app_commands.Range[int, 0, 32]] = None,
+    recrutador_registrado: Optional[bool] = None
+):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild_id = str(interaction.guild.id)
+    campos = {}
+    if regex_id is not None:
+        campos["regex_id"] = regex_id.strip() or None
+    if nome_minimo is not None:
+        campos["nome_minimo"] = nome_minimo
+    if recrutador_registrado is not None:
+        campos["recrutador_registrado"] = recrutador_registrado
+    
+    if campos:
+        settings = {**guild_store.get(guild_id), **campos}
+        try:
+            validador_de(settings)
+        except RegraInvalida as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        if not save_guild(guild_id, autor=interaction.user.id, **campos):
+            await interaction.response.send_message("❌ Erro ao salvar!", ephemeral=True)
+            return
+    
+    validador = validador_de(guild_store.get(guild_id))
+    embed = discord.Embed(title="🧾 VALIDAÇÃO DO REGISTRO", color=discord.Color.blue())
+    embed.add_field(name="#️⃣ ID", value=f"`{validador.padrao_id.pattern}`", inline=False)
+    embed.add_field(name="👤 Nome", value=f"Mínimo de {validador.nome_minimo} letras", inline=True)
+    embed.add_field(
+        name="👥 Recrutador",
+        value="Deve ser membro registrado" if validador.exigir_recrutador else "Livre",
+        inline=True
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="sla", description="Tempo até a decisão dos registros e SLA de lembretes")
+@app_commands.describe(minutos="Novo SLA em minutos (0 = sem lembretes)")
+async def sla_cmd(interaction: discord.Interaction, minutos: Optional[app_commands.Range[int, 0, 10080]] = None):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild_id = str(interaction.guild.id)
+    if minutos is not None and not save_guild(guild_id, autor=interaction.user.id, sla_minutos=minutos):
+        await interaction.response.send_message("❌ Erro ao salvar!", ephemeral=True)
+        return
+    
+    resumo = sla.resumo(guild_id)
+    decisao = resumo["decisao"]
+    limite = sla_segundos(guild_id)
+    
+    embed = discord.Embed(title="⏱️ TEMPO ATÉ A DECISÃO", color=discord.Color.blue())
+    embed.add_field(name="📥 Pendentes", value=resumo["pendentes"], inline=True)
+    embed.add_field(
+        name="🕰️ Mais antigo",
+        value=formatar_duracao(resumo["idade_mais_antigo"]) if resumo["idade_mais_antigo"] is not None else "—",
+        inline=True
+    )
+    embed.add_field(name="⏰ SLA", value=formatar_duracao(limite) if limite else "Desativado", inline=True)
+    if decisao["total"]:
+        embed.add_field(
+            name=f"📊 Decisões ({decisao['total']})",
+            value=f"p50 {formatar_duracao(decisao['p50'])} • p90 {formatar_duracao(decisao['p90'])} • média {formatar_duracao(decisao['media'])}",
+            inline=False
+        )
+    if resumo["expirados"]:
+        embed.add_field(name="⌛ Expirados", value=resumo["expirados"], inline=True)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="migrar_cargo", description="Migrar membros registrados do cargo antigo para o atual")
+@app_commands.describe(
+    executar="Aplicar a migração (sem isso, apenas simula e mostra as contagens)",
+    cargo_antigo="Cargo de origem (padrão: cargo anterior ao último /setup)"
+)
+async def migrar_cargo(interaction: discord.Interaction, executar: bool = False, cargo_antigo: Optional[discord.Role] = None):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    guild = interaction.guild
+    settings = guild_store.get(guild.id)
+    cargo_novo_id = settings.get("cargo")
+    cargo_antigo_id = cargo_antigo.id if cargo_antigo else settings.get("cargo_anterior")
+    
+    if not cargo_novo_id or not guild.get_role(cargo_novo_id):
+        await interaction.response.send_message("❌ Cargo atual não configurado ou não encontrado!", ephemeral=True)
+        return
+    if not cargo_antigo_id or cargo_antigo_id == cargo_novo_id:
+        await interaction.response.send_message("⚠️ Nenhum cargo antigo para migrar!", ephemeral=True)
+        return
+    if job_manager.get(RoleMigrationJob.tipo, guild.id):
+        await interaction.response.send_message("⚠️ Já existe uma migração em andamento (`/tarefas`)!", ephemeral=True)
+        return
+    
+    if executar:
+        iniciar_migracao_cargo(guild, cargo_antigo_id, cargo_novo_id)
+        await interaction.response.send_message(
+            f"🔁 Migração iniciada: <@&{cargo_antigo_id}> → <@&{cargo_novo_id}>. Acompanhe com `/tarefas`.",
+            ephemeral=True
+        )
+        return
+    
+    # Simulação: apenas contagens, sem editar membros
+    await interaction.response.defer(ephemeral=True)
+    job = RoleMigrationJob(registros, guild, cargo_antigo_id, cargo_novo_id, simular=True)
+    await job.executar()
+    
+    embed = discord.Embed(
+        title="🔍 SIMULAÇÃO DA MIGRAÇÃO DE CARGO",
+        description=f"<@&{cargo_antigo_id}> → <@&{cargo_novo_id}>\n{job.total} membros registrados",
+        color=discord.Color.blue()
+    )
+    for campo, valor in detalhes_trabalho(job).items():
+        embed.add_field(name=campo, value=valor, inline=True)
+    intervalo = config["settings"].get("intervalo_edicao_membro", 1.0)
+    embed.set_footer(text=f"Tempo estimado: ~{int(job.migrados * intervalo // 60) + 1}min • use executar:True para aplicar")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="tarefas", description="Ver trabalhos em segundo plano")
+@app_commands.describe(cancelar="Tipo do trabalho a cancelar (ex: tag)")
+async def tarefas(interaction: discord.Interaction, cancelar: Optional[str] = None):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    if cancelar:
+        job = job_manager.get(cancelar, interaction.guild.id)
+        if not job:
+            await interaction.response.send_message("⚠️ Nenhum trabalho desse tipo em andamento!", ephemeral=True)
+            return
+        job.cancelar()
+        await interaction.response.send_message(f"⏹️ {job.descricao} cancelada.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(title="⚙️ TRABALHOS EM SEGUNDO PLANO", color=discord.Color.blue())
+    jobs = job_manager.listar(interaction.guild.id)
+    if not jobs:
+        embed.description = "Nenhum trabalho em andamento"
+    for job in jobs:
+        detalhes = " • ".join(f"{campo} {valor}" for campo, valor in detalhes_trabalho(job).items())
+        embed.add_field(name=f"{job.descricao} (`{job.tipo}`)", value=f"{job.resumo()}\n{detalhes}", inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # === FERRAMENTAS ===
+purge_jobs = {}
+
+# O token da interação (followups/edições da resposta efêmera) expira em 15 minutos
+VALIDADE_TOKEN_INTERACAO = 15 * 60 - 60
+
 @bot.tree.command(name="limpar", description="Limpar mensagens")
 @app_commands.describe(quantidade="Quantidade de mensagens")
 async def limpar(interaction: discord.Interaction, quantidade: int = 100):
@@ -380,13 +1323,66 @@ async def limpar(interaction: discord.Interaction, quantidade: int = 100):
         await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
         return
     
+    if quantidade < 1:
+        await interaction.response.send_message("❌ Quantidade inválida!", ephemeral=True)
+        return
+    
+    channel_id = interaction.channel.id
+    if channel_id in purge_jobs:
+        await interaction.response.send_message("⚠️ Já existe uma limpeza em andamento neste canal!", ephemeral=True)
+        return
+    
     await interaction.response.defer(ephemeral=True)
     
+    job = PurgeJob(interaction.channel, quantidade)
+    view = CancelarLimpezaView(interaction.guild.id, channel_id)
+    progresso = await interaction.followup.send(
+        f"🧹 Limpando até {quantidade} mensagens...", view=view, ephemeral=True, wait=True
+    )
+    # Mensagens antigas saem a ~1/s: limpezas longas passam da validade do token
+    expira_em = time.monotonic() + VALIDADE_TOKEN_INTERACAO
+    
+    async def relatar(texto):
+        """Resultado final: na resposta efêmera enquanto o token vale, senão por DM (ou no canal)"""
+        if time.monotonic() < expira_em:
+            try:
+                await progresso.edit(content=texto, view=None)
+                return
+            except discord.HTTPException as e:
+                print(f"⚠️ Não foi possível editar o progresso da limpeza em {channel_id}: {e}")
+        try:
+            await interaction.user.send(f"{texto} (canal {interaction.channel.mention})")
+        except discord.HTTPException:
+            await interaction.channel.send(f"{interaction.user.mention} {texto}", delete_after=60)
+    
+    async def on_progresso(job):
+        if job.fim is None:
+            if time.monotonic() < expira_em:
+                texto = f"🧹 {job.apagadas}/{quantidade} mensagens apagadas ({job.fase}, {job.taxa:.1f}/s)"
+                await progresso.edit(content=texto)
+        elif job.cancelado:
+            await relatar(f"⏹️ Limpeza cancelada: {job.apagadas} mensagens apagadas em {job.duracao:.0f}s")
+        else:
+            await relatar(f"✅ {job.apagadas} mensagens limpas em {job.duracao:.0f}s!")
+    
+    job.on_progresso = on_progresso
+    purge_jobs[channel_id] = job
     try:
-        deleted = await interaction.channel.purge(limit=min(quantidade, 100))
-        await interaction.followup.send(f"✅ {len(deleted)} mensagens limpas!", ephemeral=True)
+        await job.executar()
     except Exception as e:
-        await interaction.followup.send(f"❌ Erro: {str(e)[:100]}", ephemeral=True)
+        await relatar(f"❌ Erro na limpeza: {str(e)[:100]}")
+    finally:
+        purge_jobs.pop(channel_id, None)
+
+class CancelarLimpezaView(discord.ui.View):
+    """Botão de cancelamento; o clique chega pelo roteador (prefixo limpeza)"""
+    def __init__(self, guild_id, channel_id):
+        super().__init__(timeout=None)
+        self.add_item(discord.ui.Button(
+            label="⏹️ Cancelar",
+            style=discord.ButtonStyle.secondary,
+            custom_id=montar("limpeza", guild_id, channel_id)
+        ))
 
 @bot.tree.command(name="status", description="Status do sistema")
 async def status(interaction: discord.Interaction):
@@ -394,19 +1390,27 @@ async def status(interaction: discord.Interaction):
     
     embed = discord.Embed(title="📊 STATUS DO SISTEMA", color=discord.Color.blue())
     
-    tag = config["tag_config"].get(guild_id, "Não configurada")
+    settings = guild_store.get(guild_id)
+    tag = settings.get("tag") or "Não configurada"
     embed.add_field(name="🏷️ Tag", value=tag, inline=True)
     
-    cargo_id = config["auto_roles"].get(guild_id)
-    if cargo_id:
-        cargo = interaction.guild.get_role(cargo_id)
-        embed.add_field(name="🎭 Cargo", value=cargo.mention if cargo else "Não encontrado", inline=True)
+    resolucao = config_resolvida.resolver(interaction.guild)
+    if resolucao.cargo:
+        embed.add_field(name="🎭 Cargo", value=resolucao.cargo.mention, inline=True)
+    elif settings.get("cargo"):
+        embed.add_field(name="🎭 Cargo", value="Não encontrado", inline=True)
     else:
         embed.add_field(name="🎭 Cargo", value="Não configurado", inline=True)
     
     embed.add_field(name="🤖 Bot", value="✅ Online", inline=True)
     embed.add_field(name="👥 Membros", value=interaction.guild.member_count, inline=True)
     embed.add_field(name="📊 Servidores", value=len(bot.guilds), inline=True)
+    if resolucao.problemas:
+        embed.add_field(
+            name="⚠️ Configuração quebrada",
+            value="\n".join(f"• {problema}" for problema in resolucao.problemas) + "\nUse `/setup` para corrigir.",
+            inline=False
+        )
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -420,18 +1424,75 @@ async def ajuda(interaction: discord.Interaction):
     
     embed.add_field(
         name="🔧 CONFIGURAÇÃO",
-        value="`/setup` - Configurar tudo\n`/add_admin` - Adicionar admin\n`/list_admins` - Listar admins",
+        value="`/setup` - Configurar tudo\n`/add_admin` - Adicionar admin\n`/list_admins` - Listar admins\n`/importar_registros` - Importar registros dos apelidos\n`/template_apelido` - Formato do apelido\n`/expiracao` - Expiração de pedidos pendentes\n`/sla` - Tempo até a decisão\n`/validacao` - Regras do formulário\n`/notificacoes` - Entrega das DMs\n`/migrar_cargo` - Migrar membros para o cargo atual\n`/tarefas` - Trabalhos em segundo plano",
         inline=False
     )
     
     embed.add_field(
         name="🛠️ FERRAMENTAS",
-        value="`/limpar` - Limpar mensagens\n`/status` - Ver status\n`/ajuda` - Esta mensagem",
+        value="`/limpar` - Limpar mensagens\n`/status` - Ver status\n`/watchdog` - Watchdog do event loop\n`/perfil_cpu` - Profiling de CPU\n`/ajuda` - Esta mensagem",
         inline=False
     )
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+@bot.tree.command(name="watchdog", description="Ativar/desativar o watchdog do event loop")
+@app_commands.describe(
+    ativo="Ligar ou desligar o watchdog",
+    limite_ms="Tempo de bloqueio (ms) a partir do qual a pilha é capturada"
+)
+async def watchdog_cmd(interaction: discord.Interaction, ativo: bool, limite_ms: Optional[int] = None):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    
+    if ativo:
+        watchdog.iniciar(limite_ms / 1000 if limite_ms is not None else None)
+    else:
+        watchdog.parar()
+    
+    stats = watchdog.estatisticas()
+    embed = discord.Embed(
+        title="🐢 WATCHDOG DO EVENT LOOP",
+        color=discord.Color.green() if stats["ativo"] else discord.Color.greyple()
+    )
+    embed.add_field(name="Estado", value="✅ Ativo" if stats["ativo"] else "⏸️ Desativado", inline=True)
+    embed.add_field(name="Limite", value=f"{stats['limite_ms']}ms", inline=True)
+    embed.add_field(name="Bloqueios", value=stats["bloqueios"], inline=True)
+    embed.add_field(name="Maior bloqueio", value=f"{stats['maior_bloqueio_ms']}ms", inline=True)
+    if stats["locais"]:
+        locais = "\n".join(f"`{local}` ×{total}" for local, total in stats["locais"].items())
+        embed.add_field(name="Locais mais lentos", value=locais[:1024], inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="perfil_cpu", description="Amostrar o uso de CPU do bot por alguns segundos")
+@app_commands.describe(segundos="Duração da amostragem (1-60s)")
+async def perfil_cpu(interaction: discord.Interaction, segundos: app_commands.Range[int, 1, 60] = 10):
+    if not is_admin(interaction):
+        await interaction.response.send_message("❌ Apenas administradores!", ephemeral=True)
+        return
+    if profiler.ocupado:
+        await interaction.response.send_message("⚠️ Já existe um profiling em andamento!", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        # A amostragem roda em outra thread para enxergar o event loop trabalhando
+        pilhas = await asyncio.to_thread(profiler.coletar, segundos)
+    except ProfilerOcupado:
+        await interaction.followup.send("⚠️ Já existe um profiling em andamento!", ephemeral=True)
+        return
+    
+    resumo = profiler.ultima
+    arquivo = discord.File(io.BytesIO(pilhas.encode("utf-8")), filename=f"cpu-{int(resumo['em'])}.folded")
+    await interaction.followup.send(
+        f"🔥 **{resumo['amostras']}** amostras em {resumo['duracao']:.1f}s ({resumo['pilhas']} pilhas distintas)\n"
+        f"Abra em https://www.speedscope.app ou gere o SVG com `flamegraph.pl`.",
+        file=arquivo,
+        ephemeral=True
+    )
+
 @bot.tree.command(name="ping", description="Testar latência")
 async def ping(interaction: discord.Interaction):
     latency = round(bot.latency * 1000)
@@ -445,6 +1506,11 @@ async def on_ready():
     print(f"⏰ Iniciado em: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     print("=" * 60)
     
+    perfil.marcar("READY")
+    perfil.relatorio()
+    
+    retomar_trabalhos()
+    
     # Definir atividade
     await bot.change_presence(
         activity=discord.Activity(
@@ -453,57 +1519,135 @@ async def on_ready():
         )
     )
 
-@bot.event
-async def on_interaction(interaction: discord.Interaction):
-    if interaction.type == discord.InteractionType.component:
-        custom_id = interaction.data.get('custom_id', '')
-        
-        if custom_id.startswith("registrar_"):
-            guild_id = custom_id.replace("registrar_", "")
-            
-            # Verificar canal correto
-            reg_channel_id = config["register_channels"].get(guild_id)
-            if not reg_channel_id or interaction.channel.id != reg_channel_id:
-                await interaction.response.send_message("❌ Use no canal correto!", ephemeral=True)
-                return
-            
-            modal = RegistroModal(guild_id)
-            await interaction.response.send_modal(modal)
+# ================= ROTEAMENTO DE COMPONENTES =================
+# custom_id "prefixo:guild_id:..." -> handler(interaction, settings, guild_id, *args)
+roteador = ComponentRouter(guild_store.get, antes=recusar_se_encerrando)
 
-# ================= SERVIDOR WEB (keep_alive embutido) =================
-from flask import Flask
-from threading import Thread
-import requests
+@roteador.rota("registrar", canal="canal_registro")
+async def rota_registrar(interaction, settings, guild_id):
+    # Evita que o membro preencha o formulário se o canal de aprovação sumiu
+    if config_resolvida.resolver(interaction.guild).quebrado("canal_aprovacao"):
+        await interaction.response.send_message(REGISTRO_INDISPONIVEL, ephemeral=True)
+        return
+    
+    if backpressure.modo(guild_id) == MODO_DESCARTE:
+        await interaction.response.send_message("⏳ Muitas solicitações no momento, tente novamente em alguns minutos.", ephemeral=True)
+        return
+    
+    await interaction.response.send_modal(RegistroModal(guild_id))
 
-flask_app = Flask(__name__)
+async def decidir_pedido(interaction, guild_id, user_id, acao):
+    if not user_id.isdigit():
+        await interaction.response.send_message("❌ Botão inválido ou desatualizado.", ephemeral=True)
+        return
+    view = AprovacaoView.do_pedido(guild_id, int(user_id))
+    if view is None:
+        await interaction.response.send_message("⚠️ Solicitação não encontrada.", ephemeral=True)
+        return
+    await getattr(view, acao)(interaction)
 
-@flask_app.route('/')
-def home():
-    return "🤖 Bot Discord Online - Sistema de Registro"
+@roteador.rota("aprovar", canal="canal_aprovacao", erro_canal="❌ Use no canal de aprovação!")
+async def rota_aprovar(interaction, settings, guild_id, user_id):
+    await decidir_pedido(interaction, guild_id, user_id, "aprovar")
 
-@flask_app.route('/health')
-def health():
-    return "OK", 200
+@roteador.rota("recusar", canal="canal_aprovacao", erro_canal="❌ Use no canal de aprovação!")
+async def rota_recusar(interaction, settings, guild_id, user_id):
+    await decidir_pedido(interaction, guild_id, user_id, "recusar")
 
-@flask_app.route('/ping')
-def ping():
-    return "pong", 200
+@roteador.rota("limpeza")
+async def rota_limpeza(interaction, settings, guild_id, channel_id):
+    job = purge_jobs.get(int(channel_id)) if channel_id.isdigit() else None
+    if job is None:
+        await interaction.response.send_message("⚠️ Nenhuma limpeza em andamento neste canal.", ephemeral=True)
+        return
+    job.cancelar()
+    await interaction.response.send_message("⏹️ Cancelando limpeza...", ephemeral=True)
 
-def run_flask():
-    port = int(os.environ.get('PORT', 8080))
-    flask_app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    if interaction.type == discord.InteractionType.component:
+        await roteador.despachar(interaction)
 
+# ================= SERVIDOR WEB (keep_alive) =================
 def start_web_server():
-    """Inicia servidor web em thread separada"""
+    """Inicia servidor web em thread separada (Flask só é importado nessa thread)"""
+    import threading
+    
+    def executar():
+        try:
+            import keep_alive
+            perfil.marcar("import do servidor web")
+            keep_alive.run_server(on_pronto=lambda: perfil.marcar("servidor web pronto"))
+        except Exception as e:
+            print(f"⚠️ Servidor web não iniciado: {e}")
+    
     try:
-        server_thread = Thread(target=run_flask, daemon=True)
+        server_thread = threading.Thread(target=executar, name="web", daemon=True)
         server_thread.start()
-        print(f"✅ Servidor web iniciado na porta {os.environ.get('PORT', 8080)}")
         return True
     except Exception as e:
         print(f"⚠️ Servidor web não iniciado: {e}")
         return False
 
+def _iniciar_encerramento():
+    """Primeira fase: sai do balanceamento e interrompe trabalhos longos (com checkpoint)"""
+    health_monitor.pronto = False
+    config_watcher.parar()
+    watchdog.parar()
+    expiracao.parar()
+    lembrete_sla.parar()
+    notificacoes.parar()
+    for job in job_manager.listar():
+        job.cancelar(retomar=True)
+    for job in list(backfill_jobs.values()) + list(purge_jobs.values()):
+        job.cancelar()
+
+def _finalizar_encerramento():
+    """Última fase: fecha os bancos e o servidor web"""
+    auditoria.fechar()
+    registros.fechar()
+    notificacoes.fechar()
+    guild_store.fechar()
+    if eleicao:
+        eleicao.liberar()
+    keep_alive = sys.modules.get("keep_alive")
+    if keep_alive:
+        keep_alive.parar_servidor()
+
+async def encerrar_bot(motivo=None):
+    """Encerramento gracioso: não-pronto → drenar → gravar → fechar gateway"""
+    await desligamento.encerrar(bot.close, antes=_iniciar_encerramento, depois=_finalizar_encerramento)
+
+def perder_lideranca():
+    """Lease não renovado (chamado pela thread do lease): larga o gateway já, sem drenar"""
+    health_monitor.pronto = False
+    asyncio.run_coroutine_threadsafe(bot.close(), bot.loop)
+
+def aguardar_lideranca():
+    """Réplica seguidora: atende HTTP até conseguir o lease do gateway"""
+    import signal
+    import threading
+    
+    parar = threading.Event()
+    anterior = signal.signal(signal.SIGTERM, lambda numero, frame: parar.set())
+    health_monitor.papel = "seguidor"
+    health_monitor.coordenacao = eleicao.estado
+    print(f"🗳️ Réplica {eleicao.dono} aguardando liderança (líder atual: {eleicao.detentor() or 'nenhum'})")
+    
+    try:
+        if not eleicao.aguardar(parar):
+            print("👋 Réplica seguidora encerrada")
+            return False
+    finally:
+        signal.signal(signal.SIGTERM, anterior)
+    
+    health_monitor.papel = "lider"
+    eleicao.on_perda = perder_lideranca
+    # O líder anterior pode ter continuado o diário compartilhado enquanto esta réplica esperava
+    auditoria.sincronizar()
+    print(f"👑 Réplica {eleicao.dono} assumiu o gateway após {eleicao.tentativas} tentativa(s)")
+    return True
+
 # ================= INICIALIZAÇÃO =================
 def main():
     print("=" * 60)
@@ -532,6 +1676,9 @@ def main():
     # Iniciar servidor web
     start_web_server()
     
+    if eleicao and not aguardar_lideranca():
+        return
+    
     print("🤖 Iniciando bot Discord...")
     print("=" * 60)
     
@@ -542,6 +1689,9 @@ def main():
         print("Verifique se o token está correto")
     except Exception as e:
         print(f"❌ Erro: {e}")
+    finally:
+        if eleicao:
+            eleicao.liberar()
 
 if __name__ == "__main__":
     main()
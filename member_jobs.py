@@ -0,0 +1,198 @@
+"""
+member_jobs.py - Trabalhos em segundo plano sobre membros registrados
+"""
+
+import asyncio
+import json
+
+from jobs import BackgroundJob, Pacer
+
+TAMANHO_PAGINA = 500
+CHECKPOINT_A_CADA = 50
+
+
+class TagPropagationJob(BackgroundJob):
+    """Reaplica a tag do servidor aos apelidos dos membros já registrados"""
+
+    tipo = "tag"
+    descricao = "Atualização de tag"
+
+    def __init__(self, store, guild, tag, formatar, intervalo=1.0, template=None):
+        """formatar(tag, nome, game_id) deve retornar o apelido final"""
+        super().__init__(guild.id)
+        self.store = store
+        self.guild = guild
+        self.tag = tag
+        self.template = template
+        self.formatar = formatar
+        self.pacer = Pacer(intervalo)
+        self.editados = 0
+        self.iguais = 0
+        self.ausentes = 0
+        self.falhas = 0
+
+    def _salvar(self, ultimo_id):
+        self.store.salvar_checkpoint(self.chave, json.dumps({
+            "tag": self.tag,
+            "template": self.template,
+            "ultimo": ultimo_id
+        }))
+
+    async def executar(self):
+        # Retoma do checkpoint apenas se for da mesma tag e template
+        estado = json.loads(self.store.checkpoint(self.chave) or "{}")
+        mesmo = estado.get("tag") == self.tag and estado.get("template") == self.template
+        ultimo_id = estado.get("ultimo") if mesmo else None
+        self._salvar(ultimo_id)
+
+        self.total = await asyncio.to_thread(self.store.contar_registrados, self.guild_id)
+        if ultimo_id:
+            self.processados = await asyncio.to_thread(self.store.contar_registrados, self.guild_id, ultimo_id)
+        self._processados_inicio = self.processados
+
+        while not self.cancelado:
+            pagina = await asyncio.to_thread(self.store.listar_registrados, self.guild_id, ultimo_id, TAMANHO_PAGINA)
+            if not pagina:
+                break
+
+            for registro in pagina:
+                if self.cancelado:
+                    break
+                await self._aplicar(registro)
+                ultimo_id = registro["discord_id"]
+                self.processados += 1
+                if self.processados % CHECKPOINT_A_CADA == 0:
+                    self._salvar(ultimo_id)
+
+        # Cancelamento explícito descarta o checkpoint; só o encerramento do bot retoma depois
+        if self.cancelado and self.retomar:
+            self._salvar(ultimo_id)
+        else:
+            self.store.remover_checkpoint(self.chave)
+
+    async def _aplicar(self, registro):
+        member = self.guild.get_member(registro["discord_id"])
+        if member is None:
+            self.ausentes += 1
+            return
+
+        nickname = self.formatar(self.tag, registro["nome"], registro["game_id"])
+        if member.nick == nickname:
+            self.iguais += 1
+            return
+
+        await self.pacer.aguardar()
+        try:
+            await member.edit(nick=nickname)
+            self.editados += 1
+        except Exception:
+            self.falhas += 1
+
+
+class RoleMigrationJob(BackgroundJob):
+    """Move membros registrados do cargo antigo para o novo (uma edição por membro)"""
+
+    tipo = "cargo"
+    descricao = "Migração de cargo"
+
+    def __init__(self, store, guild, cargo_antigo_id, cargo_novo_id, intervalo=1.0, concorrencia=3, simular=False):
+        super().__init__(guild.id)
+        self.store = store
+        self.guild = guild
+        self.cargo_antigo_id = cargo_antigo_id
+        self.cargo_novo_id = cargo_novo_id
+        self.pacer = Pacer(intervalo)
+        self.semaforo = asyncio.Semaphore(concorrencia)
+        self.simular = simular
+        self.migrados = 0
+        self.ja_migrados = 0
+        self.sem_cargo = 0
+        self.ausentes = 0
+        self.falhas = 0
+
+    def _salvar(self, ultimo_id):
+        if self.simular:
+            return
+        self.store.salvar_checkpoint(self.chave, json.dumps({
+            "de": self.cargo_antigo_id,
+            "para": self.cargo_novo_id,
+            "ultimo": ultimo_id
+        }))
+
+    async def executar(self):
+        cargo_novo = self.guild.get_role(self.cargo_novo_id)
+        if cargo_novo is None:
+            raise ValueError("cargo novo não encontrado")
+
+        estado = {} if self.simular else json.loads(self.store.checkpoint(self.chave) or "{}")
+        mesmo = estado.get("de") == self.cargo_antigo_id and estado.get("para") == self.cargo_novo_id
+        ultimo_id = estado.get("ultimo") if mesmo else None
+        self._salvar(ultimo_id)
+
+        self.total = await asyncio.to_thread(self.store.contar_registrados, self.guild_id)
+        if ultimo_id:
+            self.processados = await asyncio.to_thread(self.store.contar_registrados, self.guild_id, ultimo_id)
+        self._processados_inicio = self.processados
+
+        while not self.cancelado:
+            pagina = await asyncio.to_thread(self.store.listar_registrados, self.guild_id, ultimo_id, TAMANHO_PAGINA)
+            if not pagina:
+                break
+
+            # Checkpoint só avança depois que todas as edições da página terminarem
+            for inicio in range(0, len(pagina), CHECKPOINT_A_CADA):
+                if self.cancelado:
+                    break
+                bloco = pagina[inicio:inicio + CHECKPOINT_A_CADA]
+                await asyncio.gather(*(self._migrar(registro, cargo_novo) for registro in bloco))
+                ultimo_id = bloco[-1]["discord_id"]
+                self.processados += len(bloco)
+                self._salvar(ultimo_id)
+
+        if self.cancelado and self.retomar:
+            self._salvar(ultimo_id)
+        elif not self.simular:
+            self.store.remover_checkpoint(self.chave)
+
+    async def _migrar(self, registro, cargo_novo):
+        member = self.guild.get_member(registro["discord_id"])
+        if member is None:
+            self.ausentes += 1
+            return
+
+        ids = {role.id for role in member.roles}
+        if self.cargo_antigo_id not in ids:
+            if cargo_novo.id in ids:
+                self.ja_migrados += 1
+            else:
+                self.sem_cargo += 1
+            return
+
+        if self.simular:
+            self.migrados += 1
+            return
+
+        async with self.semaforo:
+            if self.cancelado:
+                return
+            await self.pacer.aguardar()
+            # Relê o membro após a espera: a lista enviada substitui todos os cargos,
+            # então precisa refletir mudanças feitas por moderadores/outros bots no meio
+            member = self.guild.get_member(registro["discord_id"])
+            if member is None:
+                self.ausentes += 1
+                return
+            ids = {role.id for role in member.roles}
+            if self.cargo_antigo_id not in ids:
+                self.ja_migrados += 1
+                return
+
+            # Uma única edição: remove o cargo antigo e adiciona o novo
+            roles = [role for role in member.roles if role.id != self.cargo_antigo_id and not role.is_default()]
+            if cargo_novo.id not in ids:
+                roles.append(cargo_novo)
+            try:
+                await member.edit(roles=roles)
+                self.migrados += 1
+            except Exception:
+                self.falhas += 1
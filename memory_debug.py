@@ -0,0 +1,142 @@
+"""
+memory_debug.py - Diagnóstico de memória sob demanda
+tracemalloc fica desligado até ser iniciado pelo endpoint /debug/memory, então
+o custo é zero em operação normal. Também conta os objetos em cache do
+discord.py e as views ativas para mostrar o que está crescendo.
+"""
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+
+
+def _rss():
+    """Memória residente do processo em bytes (Linux) ou None"""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _tamanho(colecao):
+    try:
+        return len(colecao)
+    except Exception:
+        return None
+
+
+def _local(estatistica):
+    frame = estatistica.traceback[0]
+    return f"{os.path.relpath(frame.filename) if not frame.filename.startswith('<') else frame.filename}:{frame.lineno}"
+
+
+class MemoryDiagnostics:
+    """Controle do tracemalloc + contagens de cache do bot"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.base = None
+        self.base_em = None
+        self.iniciado_em = None
+
+    @property
+    def ativo(self):
+        return tracemalloc.is_tracing()
+
+    def iniciar(self, frames=1):
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self.iniciado_em = time.time()
+            self.base = tracemalloc.take_snapshot()
+            self.base_em = time.time()
+
+    def parar(self):
+        with self.lock:
+            tracemalloc.stop()
+            self.base = None
+            self.base_em = None
+            self.iniciado_em = None
+
+    def marcar(self):
+        """Novo snapshot base para os próximos diffs"""
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                return False
+            self.base = tracemalloc.take_snapshot()
+            self.base_em = time.time()
+            return True
+
+    def alocacoes(self, limite=20, agrupar="lineno"):
+        """Maiores sítios de alocação e diferença em relação ao snapshot base"""
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                return None
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            base = self.base
+
+        atual, pico = tracemalloc.get_traced_memory()
+        resultado = {
+            "rastreado_bytes": atual,
+            "pico_bytes": pico,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "ativo_desde": self.iniciado_em,
+            "top": [
+                {"local": _local(e), "bytes": e.size, "blocos": e.count}
+                for e in snapshot.statistics(agrupar)[:limite]
+            ]
+        }
+        if base is not None:
+            resultado["base_em"] = self.base_em
+            resultado["diff"] = [
+                {"local": _local(e), "bytes": e.size_diff, "blocos": e.count_diff, "total_bytes": e.size}
+                for e in snapshot.compare_to(base, agrupar)[:limite]
+                if e.size_diff
+            ]
+        return resultado
+
+    def contagens(self, bot, tipos=()):
+        """Objetos vivos nos caches do discord.py, views e threads"""
+        resultado = {
+            "rss_bytes": _rss(),
+            "threads": threading.active_count(),
+            "gc": gc.get_count()
+        }
+        if bot is not None:
+            guilds = list(getattr(bot, "guilds", ()))
+            estado = getattr(bot, "_connection", None)
+            view_store = getattr(estado, "_view_store", None)
+            resultado["discord"] = {
+                "guilds": len(guilds),
+                "membros": sum(_tamanho(getattr(g, "_members", ())) or 0 for g in guilds),
+                "canais": sum(_tamanho(getattr(g, "_channels", ())) or 0 for g in guilds),
+                "cargos": sum(_tamanho(getattr(g, "_roles", ())) or 0 for g in guilds),
+                "usuarios": _tamanho(getattr(estado, "_users", ())),
+                "mensagens": _tamanho(getattr(bot, "cached_messages", ())),
+                # Views associadas a mensagens (ex: AprovacaoView pendentes)
+                "views_ativas": _tamanho(getattr(view_store, "_synced_message_views", ())),
+                "views_persistentes": _tamanho(getattr(view_store, "persistent_views", ()))
+            }
+        if tipos:
+            # Percorre todos os objetos do GC: só quando pedido explicitamente
+            nomes = set(tipos)
+            contagem = dict.fromkeys(nomes, 0)
+            for objeto in gc.get_objects():
+                nome = type(objeto).__name__
+                if nome in nomes:
+                    contagem[nome] += 1
+            resultado["objetos"] = contagem
+        return resultado
+
+
+# Instância única usada pelo servidor web
+diagnostico = MemoryDiagnostics()
@@ -0,0 +1,250 @@
+"""
+nickname_template.py - Templates de apelido compilados por servidor
+O template é compilado uma vez em partes fixas e campos; ao formatar, apenas o
+nome é truncado (respeitando grafemas como emojis compostos) para caber no
+limite do Discord, preservando o ID do jogo.
+
+A compilação não é para ganhar da f-string fixa antiga (que cortava o apelido
+às cegas e não aceitava outro formato): interpretar o template a cada apelido
+custaria ~10x mais (ver benchmarks/bench_nickname.py). Ela também gera a regex
+usada pela importação para reconhecer apelidos no formato do servidor.
+"""
+
+import functools
+import re
+import string
+import unicodedata
+
+LIMITE_APELIDO = 32
+# Espaço mínimo do nome antes de a tag passar a ser encurtada
+NOME_RESERVADO = 8
+TEMPLATE_PADRAO = "{tag}・{nome} | {id}"
+CAMPOS = ("tag", "nome", "id")
+
+_ZWJ = "\u200d"
+
+
+def _estende_grafema(c):
+    """Caractere que se junta ao anterior no mesmo grafema"""
+    if c < "\u0300":
+        return False
+    o = ord(c)
+    return (
+        unicodedata.combining(c)
+        or c == _ZWJ
+        or 0xFE00 <= o <= 0xFE0F          # seletores de variação
+        or 0x1F3FB <= o <= 0x1F3FF        # tons de pele
+        or 0xE0020 <= o <= 0xE007F        # tags de bandeiras de subdivisão
+        or unicodedata.category(c) in ("Mn", "Me", "Mc")
+    )
+
+
+def _regional(c):
+    return 0x1F1E6 <= ord(c) <= 0x1F1FF
+
+
+def grafemas(texto):
+    """Divide o texto em grafemas (aproximação sem dependências externas)"""
+    resultado = []
+    i = 0
+    n = len(texto)
+    while i < n:
+        j = i + 1
+        if _regional(texto[i]) and j < n and _regional(texto[j]):
+            j += 1  # bandeira = par de indicadores regionais
+        while j < n:
+            if texto[j - 1] == _ZWJ:
+                j += 1  # sequência ZWJ: junta o próximo caractere
+            elif _estende_grafema(texto[j]):
+                j += 1
+            else:
+                break
+        resultado.append(texto[i:j])
+        i = j
+    return resultado
+
+
+def fronteira(texto, pos):
+    """Indica se é possível cortar o texto na posição sem quebrar um grafema"""
+    if pos <= 0 or pos >= len(texto):
+        return True
+    c = texto[pos]
+    if texto[pos - 1] == _ZWJ or _estende_grafema(c):
+        return False
+    if _regional(c):
+        # Dentro de uma bandeira se houver um número ímpar de indicadores antes
+        anteriores = 0
+        i = pos - 1
+        while i >= 0 and _regional(texto[i]):
+            anteriores += 1
+            i -= 1
+        return anteriores % 2 == 0
+    return True
+
+
+def truncar(texto, limite):
+    """Corta o texto em até `limite` caracteres sem quebrar grafemas"""
+    if len(texto) <= limite:
+        return texto
+    if limite <= 0:
+        return ""
+    pos = limite
+    while pos > 0 and not fronteira(texto, pos):
+        pos -= 1
+    return texto[:pos]
+
+
+class TemplateInvalido(ValueError):
+    pass
+
+
+class NicknameTemplate:
+    """Template compilado para uma tag: format(nome, game_id) -> apelido"""
+
+    __slots__ = ("template", "tag", "limite", "prefixo", "meio", "sufixo", "fixo", "nome_antes_id", "tem_nome", "tem_id",
+                 "regex")
+
+    def __init__(self, template, tag, limite=LIMITE_APELIDO):
+        self.template = template
+        self.tag = tag or ""
+        self.limite = limite
+
+        itens = []
+        try:
+            campos = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise TemplateInvalido(str(e))
+        for literal, campo, especificacao, conversao in campos:
+            if literal:
+                itens.append(literal)
+            if campo is None:
+                continue
+            if campo not in CAMPOS or especificacao or conversao:
+                raise TemplateInvalido(f"campo inválido: {{{campo}}} (use {{tag}}, {{nome}}, {{id}})")
+            itens.append((campo,))
+        _agrupar_tags(itens)
+
+        # Sem tag, o grupo da tag some por inteiro; no reconhecimento ele é
+        # opcional (apelidos gravados antes de o servidor ter tag)
+        partes = []
+        regex = []
+        for item in itens:
+            if isinstance(item, str):
+                partes.append(item)
+                regex.append(re.escape(item))
+            elif item[0] == "tag":
+                if self.tag:
+                    partes.append(f"{item[1]}{self.tag}{item[2]}")
+                    regex.append(f"(?:{re.escape(item[1] + self.tag + item[2])})?")
+            else:
+                partes.append(item)
+                regex.append(r"(?P<nome>.+?)" if item[0] == "nome" else None)
+        self.regex = regex
+
+        # Junta as partes fixas em até três blocos ao redor de {nome} e {id}
+        campos_ordem = [p[0] for p in partes if isinstance(p, tuple)]
+        if campos_ordem.count("nome") > 1 or campos_ordem.count("id") > 1:
+            raise TemplateInvalido("{nome} e {id} podem aparecer no máximo uma vez")
+        self.tem_nome = "nome" in campos_ordem
+        self.tem_id = "id" in campos_ordem
+        self.nome_antes_id = not (self.tem_nome and self.tem_id) or campos_ordem.index("nome") < campos_ordem.index("id")
+
+        blocos = [""]
+        for parte in partes:
+            if isinstance(parte, tuple):
+                blocos.append("")
+            else:
+                blocos[-1] += parte
+        blocos += [""] * (3 - len(blocos))
+        self.prefixo, self.meio, self.sufixo = blocos[0], blocos[1], blocos[2]
+        if len(campos_ordem) == 1:
+            self.meio, self.sufixo = "", blocos[1]
+        self.fixo = len(self.prefixo) + len(self.meio) + len(self.sufixo)
+
+    def format(self, nome, game_id):
+        nome = nome.strip() if self.tem_nome else ""
+        game_id = str(game_id) if self.tem_id else ""
+        fixo = self.fixo + len(game_id)
+
+        # Trunca o nome primeiro; o ID é sempre preservado
+        if fixo + len(nome) > self.limite:
+            excesso = fixo + min(len(nome), NOME_RESERVADO) - self.limite
+            if self.tag and excesso > 0:
+                # A tag consumiria o espaço do nome: encurta a tag
+                tag = truncar(self.tag, len(self.tag) - excesso).rstrip()
+                return compilar(self.template, tag).format(nome, game_id)
+            nome = truncar(nome, self.limite - fixo).rstrip()
+
+        if self.nome_antes_id:
+            apelido = f"{self.prefixo}{nome}{self.meio}{game_id}{self.sufixo}"
+        else:
+            apelido = f"{self.prefixo}{game_id}{self.meio}{nome}{self.sufixo}"
+
+        if len(apelido) > self.limite:
+            # Partes fixas não cabem: remove grafemas do início, mantendo o ID
+            pos = len(apelido) - self.limite
+            while not fronteira(apelido, pos):
+                pos += 1
+            apelido = apelido[pos:].lstrip()
+        return apelido
+
+    def exemplo(self):
+        return self.format("NOME", "ID")
+
+    def padrao(self, regex_id=None):
+        """
+        Regex que reconhece apelidos neste formato (grupos nome e id), com o ID
+        no formato configurado no servidor (regex_id da validação do
+        formulário); None se faltar {nome} ou {id}.
+        """
+        if not (self.tem_nome and self.tem_id):
+            return None
+        return re.compile(f"^{''.join(_grupo_id(regex_id) if p is None else p for p in self.regex)}$")
+
+
+# Sinais de abertura/fechamento que envolvem a tag (ex: "[" "]", "【" "】")
+_ABERTURAS = "([{<«‹【〔「『〖〘〚｢（［｛"
+_FECHAMENTOS = ")]}>»›】〕」』〗〙〛｣）］｝"
+
+
+def _grupo_id(regex_id):
+    """Grupo nomeado do ID a partir da regex de validação (sem as âncoras)"""
+    if not regex_id:
+        return r"(?P<id>\d{1,10})"
+    if regex_id.startswith("^"):
+        regex_id = regex_id[1:]
+    if regex_id.endswith("$") and not regex_id.endswith("\\$"):
+        regex_id = regex_id[:-1]
+    return f"(?P<id>(?:{regex_id}))"
+
+
+def _agrupar_tags(itens):
+    """
+    Troca cada {tag} por ("tag", antes, depois): os sinais que envolvem a tag
+    (ex: "[" e "]") e o separador que só existe por causa dela. Sem tag, o
+    grupo inteiro é omitido: "[{tag}] {nome}" vira "{nome}", e não "[{nome}".
+    """
+    for i, item in enumerate(itens):
+        if item != ("tag",):
+            continue
+        anterior = itens[i - 1] if i > 0 and isinstance(itens[i - 1], str) else ""
+        seguinte = itens[i + 1] if i + 1 < len(itens) and isinstance(itens[i + 1], str) else ""
+        # O separador vai junto com a tag: o de antes se houver campo antes dela
+        # (ex: "{nome} ({tag}) | {id}"), senão o de depois ("{tag}・{nome}")
+        if any(isinstance(x, tuple) for x in itens[:i]):
+            n = len(seguinte) - len(seguinte.lstrip(_FECHAMENTOS))
+            abre, fecha = anterior, seguinte[:n]
+        else:
+            n = len(anterior) - len(anterior.rstrip(_ABERTURAS))
+            abre, fecha = anterior[len(anterior) - n:], seguinte
+        itens[i] = ("tag", abre, fecha)
+        if anterior:
+            itens[i - 1] = anterior[:len(anterior) - len(abre)]
+        if seguinte:
+            itens[i + 1] = seguinte[len(fecha):]
+
+
+@functools.lru_cache(maxsize=4096)
+def compilar(template, tag):
+    """Template compilado (cache por template + tag, ou seja, por servidor)"""
+    return NicknameTemplate(template or TEMPLATE_PADRAO, tag)
@@ -0,0 +1,236 @@
+"""
+outbox.py - Caixa de saída durável das mensagens diretas aos membros
+As notificações (aprovação, recusa, expiração) são gravadas no banco e
+entregues por um worker em segundo plano: ritmo abaixo do rate limit,
+novas tentativas com backoff exponencial e "dead letter" para quem está com
+as DMs fechadas. A entrega é pelo menos uma vez: um reinício no meio de um
+envio pode repetir a mensagem.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from jobs import Pacer
+
+PENDENTE = "pendente"
+ENTREGUE = "entregue"
+MORTA = "morta"
+
+
+class EntregaImpossivel(Exception):
+    """O membro não pode receber DMs (fechadas, bloqueado, conta inexistente): não adianta tentar de novo"""
+
+
+def contagens(conn, janela=3600):
+    """Métricas de entrega a partir do banco (usado pelo servidor web com conexão própria)"""
+    try:
+        linhas = conn.execute("SELECT estado, COUNT(*) FROM notificacoes GROUP BY estado").fetchall()
+        agora = time.time()
+        mais_antiga, = conn.execute(
+            "SELECT MIN(criado_em) FROM notificacoes WHERE estado = ?", (PENDENTE,)
+        ).fetchone()
+        entregues, latencia = conn.execute(
+            "SELECT COUNT(*), AVG(entregue_em - criado_em) FROM notificacoes"
+            " WHERE estado = ? AND entregue_em >= ?",
+            (ENTREGUE, agora - janela)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return {}  # tabela ainda não criada
+    return {
+        "por_estado": {estado: total for estado, total in linhas},
+        "pendente_mais_antiga_segundos": agora - mais_antiga if mais_antiga else None,
+        "entregues_ultima_hora": entregues,
+        "latencia_media_segundos": latencia
+    }
+
+
+class DMOutbox:
+    """
+    enviar(discord_id, conteudo) é uma corrotina que entrega a mensagem e
+    levanta EntregaImpossivel quando a DM nunca vai chegar; qualquer outra
+    exceção é tratada como falha temporária.
+    """
+
+    def __init__(self, caminho, enviar, intervalo=1.0, max_tentativas=6, backoff=60.0, backoff_max=6 * 3600, lote=20):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.enviar = enviar
+        self.pacer = Pacer(intervalo)
+        self.max_tentativas = max_tentativas
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.lote = lote
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS notificacoes ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " guild_id TEXT NOT NULL,"
+            " discord_id INTEGER NOT NULL,"
+            " tipo TEXT NOT NULL,"
+            " conteudo TEXT NOT NULL,"
+            " estado TEXT NOT NULL,"
+            " tentativas INTEGER NOT NULL DEFAULT 0,"
+            " proxima_em REAL NOT NULL,"
+            " criado_em REAL NOT NULL,"
+            " entregue_em REAL,"
+            " erro TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_notificacoes_fila ON notificacoes (estado, proxima_em);"
+        )
+        self.enfileiradas = 0
+        self.entregues = 0
+        self.retentativas = 0
+        self.mortas = 0
+        self.falhas_worker = 0
+        self.limpar_pendente = True
+        self._acordar = None
+        self._task = None
+
+    # ---------- Fila ----------
+    def enfileirar(self, guild_id, discord_id, tipo, conteudo):
+        """Grava a notificação e acorda o worker; retorna o id"""
+        agora = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO notificacoes (guild_id, discord_id, tipo, conteudo, estado, proxima_em, criado_em)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(guild_id), discord_id, tipo, conteudo, PENDENTE, agora, agora)
+            )
+        self.enfileiradas += 1
+        if self._acordar:
+            self._acordar.set()
+        return cursor.lastrowid
+
+    def _vencidas(self, agora):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, discord_id, conteudo, tentativas, criado_em FROM notificacoes"
+                " WHERE estado = ? AND proxima_em <= ? ORDER BY proxima_em LIMIT ?",
+                (PENDENTE, agora, self.lote)
+            ).fetchall()
+
+    def _proxima(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT MIN(proxima_em) FROM notificacoes WHERE estado = ?", (PENDENTE,)
+            ).fetchone()[0]
+
+    def _atualizar(self, id_, estado, tentativas, proxima_em=None, erro=None):
+        agora = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE notificacoes SET estado = ?, tentativas = ?, proxima_em = COALESCE(?, proxima_em),"
+                " entregue_em = ?, erro = ? WHERE id = ?",
+                (estado, tentativas, proxima_em, agora if estado == ENTREGUE else None, erro, id_)
+            )
+
+    def espera(self, tentativas):
+        """Backoff exponencial com jitter (±20%) a partir da tentativa que falhou"""
+        atraso = min(self.backoff * 2 ** (tentativas - 1), self.backoff_max)
+        return atraso * random.uniform(0.8, 1.2)
+
+    # ---------- Worker ----------
+    def iniciar(self):
+        if self._task is None or self._task.done():
+            self._acordar = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._executar())
+        return self._task
+
+    def parar(self):
+        if self._task:
+            self._task.cancel()
+
+    def limpar(self, dias=30):
+        """Remove notificações entregues há mais de `dias` dias (as mortas ficam para consulta)"""
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM notificacoes WHERE estado = ? AND entregue_em < ?",
+                (ENTREGUE, time.time() - dias * 86400)
+            ).rowcount
+
+    async def _executar(self):
+        erros = 0
+        while True:
+            try:
+                if self.limpar_pendente:
+                    self.limpar()
+                    self.limpar_pendente = False
+                espera = await self._ciclo()
+                erros = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Ex.: "database is locked" sob disputa com outras conexões: o worker não pode morrer
+                erros += 1
+                self.falhas_worker += 1
+                espera = min(2.0 ** erros, 300.0)
+                print(f"⚠️ Erro no worker de DMs (tentando de novo em {espera:.0f}s): {e}")
+            if espera:
+                try:
+                    await asyncio.wait_for(self._acordar.wait(), espera)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _ciclo(self):
+        """Entrega um lote vencido; retorna quanto esperar até o próximo (0 = já há mais)"""
+        self._acordar.clear()
+        for id_, discord_id, conteudo, tentativas, criado_em in self._vencidas(time.time()):
+            await self.pacer.aguardar()
+            await self._entregar(id_, discord_id, conteudo, tentativas + 1)
+            await asyncio.sleep(0)
+
+        proxima = self._proxima()
+        if proxima is not None and proxima <= time.time():
+            return 0
+        return 60.0 if proxima is None else min(proxima - time.time(), 60.0)
+
+    async def _entregar(self, id_, discord_id, conteudo, tentativa):
+        try:
+            await self.enviar(discord_id, conteudo)
+        except EntregaImpossivel as e:
+            self.mortas += 1
+            self._atualizar(id_, MORTA, tentativa, erro=str(e) or "DM indisponível")
+        except Exception as e:
+            if tentativa >= self.max_tentativas:
+                self.mortas += 1
+                self._atualizar(id_, MORTA, tentativa, erro=f"{type(e).__name__}: {e}"[:200])
+                print(f"⚠️ DM para {discord_id} descartada após {tentativa} tentativas: {e}")
+            else:
+                self.retentativas += 1
+                self._atualizar(id_, PENDENTE, tentativa, time.time() + self.espera(tentativa), f"{type(e).__name__}: {e}"[:200])
+        else:
+            self.entregues += 1
+            self._atualizar(id_, ENTREGUE, tentativa)
+
+    # ---------- Consulta ----------
+    def mortas_recentes(self, guild_id, limite=10):
+        """Últimas notificações não entregues de um servidor: (discord_id, tipo, erro, criado_em)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT discord_id, tipo, erro, criado_em FROM notificacoes"
+                " WHERE guild_id = ? AND estado = ? ORDER BY id DESC LIMIT ?",
+                (str(guild_id), MORTA, limite)
+            ).fetchall()
+
+    def pendentes(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM notificacoes WHERE estado = ?", (PENDENTE,)
+            ).fetchone()[0]
+
+    def estatisticas(self):
+        with self.lock:
+            return {**contagens(self.conn), "enfileiradas": self.enfileiradas, "entregues": self.entregues,
+                    "retentativas": self.retentativas, "mortas": self.mortas,
+                    "falhas_worker": self.falhas_worker}
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,112 @@
+"""
+purge.py - Limpeza de mensagens em streaming
+Percorre o histórico em lotes, usa exclusão em massa para mensagens com
+menos de 14 dias e exclusão individual ritmada para as mais antigas.
+"""
+
+import asyncio
+import datetime
+import time
+
+# A API só aceita exclusão em massa de mensagens com menos de 14 dias
+LIMITE_BULK = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+TAMANHO_LOTE = 100
+
+
+class PurgeJob:
+    """Trabalho de limpeza cancelável com relatório de progresso"""
+
+    def __init__(self, channel, limite, on_progresso=None,
+                 intervalo_individual=1.1, intervalo_progresso=2.0):
+        self.channel = channel
+        self.limite = limite
+        self.on_progresso = on_progresso
+        self.intervalo_individual = intervalo_individual
+        self.intervalo_progresso = intervalo_progresso
+
+        self.apagadas = 0
+        self.falhas = 0
+        self.fase = "em massa"
+        self.cancelado = False
+        self.inicio = None
+        self.fim = None
+        self._ultimo_progresso = 0.0
+
+    def cancelar(self):
+        """Pede o cancelamento (o lote atual é concluído antes de parar)"""
+        self.cancelado = True
+
+    @property
+    def duracao(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.monotonic()) - self.inicio
+
+    @property
+    def taxa(self):
+        """Mensagens apagadas por segundo"""
+        duracao = self.duracao
+        return self.apagadas / duracao if duracao > 0 else 0.0
+
+    async def _progresso(self, forcar=False):
+        if not self.on_progresso:
+            return
+        agora = time.monotonic()
+        if not forcar and agora - self._ultimo_progresso < self.intervalo_progresso:
+            return
+        self._ultimo_progresso = agora
+        try:
+            await self.on_progresso(self)
+        except Exception as e:
+            print(f"⚠️ Erro ao relatar o progresso da limpeza em {getattr(self.channel, 'id', '?')}: {e}")
+
+    async def _apagar_lote(self, lote):
+        try:
+            await self.channel.delete_messages(lote)
+            self.apagadas += len(lote)
+        except Exception:
+            # Lote rejeitado (ex: mensagem já apagada): tenta individualmente
+            for message in lote:
+                await self._apagar_individual(message)
+        lote.clear()
+        await self._progresso()
+
+    async def _apagar_individual(self, message):
+        try:
+            await message.delete()
+            self.apagadas += 1
+        except Exception:
+            self.falhas += 1
+        await asyncio.sleep(self.intervalo_individual)
+        await self._progresso()
+
+    async def executar(self):
+        """Executa a limpeza até atingir o limite, o fim do canal ou o cancelamento"""
+        self.inicio = time.monotonic()
+        corte = datetime.datetime.now(datetime.timezone.utc) - LIMITE_BULK
+        lote = []
+
+        try:
+            async for message in self.channel.history(limit=self.limite):
+                if self.cancelado:
+                    break
+
+                if message.created_at > corte:
+                    lote.append(message)
+                    if len(lote) >= TAMANHO_LOTE:
+                        await self._apagar_lote(lote)
+                    continue
+
+                # Histórico vem do mais novo ao mais antigo: daqui em diante tudo é antigo
+                if lote:
+                    await self._apagar_lote(lote)
+                self.fase = "individual"
+                await self._apagar_individual(message)
+
+            if lote and not self.cancelado:
+                await self._apagar_lote(lote)
+        finally:
+            self.fim = time.monotonic()
+            await self._progresso(forcar=True)
+
+        return self.apagadas
@@ -0,0 +1,289 @@
+"""
+registration_store.py - Registro durável das solicitações e aprovações
+Cada membro tem uma linha por servidor com o status da solicitação
+(pendente, aprovado, recusado, importado).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+PENDENTE = "pendente"
+APROVADO = "aprovado"
+RECUSADO = "recusado"
+IMPORTADO = "importado"
+EXPIRADO = "expirado"
+
+# Status de membros efetivamente registrados no servidor
+REGISTRADOS = (APROVADO, IMPORTADO)
+
+COLUNAS = ("guild_id", "discord_id", "nome", "game_id", "recrutador", "status",
+           "criado_em", "decidido_em", "decidido_por", "origem")
+
+
+def abrir_leitura(caminho):
+    """Conexão somente leitura própria (para threads do servidor web)"""
+    conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def consultar(conn, guild_id, desde=None, ate=None, status=None, recrutador=None, after_id=None, limite=None):
+    """
+    Itera registros de um servidor em ordem de discord_id com filtros opcionais,
+    usando cursor em lotes (memória constante).
+    """
+    condicoes = ["guild_id = ?"]
+    parametros = [str(guild_id)]
+    if desde is not None:
+        condicoes.append("criado_em >= ?")
+        parametros.append(desde)
+    if ate is not None:
+        condicoes.append("criado_em < ?")
+        parametros.append(ate)
+    if status:
+        condicoes.append("status = ?")
+        parametros.append(status)
+    if recrutador:
+        condicoes.append("recrutador = ? COLLATE NOCASE")
+        parametros.append(recrutador)
+    if after_id is not None:
+        condicoes.append("discord_id > ?")
+        parametros.append(after_id)
+
+    sql = f"SELECT {', '.join(COLUNAS)} FROM registros WHERE {' AND '.join(condicoes)} ORDER BY discord_id"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+
+    cursor = conn.execute(sql, parametros)
+    while True:
+        linhas = cursor.fetchmany(500)
+        if not linhas:
+            break
+        for linha in linhas:
+            yield linha
+
+
+def versao(conn, guild_id):
+    """Versão atual dos registros de um servidor (muda a cada escrita)"""
+    linha = conn.execute("SELECT versao FROM versoes WHERE guild_id = ?", (str(guild_id),)).fetchone()
+    return linha[0] if linha else 0
+
+
+class RegistrationStore:
+    """Tabela de registros por servidor + checkpoints de trabalhos em segundo plano"""
+
+    def __init__(self, caminho="bot.db"):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.caminho = caminho
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS registros ("
+            " guild_id TEXT NOT NULL,"
+            " discord_id INTEGER NOT NULL,"
+            " nome TEXT NOT NULL,"
+            " game_id TEXT NOT NULL,"
+            " recrutador TEXT,"
+            " status TEXT NOT NULL,"
+            " criado_em REAL NOT NULL,"
+            " decidido_em REAL,"
+            " decidido_por INTEGER,"
+            " origem TEXT NOT NULL DEFAULT 'formulario',"
+            " PRIMARY KEY (guild_id, discord_id));"
+            "CREATE INDEX IF NOT EXISTS idx_registros_status ON registros (guild_id, status);"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " nome TEXT PRIMARY KEY,"
+            " valor TEXT,"
+            " atualizado_em REAL NOT NULL);"
+            # Versão por servidor (ETag da API): incrementada por triggers em qualquer escrita
+            "CREATE TABLE IF NOT EXISTS versoes ("
+            " guild_id TEXT PRIMARY KEY,"
+            " versao INTEGER NOT NULL);"
+            + "".join(
+                f"CREATE TRIGGER IF NOT EXISTS registros_versao_{evento.lower()} AFTER {evento} ON registros BEGIN"
+                f" INSERT INTO versoes (guild_id, versao) VALUES ({linha}.guild_id, 1)"
+                " ON CONFLICT (guild_id) DO UPDATE SET versao = versao + 1; END;"
+                for evento, linha in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+            )
+        )
+
+    # ---------- Fluxo de registro ----------
+    def registrar_pedido(self, guild_id, discord_id, nome, game_id, recrutador):
+        """
+        Grava (ou reabre) a solicitação de um membro como pendente. Membros já
+        registrados não são reabertos; retorna se a linha foi gravada.
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO registros (guild_id, discord_id, nome, game_id, recrutador, status, criado_em)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (guild_id, discord_id) DO UPDATE SET"
+                " nome = excluded.nome, game_id = excluded.game_id, recrutador = excluded.recrutador,"
+                " status = excluded.status, criado_em = excluded.criado_em,"
+                " decidido_em = NULL, decidido_por = NULL, origem = 'formulario'"
+                " WHERE registros.status NOT IN (?, ?)",
+                (str(guild_id), discord_id, nome, game_id, recrutador, PENDENTE, time.time(), *REGISTRADOS)
+            )
+        return cursor.rowcount > 0
+
+    def decidir(self, guild_id, discord_id, status, decidido_por):
+        """Marca a solicitação como aprovada/recusada"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE registros SET status = ?, decidido_em = ?, decidido_por = ?"
+                " WHERE guild_id = ? AND discord_id = ?",
+                (status, time.time(), decidido_por, str(guild_id), discord_id)
+            )
+
+    def expirar(self, guild_id, discord_id):
+        """Marca como expirado apenas se ainda estiver pendente; retorna se mudou"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE registros SET status = ?, decidido_em = ?"
+                " WHERE guild_id = ? AND discord_id = ? AND status = ?",
+                (EXPIRADO, time.time(), str(guild_id), discord_id, PENDENTE)
+            )
+        return cursor.rowcount > 0
+
+    def listar_pendentes(self, guild_id=None):
+        """(guild_id, discord_id, criado_em) de todos os pedidos pendentes"""
+        with self.lock:
+            if guild_id is None:
+                linhas = self.conn.execute(
+                    "SELECT guild_id, discord_id, criado_em FROM registros WHERE status = ?", (PENDENTE,)
+                ).fetchall()
+            else:
+                linhas = self.conn.execute(
+                    "SELECT guild_id, discord_id, criado_em FROM registros WHERE guild_id = ? AND status = ?",
+                    (str(guild_id), PENDENTE)
+                ).fetchall()
+        return [tuple(linha) for linha in linhas]
+
+    def tempos_decisao(self, desde):
+        """(guild_id, segundos até a decisão) dos pedidos do formulário decididos após `desde`"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT guild_id, decidido_em - criado_em FROM registros"
+                " WHERE origem = 'formulario' AND status IN (?, ?) AND decidido_em >= ?",
+                (APROVADO, RECUSADO, desde)
+            ).fetchall()
+        return [tuple(linha) for linha in linhas]
+
+    def get(self, guild_id, discord_id):
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT * FROM registros WHERE guild_id = ? AND discord_id = ?",
+                (str(guild_id), discord_id)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def buscar_registrado(self, guild_id, termo):
+        """Nome do membro registrado com esse nome (sem diferenciar maiúsculas) ou ID do jogo"""
+        with self.lock:
+            linha = self.conn.execute(
+                "SELECT nome FROM registros WHERE guild_id = ? AND status IN (?, ?)"
+                " AND (nome = ? COLLATE NOCASE OR game_id = ?) LIMIT 1",
+                (str(guild_id), *REGISTRADOS, termo, termo)
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def versao(self, guild_id):
+        with self.lock:
+            return versao(self.conn, guild_id)
+
+    def contar(self, guild_id, status=None):
+        with self.lock:
+            if status:
+                return self.conn.execute(
+                    "SELECT COUNT(*) FROM registros WHERE guild_id = ? AND status = ?",
+                    (str(guild_id), status)
+                ).fetchone()[0]
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM registros WHERE guild_id = ?", (str(guild_id),)
+            ).fetchone()[0]
+
+    def listar_registrados(self, guild_id, after_id=None, limite=500):
+        """Página de membros registrados em ordem de discord_id (paginação por chave)"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT * FROM registros WHERE guild_id = ? AND status IN (?, ?) AND discord_id > ?"
+                " ORDER BY discord_id LIMIT ?",
+                (str(guild_id), *REGISTRADOS, after_id or 0, limite)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def contar_registrados(self, guild_id, ate_id=None):
+        """Total de membros registrados (opcionalmente até um discord_id, inclusive)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM registros WHERE guild_id = ? AND status IN (?, ?) AND discord_id <= ?",
+                (str(guild_id), *REGISTRADOS, ate_id if ate_id is not None else 2**63 - 1)
+            ).fetchone()[0]
+
+    # ---------- Importação em lote ----------
+    def inserir_lote(self, linhas, checkpoint=None, valor=None):
+        """
+        Insere registros importados em uma única transação, sem sobrescrever
+        registros existentes. Opcionalmente grava um checkpoint na mesma transação.
+        linhas: iterável de (guild_id, discord_id, nome, game_id)
+        Retorna quantas linhas foram inseridas.
+        """
+        agora = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                # rowcount do próprio INSERT (total_changes somaria as escritas dos triggers de versão)
+                inseridas = self.conn.executemany(
+                    "INSERT INTO registros (guild_id, discord_id, nome, game_id, status, criado_em, origem)"
+                    " VALUES (?, ?, ?, ?, ?, ?, 'apelido')"
+                    " ON CONFLICT (guild_id, discord_id) DO NOTHING",
+                    ((str(g), d, n, i, IMPORTADO, agora) for g, d, n, i in linhas)
+                ).rowcount
+                if checkpoint:
+                    self._gravar_checkpoint(checkpoint, valor, agora)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return inseridas
+
+    # ---------- Checkpoints ----------
+    def _gravar_checkpoint(self, nome, valor, agora):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO checkpoints (nome, valor, atualizado_em) VALUES (?, ?, ?)",
+            (nome, valor, agora)
+        )
+
+    def checkpoint(self, nome):
+        with self.lock:
+            linha = self.conn.execute("SELECT valor FROM checkpoints WHERE nome = ?", (nome,)).fetchone()
+        return linha[0] if linha else None
+
+    def checkpoints(self, prefixo):
+        """{nome: valor} dos checkpoints cujo nome começa com o prefixo"""
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT nome, valor FROM checkpoints WHERE substr(nome, 1, ?) = ?",
+                (len(prefixo), prefixo)
+            ).fetchall()
+        return {nome: valor for nome, valor in linhas}
+
+    def salvar_checkpoint(self, nome, valor):
+        with self.lock:
+            self._gravar_checkpoint(nome, valor, time.time())
+
+    def remover_checkpoint(self, nome):
+        with self.lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE nome = ?", (nome,))
+
+    def fechar(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,148 @@
+"""
+resolved_config.py - Canais e cargo configurados de cada servidor, já resolvidos
+A resolução (objeto + permissões do bot) fica em cache até um evento de
+canal/cargo ou uma mudança nas configurações invalidá-la. Quando algo
+configurado deixa de existir ou de ser utilizável, o servidor é marcado como
+quebrado uma única vez e a staff é avisada, em vez de cada membro esbarrar
+no erro.
+"""
+
+import asyncio
+
+CAMPOS = ("canal_registro", "canal_aprovacao", "cargo")
+NOMES = {"canal_registro": "Canal de registro", "canal_aprovacao": "Canal de aprovação", "cargo": "Cargo"}
+
+
+class Resolucao:
+    __slots__ = ("ids", "canal_registro", "canal_aprovacao", "cargo", "apelidos", "problemas")
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.canal_registro = None
+        self.canal_aprovacao = None
+        self.cargo = None
+        self.apelidos = True
+        self.problemas = ()
+
+    def quebrado(self, campo):
+        """Configurado, mas não resolvido"""
+        return self.ids[CAMPOS.index(campo)] is not None and getattr(self, campo) is None
+
+    def aprovacao_bloqueada(self):
+        """A aprovação falharia: cargo inutilizável ou o bot não pode alterar apelidos"""
+        return self.quebrado("cargo") or not self.apelidos
+
+
+class ResolvedGuildConfig:
+    """
+    settings_de(guild_id) -> configurações do servidor;
+    on_quebra(guild, resolucao) é uma corrotina chamada quando o servidor passa a
+    ter problemas (ou problemas diferentes dos já avisados).
+    """
+
+    def __init__(self, settings_de, on_quebra=None):
+        self.settings_de = settings_de
+        self.on_quebra = on_quebra
+        self.cache = {}
+        self.quebrados = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+
+    def resolver(self, guild):
+        settings = self.settings_de(str(guild.id))
+        ids = tuple(settings.get(campo) for campo in CAMPOS)
+        resolucao = self.cache.get(guild.id)
+        # Configuração alterada (por /setup ou outra réplica) também invalida
+        if resolucao is not None and resolucao.ids == ids:
+            self.hits += 1
+            return resolucao
+        self.misses += 1
+        resolucao = self._resolver(guild, ids)
+        self.cache[guild.id] = resolucao
+        self._sinalizar(guild, resolucao)
+        return resolucao
+
+    def _resolver(self, guild, ids):
+        resolucao = Resolucao(ids)
+        problemas = []
+        me = guild.me
+
+        for campo, objeto_id in zip(CAMPOS[:2], ids[:2]):
+            if objeto_id is None:
+                continue
+            canal = guild.get_channel(objeto_id)
+            if canal is None:
+                problemas.append(f"{NOMES[campo]} (`{objeto_id}`) foi apagado")
+                continue
+            permissoes = canal.permissions_for(me) if me else None
+            if permissoes is not None and not (permissoes.view_channel and permissoes.send_messages):
+                problemas.append(f"{NOMES[campo]} {canal.mention}: o bot não pode enviar mensagens")
+                continue
+            setattr(resolucao, campo, canal)
+
+        # Permissões do servidor usadas na aprovação (cargo e apelido)
+        permissoes = me.guild_permissions if me else None
+        if permissoes is not None and not permissoes.manage_nicknames:
+            resolucao.apelidos = False
+            problemas.append("O bot não tem a permissão **Gerenciar apelidos**")
+
+        cargo_id = ids[2]
+        if cargo_id is not None:
+            cargo = guild.get_role(cargo_id)
+            if cargo is None:
+                problemas.append(f"Cargo (`{cargo_id}`) foi apagado")
+            elif permissoes is not None and not permissoes.manage_roles:
+                problemas.append(f"Cargo {cargo.mention}: o bot não tem a permissão **Gerenciar cargos**")
+            elif cargo.managed or (me is not None and cargo >= me.top_role):
+                problemas.append(f"Cargo {cargo.mention} não pode ser atribuído pelo bot (gerenciado ou acima do cargo do bot)")
+            else:
+                resolucao.cargo = cargo
+
+        resolucao.problemas = tuple(problemas)
+        return resolucao
+
+    def _sinalizar(self, guild, resolucao):
+        anteriores = self.quebrados.get(guild.id)
+        if not resolucao.problemas:
+            if anteriores:
+                del self.quebrados[guild.id]
+                print(f"✅ Configuração de {guild.id} restaurada")
+            return
+        if anteriores == resolucao.problemas:
+            return
+        self.quebrados[guild.id] = resolucao.problemas
+        print(f"⚠️ Configuração de {guild.id} quebrada: {'; '.join(resolucao.problemas)}")
+        if self.on_quebra:
+            try:
+                asyncio.get_running_loop().create_task(self._avisar(guild, resolucao))
+            except RuntimeError:
+                pass  # fora do loop: o aviso sai na próxima resolução dentro dele
+
+    async def _avisar(self, guild, resolucao):
+        try:
+            await self.on_quebra(guild, resolucao)
+        except Exception as e:
+            print(f"⚠️ Erro ao avisar sobre a configuração de {guild.id}: {e}")
+
+    def invalidar(self, guild_id, objeto_id=None):
+        """Descarta a resolução do servidor (só se objeto_id for um dos configurados, quando informado)"""
+        resolucao = self.cache.get(guild_id)
+        if resolucao is None or (objeto_id is not None and objeto_id not in resolucao.ids):
+            return False
+        del self.cache[guild_id]
+        self.invalidacoes += 1
+        return True
+
+    def esquecer(self, guild_id):
+        self.cache.pop(guild_id, None)
+        self.quebrados.pop(guild_id, None)
+
+    def estatisticas(self):
+        return {
+            "servidores": len(self.cache),
+            "quebrados": len(self.quebrados),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidacoes": self.invalidacoes
+        }
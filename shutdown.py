@@ -0,0 +1,142 @@
+"""
+shutdown.py - Encerramento gracioso (SIGTERM/SIGINT)
+Sequência: marca não-pronto, recusa novas interações, aguarda as operações em
+andamento e as filas de saída até um prazo, grava o que está pendente e só
+então fecha o gateway. Cada fase é cronometrada.
+"""
+
+import asyncio
+import contextlib
+import functools
+import signal
+import time
+
+
+class GracefulShutdown:
+    """Coordena o encerramento e conta as operações em andamento"""
+
+    def __init__(self, prazo=20.0, intervalo=0.05):
+        self.prazo = prazo
+        self.intervalo = intervalo
+        self.encerrando = False
+        self.em_andamento = 0
+        self.filas = {}
+        self.flushes = []
+        self.fases = {}
+        self.restantes = {}
+        self.motivo = None
+        self._task = None
+
+    # ---------- Registro ----------
+    def registrar_fila(self, nome, profundidade):
+        """Fila de saída a esvaziar antes de fechar (profundidade() -> int)"""
+        self.filas[nome] = profundidade
+
+    def registrar_flush(self, nome, funcao):
+        """Gravação pendente a concluir antes de fechar o gateway"""
+        self.flushes.append((nome, funcao))
+
+    @contextlib.asynccontextmanager
+    async def operacao(self):
+        """Marca uma operação que deve terminar antes do encerramento"""
+        self.em_andamento += 1
+        try:
+            yield
+        finally:
+            self.em_andamento -= 1
+
+    def rastrear(self, funcao):
+        """Decorador: a corrotina inteira conta como operação em andamento"""
+        @functools.wraps(funcao)
+        async def executar(*args, **kwargs):
+            async with self.operacao():
+                return await funcao(*args, **kwargs)
+        return executar
+
+    # ---------- Sinais ----------
+    def instalar(self, encerrar):
+        """Chama encerrar(motivo) no event loop ao receber SIGTERM/SIGINT"""
+        loop = asyncio.get_running_loop()
+
+        def receber(sinal):
+            if self.encerrando:
+                print(f"⚠️ {sinal.name} recebido novamente; encerramento já em andamento")
+                return
+            self.motivo = sinal.name
+            self._task = loop.create_task(encerrar(sinal.name))
+
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sinal, receber, sinal)
+            except (NotImplementedError, RuntimeError):
+                # Windows: sem add_signal_handler
+                signal.signal(sinal, lambda numero, frame, s=sinal: loop.call_soon_threadsafe(receber, s))
+
+    # ---------- Encerramento ----------
+    def _pendentes(self):
+        pendentes = {"operacoes": self.em_andamento}
+        for nome, profundidade in self.filas.items():
+            try:
+                pendentes[nome] = profundidade()
+            except Exception:
+                pendentes[nome] = 0
+        return {nome: total for nome, total in pendentes.items() if total}
+
+    async def drenar(self, prazo):
+        """Aguarda operações e filas zerarem; retorna o que restou no prazo"""
+        limite = time.monotonic() + prazo
+        pendentes = self._pendentes()
+        while pendentes and time.monotonic() < limite:
+            await asyncio.sleep(self.intervalo)
+            pendentes = self._pendentes()
+        return pendentes
+
+    def _fase(self, nome, inicio):
+        self.fases[nome] = time.monotonic() - inicio
+        return time.monotonic()
+
+    async def encerrar(self, fechar, antes=None, depois=None):
+        """
+        antes(): síncrono, chamado ao iniciar (ex: health não-pronto, cancelar trabalhos)
+        fechar(): corrotina que fecha o gateway
+        depois(): síncrono, chamado após fechar (ex: fechar bancos)
+        """
+        if self.encerrando:
+            return
+        self.encerrando = True
+        inicio = marca = time.monotonic()
+        print(f"🛑 Encerrando ({self.motivo or 'solicitado'}), prazo de {self.prazo:.0f}s...")
+
+        if antes:
+            antes()
+        marca = self._fase("sinalizar", marca)
+
+        self.restantes = await self.drenar(max(0.0, self.prazo - (marca - inicio)))
+        marca = self._fase("drenar", marca)
+        if self.restantes:
+            print(f"⚠️ Prazo esgotado com pendências: {self.restantes}")
+
+        for nome, funcao in self.flushes:
+            try:
+                resultado = funcao()
+                if asyncio.iscoroutine(resultado):
+                    await resultado
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar {nome}: {e}")
+        marca = self._fase("gravar", marca)
+
+        try:
+            await fechar()
+        except Exception as e:
+            print(f"⚠️ Erro ao fechar o gateway: {e}")
+        marca = self._fase("fechar", marca)
+
+        if depois:
+            try:
+                depois()
+            except Exception as e:
+                print(f"⚠️ Erro ao finalizar: {e}")
+        self._fase("finalizar", marca)
+
+        self.fases["total"] = time.monotonic() - inicio
+        print("✅ Encerrado: " + " • ".join(f"{nome} {duracao * 1000:.0f}ms" for nome, duracao in self.fases.items()))
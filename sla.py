@@ -0,0 +1,220 @@
+"""
+sla.py - Tempo até a decisão das solicitações e lembretes de SLA
+Mantido incrementalmente pelos eventos de solicitação/decisão: histograma por
+servidor (baldes fixos) e um heap dos pendentes para a idade do mais antigo
+em O(1) amortizado. Um agendador avisa o canal de aprovação quando o pedido
+mais antigo passa do SLA configurado.
+"""
+
+import asyncio
+import bisect
+import heapq
+import threading
+import time
+
+# Limites superiores dos baldes, em segundos (o último balde é "acima de 3 dias")
+BALDES = (60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400, 259200)
+
+
+def formatar_duracao(segundos):
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos}s"
+    if segundos < 3600:
+        return f"{segundos // 60}min"
+    if segundos < 86400:
+        return f"{segundos // 3600}h{segundos % 3600 // 60:02d}"
+    return f"{segundos // 86400}d{segundos % 86400 // 3600}h"
+
+
+class Histograma:
+    """Contagem por balde + soma (mesma estrutura de um histograma Prometheus)"""
+
+    __slots__ = ("contagens", "total", "soma")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES) + 1)
+        self.total = 0
+        self.soma = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(BALDES, valor)] += 1
+        self.total += 1
+        self.soma += valor
+
+    def quantil(self, q):
+        """Estimativa por interpolação linear dentro do balde"""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                inicio = BALDES[indice - 1] if indice else 0
+                fim = BALDES[indice] if indice < len(BALDES) else BALDES[-1] * 2
+                return inicio + (fim - inicio) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return BALDES[-1]
+
+    def resumo(self):
+        return {
+            "total": self.total,
+            "media": self.soma / self.total if self.total else None,
+            "p50": self.quantil(0.5),
+            "p90": self.quantil(0.9),
+            "p99": self.quantil(0.99),
+            "baldes": {
+                (f"le_{limite}" if i < len(BALDES) else "inf"): contagem
+                for i, (limite, contagem) in enumerate(zip(BALDES + (None,), self.contagens))
+            }
+        }
+
+
+class _Servidor:
+    __slots__ = ("histograma", "pendentes", "heap", "expirados", "ultimo_lembrete")
+
+    def __init__(self):
+        self.histograma = Histograma()
+        self.pendentes = {}
+        self.heap = []
+        self.expirados = 0
+        self.ultimo_lembrete = 0.0
+
+
+class SLATracker:
+    """Métricas por servidor alimentadas por solicitado/decidido/expirado"""
+
+    def __init__(self):
+        self.servidores = {}
+        self.lock = threading.Lock()
+
+    def _servidor(self, guild_id):
+        guild_id = str(guild_id)
+        servidor = self.servidores.get(guild_id)
+        if servidor is None:
+            servidor = self.servidores[guild_id] = _Servidor()
+        return servidor
+
+    def solicitado(self, guild_id, discord_id, em):
+        with self.lock:
+            servidor = self._servidor(guild_id)
+            servidor.pendentes[discord_id] = em
+            heapq.heappush(servidor.heap, (em, discord_id))
+            if len(servidor.heap) > 2 * len(servidor.pendentes) + 64:
+                # Muitas entradas já decididas no heap: reconstrói só com os pendentes
+                servidor.heap = [(criado, membro) for membro, criado in servidor.pendentes.items()]
+                heapq.heapify(servidor.heap)
+
+    def decidido(self, guild_id, discord_id, em):
+        """Registra a decisão; retorna o tempo de espera (None se o pedido não era conhecido)"""
+        with self.lock:
+            servidor = self._servidor(guild_id)
+            criado_em = servidor.pendentes.pop(discord_id, None)
+            if criado_em is None:
+                return None
+            espera = max(0.0, em - criado_em)
+            servidor.histograma.observar(espera)
+            return espera
+
+    def observar(self, guild_id, espera):
+        """Tempo de decisão histórico (carga inicial a partir do banco)"""
+        with self.lock:
+            self._servidor(guild_id).histograma.observar(espera)
+
+    def expirado(self, guild_id, discord_id):
+        with self.lock:
+            servidor = self._servidor(guild_id)
+            if servidor.pendentes.pop(discord_id, None) is not None:
+                servidor.expirados += 1
+
+    def _mais_antigo(self, servidor):
+        # Remoção preguiçosa: descarta do topo os já decididos ou re-solicitados
+        heap = servidor.heap
+        while heap and servidor.pendentes.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def idade_mais_antigo(self, guild_id, agora=None):
+        with self.lock:
+            servidor = self.servidores.get(str(guild_id))
+            criado_em = self._mais_antigo(servidor) if servidor else None
+        return (agora or time.time()) - criado_em if criado_em is not None else None
+
+    def pendentes(self, guild_id):
+        servidor = self.servidores.get(str(guild_id))
+        return len(servidor.pendentes) if servidor else 0
+
+    def resumo(self, guild_id, agora=None):
+        agora = agora or time.time()
+        with self.lock:
+            servidor = self.servidores.get(str(guild_id)) or _Servidor()
+            criado_em = self._mais_antigo(servidor)
+            return {
+                "pendentes": len(servidor.pendentes),
+                "idade_mais_antigo": agora - criado_em if criado_em is not None else None,
+                "expirados": servidor.expirados,
+                "decisao": servidor.histograma.resumo()
+            }
+
+    def estatisticas(self):
+        with self.lock:
+            ids = list(self.servidores)
+        return {guild_id: self.resumo(guild_id) for guild_id in ids}
+
+    def violacoes(self, sla_de, agora=None):
+        """
+        Servidores cujo pedido mais antigo passou do SLA e que não foram
+        lembrados no último período. sla_de(guild_id) -> segundos ou 0/None.
+        Retorna [(guild_id, pendentes, idade)] e marca o lembrete.
+        """
+        agora = agora or time.time()
+        resultado = []
+        with self.lock:
+            for guild_id, servidor in self.servidores.items():
+                if not servidor.pendentes:
+                    continue
+                limite = sla_de(guild_id)
+                if not limite:
+                    continue
+                criado_em = self._mais_antigo(servidor)
+                idade = agora - criado_em
+                # Repete o lembrete a cada período de SLA (mínimo 15min) enquanto durar
+                if idade > limite and agora - servidor.ultimo_lembrete >= max(limite, 900):
+                    servidor.ultimo_lembrete = agora
+                    resultado.append((guild_id, len(servidor.pendentes), idade))
+        return resultado
+
+
+class LembreteSLA:
+    """Verifica periodicamente as violações e chama on_lembrete(guild_id, pendentes, idade)"""
+
+    def __init__(self, tracker, sla_de, on_lembrete, intervalo=30.0):
+        self.tracker = tracker
+        self.sla_de = sla_de
+        self.on_lembrete = on_lembrete
+        self.intervalo = intervalo
+        self.enviados = 0
+        self._task = None
+
+    def iniciar(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._executar())
+        return self._task
+
+    def parar(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _executar(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            for guild_id, pendentes, idade in self.tracker.violacoes(self.sla_de):
+                try:
+                    await self.on_lembrete(guild_id, pendentes, idade)
+                    self.enviados += 1
+                except Exception as e:
+                    print(f"⚠️ Erro ao enviar lembrete de SLA ({guild_id}): {e}")
+
+
+# Instância única: alimentada pelo bot e lida pelo servidor web (/metrics)
+sla = SLATracker()
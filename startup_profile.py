@@ -0,0 +1,47 @@
+"""
+startup_profile.py - Medição das fases de inicialização (--profile-startup)
+"""
+
+import sys
+import threading
+import time
+
+ATIVO = "--profile-startup" in sys.argv
+
+
+class StartupProfile:
+    """Registra o instante de cada fase desde o início do processo"""
+
+    def __init__(self, ativo=ATIVO):
+        self.ativo = ativo
+        self.inicio = time.perf_counter()
+        self.fases = []
+        self.lock = threading.Lock()
+        self.reportado = False
+
+    def marcar(self, fase):
+        """Marca o fim de uma fase (thread-safe)"""
+        with self.lock:
+            self.fases.append((fase, time.perf_counter()))
+
+    def relatorio(self):
+        """Imprime as fases com duração relativa e acumulada"""
+        if not self.ativo or self.reportado:
+            return
+        self.reportado = True
+
+        with self.lock:
+            fases = sorted(self.fases, key=lambda item: item[1])
+
+        print("=" * 60)
+        print("⏱️ PERFIL DE INICIALIZAÇÃO")
+        print(f"{'fase':<36}{'delta':>10}{'total':>12}")
+        anterior = self.inicio
+        for fase, instante in fases:
+            print(f"{fase:<36}{(instante - anterior) * 1000:>8.0f}ms{(instante - self.inicio) * 1000:>10.0f}ms")
+            anterior = instante
+        print("💡 Detalhe por módulo: python -X importtime main.py")
+        print("=" * 60)
+
+
+perfil = StartupProfile()
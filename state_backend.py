@@ -0,0 +1,484 @@
+"""
+state_backend.py - Estado compartilhado entre processos/réplicas
+Backends plugáveis (memória, SQLite, protocolo Redis) com a mesma interface de
+chave/valor JSON, notificação de mudanças e um cache local read-through que é
+invalidado pelas notificações das outras réplicas.
+
+STATE_BACKEND:
+  memory://
+  sqlite:///caminho/bot.db   (ou apenas o caminho)
+  redis://[:senha@]host:6379/0
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse, unquote
+
+
+class StateBackend:
+    """Interface: valores são strings JSON; callbacks recebem a chave alterada (None = tudo)"""
+
+    def __init__(self):
+        self.origem = uuid.uuid4().hex[:12]
+        self._assinantes = []
+
+    def get(self, chave):
+        raise NotImplementedError
+
+    def set(self, chave, valor):
+        raise NotImplementedError
+
+    def delete(self, chave):
+        raise NotImplementedError
+
+    def tomar(self, chave):
+        """Lê e remove atomicamente (só um processo recebe o valor)"""
+        raise NotImplementedError
+
+    def chaves(self, prefixo=""):
+        raise NotImplementedError
+
+    def assinar(self, callback):
+        """callback(chave) quando outro processo altera uma chave"""
+        self._assinantes.append(callback)
+
+    def _notificar(self, chave):
+        for callback in self._assinantes:
+            try:
+                callback(chave)
+            except Exception as e:
+                print(f"⚠️ Erro ao notificar mudança de estado: {e}")
+
+    def fechar(self):
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Estado só deste processo (testes e réplica única)"""
+
+    def __init__(self):
+        super().__init__()
+        self.dados = {}
+        self.lock = threading.Lock()
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor):
+        self.dados[chave] = valor
+
+    def delete(self, chave):
+        self.dados.pop(chave, None)
+
+    def tomar(self, chave):
+        with self.lock:
+            return self.dados.pop(chave, None)
+
+    def chaves(self, prefixo=""):
+        return [chave for chave in list(self.dados) if chave.startswith(prefixo)]
+
+
+class SQLiteBackend(StateBackend):
+    """
+    Tabela chave/valor + log de mudanças. Uma thread observa PRAGMA data_version
+    (muda quando outra conexão grava) e notifica as chaves alteradas por outros.
+    """
+
+    RETENCAO = 3600
+
+    def __init__(self, caminho, intervalo=0.5):
+        super().__init__()
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.lock = threading.RLock()
+        self.conn = self._conectar()
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS estado ("
+            " chave TEXT PRIMARY KEY,"
+            " valor TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS estado_mudancas ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " chave TEXT NOT NULL,"
+            " origem TEXT NOT NULL,"
+            " em REAL NOT NULL);"
+        )
+        self._gravacoes = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _registrar_mudanca(self, chave):
+        agora = time.time()
+        self.conn.execute(
+            "INSERT INTO estado_mudancas (chave, origem, em) VALUES (?, ?, ?)",
+            (chave, self.origem, agora)
+        )
+        self._gravacoes += 1
+        if self._gravacoes % 1000 == 0:
+            self.conn.execute("DELETE FROM estado_mudancas WHERE em < ?", (agora - self.RETENCAO,))
+
+    def _transacao(self, sql, parametros, chave):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                antes = self.conn.total_changes
+                linha = self.conn.execute(sql, parametros).fetchone()
+                if self.conn.total_changes != antes:
+                    self._registrar_mudanca(chave)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return linha
+
+    def get(self, chave):
+        with self.lock:
+            linha = self.conn.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def set(self, chave, valor):
+        self._transacao("INSERT OR REPLACE INTO estado (chave, valor) VALUES (?, ?)", (chave, valor), chave)
+
+    def delete(self, chave):
+        self._transacao("DELETE FROM estado WHERE chave = ?", (chave,), chave)
+
+    def tomar(self, chave):
+        # SELECT + DELETE na mesma transação (DELETE ... RETURNING exige SQLite 3.35+)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self.conn.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+                if linha:
+                    self.conn.execute("DELETE FROM estado WHERE chave = ?", (chave,))
+                    self._registrar_mudanca(chave)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return linha[0] if linha else None
+
+    def chaves(self, prefixo=""):
+        with self.lock:
+            linhas = self.conn.execute(
+                "SELECT chave FROM estado WHERE substr(chave, 1, ?) = ?", (len(prefixo), prefixo)
+            ).fetchall()
+        return [linha[0] for linha in linhas]
+
+    def importar(self, pares):
+        """Insere (chave, valor) que ainda não existam, em uma transação"""
+        with self.lock:
+            antes = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany("INSERT OR IGNORE INTO estado (chave, valor) VALUES (?, ?)", pares)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - antes
+
+    def assinar(self, callback):
+        super().assinar(callback)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._observar, name="estado-sqlite", daemon=True)
+            self._thread.start()
+
+    def _observar(self):
+        conn = self._conectar()
+        ultimo = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM estado_mudancas").fetchone()[0]
+        versao = conn.execute("PRAGMA data_version").fetchone()[0]
+        while not self._parar.wait(self.intervalo):
+            try:
+                atual = conn.execute("PRAGMA data_version").fetchone()[0]
+                if atual == versao:
+                    continue
+                versao = atual
+                linhas = conn.execute(
+                    "SELECT seq, chave, origem FROM estado_mudancas WHERE seq > ? ORDER BY seq", (ultimo,)
+                ).fetchall()
+                for seq, chave, origem in linhas:
+                    ultimo = seq
+                    if origem != self.origem:
+                        self._notificar(chave)
+            except sqlite3.Error as e:
+                print(f"⚠️ Erro ao observar o estado: {e}")
+        conn.close()
+
+    def fechar(self):
+        self._parar.set()
+        with self.lock:
+            self.conn.close()
+
+
+class _RespConexao:
+    """Cliente mínimo do protocolo RESP (Redis/KeyDB/Dragonfly, sem dependências)"""
+
+    def __init__(self, host, porta, senha=None, banco=0, timeout=5.0):
+        self.sock = socket.create_connection((host, porta), timeout=timeout)
+        self.arquivo = self.sock.makefile("rb")
+        if senha:
+            self.comando("AUTH", senha)
+        if banco:
+            self.comando("SELECT", banco)
+
+    def enviar(self, *partes):
+        dados = [f"*{len(partes)}\r\n".encode()]
+        for parte in partes:
+            parte = parte if isinstance(parte, bytes) else str(parte).encode()
+            dados.append(b"$%d\r\n%s\r\n" % (len(parte), parte))
+        self.sock.sendall(b"".join(dados))
+
+    def ler(self):
+        linha = self.arquivo.readline()
+        if not linha:
+            raise ConnectionError("conexão fechada pelo servidor")
+        tipo, resto = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return resto.decode()
+        if tipo == b"-":
+            raise RuntimeError(resto.decode())
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            tamanho = int(resto)
+            if tamanho < 0:
+                return None
+            return self.arquivo.read(tamanho + 2)[:-2].decode()
+        if tipo == b"*":
+            tamanho = int(resto)
+            return None if tamanho < 0 else [self.ler() for _ in range(tamanho)]
+        raise RuntimeError(f"resposta RESP inválida: {linha!r}")
+
+    def comando(self, *partes):
+        self.enviar(*partes)
+        return self.ler()
+
+    def fechar(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend(StateBackend):
+    """Chaves com prefixo + PUBLISH das mudanças em um canal assinado por todas as réplicas"""
+
+    def __init__(self, host="localhost", porta=6379, senha=None, banco=0, prefixo="bot:"):
+        super().__init__()
+        self.parametros = (host, porta, senha, banco)
+        self.prefixo = prefixo
+        self.canal = f"{prefixo}mudancas"
+        self.lock = threading.Lock()
+        self.conexao = _RespConexao(*self.parametros)
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _comando(self, *partes):
+        with self.lock:
+            try:
+                return self.conexao.comando(*partes)
+            except (OSError, ConnectionError):
+                # Reconecta uma vez (servidor reiniciado, conexão ociosa encerrada)
+                self.conexao.fechar()
+                self.conexao = _RespConexao(*self.parametros)
+                return self.conexao.comando(*partes)
+
+    def _publicar(self, chave):
+        self._comando("PUBLISH", self.canal, f"{self.origem} {chave}")
+
+    def get(self, chave):
+        return self._comando("GET", self.prefixo + chave)
+
+    def set(self, chave, valor):
+        self._comando("SET", self.prefixo + chave, valor)
+        self._publicar(chave)
+
+    def delete(self, chave):
+        if self._comando("DEL", self.prefixo + chave):
+            self._publicar(chave)
+
+    def tomar(self, chave):
+        valor = self._comando("GETDEL", self.prefixo + chave)
+        if valor is not None:
+            self._publicar(chave)
+        return valor
+
+    def chaves(self, prefixo=""):
+        resultado = []
+        cursor = "0"
+        while True:
+            cursor, lote = self._comando("SCAN", cursor, "MATCH", f"{self.prefixo}{prefixo}*", "COUNT", 500)
+            resultado.extend(chave[len(self.prefixo):] for chave in lote)
+            if cursor == "0":
+                return resultado
+
+    def assinar(self, callback):
+        super().assinar(callback)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._observar, name="estado-redis", daemon=True)
+            self._thread.start()
+
+    def _observar(self):
+        espera = 0.5
+        while not self._parar.is_set():
+            try:
+                conexao = _RespConexao(*self.parametros, timeout=None)
+                conexao.comando("SUBSCRIBE", self.canal)
+                # Mensagens podem ter sido perdidas enquanto desconectado
+                self._notificar(None)
+                espera = 0.5
+                while not self._parar.is_set():
+                    mensagem = conexao.ler()
+                    if mensagem and mensagem[0] == "message":
+                        origem, _, chave = mensagem[2].partition(" ")
+                        if origem != self.origem:
+                            self._notificar(chave)
+            except Exception as e:
+                if self._parar.is_set():
+                    return
+                print(f"⚠️ Assinatura do estado perdida ({e}); reconectando em {espera:.1f}s")
+                self._parar.wait(espera)
+                espera = min(espera * 2, 30)
+
+    def fechar(self):
+        self._parar.set()
+        with self.lock:
+            self.conexao.fechar()
+
+
+_AUSENTE = object()
+
+
+class CachedState:
+    """
+    Cache local read-through (LRU) sobre um backend. Gravações atualizam o
+    cache e o backend; mudanças de outras réplicas invalidam a chave.
+    Os valores retornados são compartilhados: trate-os como somente leitura.
+    """
+
+    def __init__(self, backend, capacidade=1000):
+        self.backend = backend
+        self.capacidade = capacidade
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self._ouvintes = []
+        backend.assinar(self._invalidar)
+
+    def _guardar(self, chave, valor):
+        self.cache[chave] = valor
+        self.cache.move_to_end(chave)
+        while len(self.cache) > self.capacidade:
+            self.cache.popitem(last=False)
+
+    def _invalidar(self, chave):
+        with self.lock:
+            self.invalidacoes += 1
+            if chave is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(chave, None)
+        for callback in self._ouvintes:
+            callback(chave)
+
+    def ao_mudar(self, callback):
+        """callback(chave) após a invalidação causada por outra réplica"""
+        self._ouvintes.append(callback)
+
+    def get(self, chave, padrao=None):
+        with self.lock:
+            valor = self.cache.get(chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                self.cache.move_to_end(chave)
+                self.hits += 1
+                return padrao if valor is None else valor
+
+            self.misses += 1
+            bruto = self.backend.get(chave)
+            valor = json.loads(bruto) if bruto is not None else None
+            self._guardar(chave, valor)
+        return padrao if valor is None else valor
+
+    def set(self, chave, valor):
+        with self.lock:
+            self.backend.set(chave, json.dumps(valor, ensure_ascii=False))
+            self._guardar(chave, valor)
+        return valor
+
+    def delete(self, chave):
+        with self.lock:
+            self.backend.delete(chave)
+            self._guardar(chave, None)
+
+    def tomar(self, chave):
+        """Lê e remove atomicamente no backend (None se outro já tomou)"""
+        with self.lock:
+            bruto = self.backend.tomar(chave)
+            self._guardar(chave, None)
+        return json.loads(bruto) if bruto is not None else None
+
+    def importar(self, valores):
+        """Grava {chave: valor} só onde a chave ainda não existe; retorna quantas gravou"""
+        pares = [(chave, json.dumps(valor, ensure_ascii=False)) for chave, valor in valores.items()]
+        with self.lock:
+            if hasattr(self.backend, "importar"):
+                total = self.backend.importar(pares)
+            else:
+                total = 0
+                for chave, bruto in pares:
+                    if self.backend.get(chave) is None:
+                        self.backend.set(chave, bruto)
+                        total += 1
+            for chave in valores:
+                self.cache.pop(chave, None)
+        return total
+
+    def chaves(self, prefixo=""):
+        return self.backend.chaves(prefixo)
+
+    def estatisticas(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "cache": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidacoes": self.invalidacoes
+        }
+
+    def fechar(self):
+        self.backend.fechar()
+
+
+def criar_backend(url):
+    """Backend a partir da URL de STATE_BACKEND"""
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("redis://"):
+        partes = urlparse(url)
+        return RedisBackend(
+            host=partes.hostname or "localhost",
+            porta=partes.port or 6379,
+            senha=unquote(partes.password) if partes.password else None,
+            banco=int(partes.path.lstrip("/") or 0)
+        )
+    if url.startswith("sqlite://"):
+        url = url[len("sqlite://"):]
+        if url.startswith("/"):
+            url = url[1:]  # sqlite:///relativo.db → relativo.db; sqlite:////abs.db → /abs.db
+    return SQLiteBackend(url)
@@ -0,0 +1,102 @@
+"""
+timer_wheel.py - Roda de temporizadores hierárquica
+Agendar e cancelar são O(1) e cada tick só toca um slot, independente de
+quantos temporizadores existem (milhares de pedidos pendentes custam o mesmo
+que um). Níveis mais altos descem para os mais baixos conforme o tempo passa.
+"""
+
+import math
+
+
+class HierarchicalTimerWheel:
+    """
+    Com resolucao=1s e níveis (64, 64, 64, 64): 64s, ~68min, ~3 dias e ~194 dias.
+    Vencimentos além do alcance ficam em espera e são reavaliados a cada volta.
+    """
+
+    def __init__(self, resolucao=1.0, niveis=(64, 64, 64, 64), agora=0.0):
+        self.resolucao = resolucao
+        self.niveis = niveis
+        self.granularidade = []
+        passo = 1
+        for tamanho in niveis:
+            self.granularidade.append(passo)
+            passo *= tamanho
+        self.alcance = passo
+        self.slots = [[{} for _ in range(tamanho)] for tamanho in niveis]
+        self.distantes = {}
+        self.local = {}
+        self.tick = int(agora / resolucao)
+
+    def __len__(self):
+        return len(self.local)
+
+    def __contains__(self, chave):
+        return chave in self.local
+
+    def _inserir(self, chave, vencimento):
+        delta = vencimento - self.tick
+        if delta >= self.alcance:
+            self.distantes[chave] = vencimento
+            self.local[chave] = None
+            return
+        nivel = 0
+        while nivel + 1 < len(self.niveis) and delta >= self.granularidade[nivel + 1]:
+            nivel += 1
+        indice = (vencimento // self.granularidade[nivel]) % self.niveis[nivel]
+        self.slots[nivel][indice][chave] = vencimento
+        self.local[chave] = (nivel, indice)
+
+    def agendar(self, chave, instante):
+        """Agenda (ou reagenda) a chave para vencer no instante (mesma base de `agora`)"""
+        self.cancelar(chave)
+        vencimento = max(math.ceil(instante / self.resolucao), self.tick + 1)
+        self._inserir(chave, vencimento)
+
+    def cancelar(self, chave):
+        local = self.local.pop(chave, False)
+        if local is False:
+            return False
+        if local is None:
+            self.distantes.pop(chave, None)
+        else:
+            nivel, indice = local
+            self.slots[nivel][indice].pop(chave, None)
+        return True
+
+    def vencimento(self, chave):
+        local = self.local.get(chave)
+        if local is None:
+            vencimento = self.distantes.get(chave)
+        else:
+            vencimento = self.slots[local[0]][local[1]].get(chave)
+        return vencimento * self.resolucao if vencimento is not None else None
+
+    def avancar(self, agora):
+        """Avança até `agora` e retorna as chaves vencidas (em ordem de vencimento)"""
+        alvo = int(agora / self.resolucao)
+        vencidas = []
+        while self.tick < alvo:
+            self.tick += 1
+            if self.tick % self.alcance == 0 and self.distantes:
+                distantes, self.distantes = self.distantes, {}
+                for chave, vencimento in distantes.items():
+                    self._inserir(chave, vencimento)
+            # Desce do nível mais alto para o mais baixo no início de cada bloco
+            for nivel in range(len(self.niveis) - 1, 0, -1):
+                granularidade = self.granularidade[nivel]
+                if self.tick % granularidade:
+                    continue
+                slot = self.slots[nivel][(self.tick // granularidade) % self.niveis[nivel]]
+                if slot:
+                    itens = list(slot.items())
+                    slot.clear()
+                    for chave, vencimento in itens:
+                        self._inserir(chave, vencimento)
+            slot = self.slots[0][self.tick % self.niveis[0]]
+            if slot:
+                for chave in slot:
+                    del self.local[chave]
+                vencidas.extend(slot)
+                slot.clear()
+        return vencidas
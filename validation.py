@@ -0,0 +1,96 @@
+"""
+validation.py - Validação do formulário de registro por servidor
+As regras de cada servidor são compiladas uma vez (cache por configuração) e
+avaliadas antes de qualquer chamada REST; todos os erros voltam juntos em uma
+única resposta.
+"""
+
+import functools
+import re
+import unicodedata
+
+ID_PADRAO = r"^\d{1,10}$"
+NOME_MINIMO = 2
+
+# Caracteres invisíveis que não contam como conteúdo. O ZWJ (U+200D) fica de
+# fora: ele une emojis compostos e só é removido quando está solto no texto
+_INVISIVEIS = dict.fromkeys(map(ord, "\u200b\u200c\u2060\ufeff\u00ad"), None)
+_ESPACOS = re.compile(r"\s+")
+_ZWJ = "\u200d"
+_EMOJI = "\u00a9\u00ae\u203c-\u3299\ufe0f\U0001f000-\U0001faff"
+_ZWJ_SOLTO = re.compile(rf"(?<![{_EMOJI}]){_ZWJ}|{_ZWJ}(?![{_EMOJI}])")
+
+
+class RegraInvalida(ValueError):
+    pass
+
+
+def normalizar(texto):
+    """NFKC, sem caracteres de controle/invisíveis e com espaços colapsados"""
+    texto = unicodedata.normalize("NFKC", texto).translate(_INVISIVEIS)
+    texto = "".join(c for c in texto if c == _ZWJ or unicodedata.category(c)[0] != "C")
+    if _ZWJ in texto:
+        texto = _ZWJ_SOLTO.sub("", texto)
+    return _ESPACOS.sub(" ", texto).strip()
+
+
+def _letras(texto):
+    return sum(1 for c in texto if c.isalpha())
+
+
+class Validador:
+    """Regras compiladas de um servidor"""
+
+    __slots__ = ("padrao_id", "nome_minimo", "exigir_recrutador")
+
+    def __init__(self, regex_id=None, nome_minimo=None, exigir_recrutador=False):
+        try:
+            self.padrao_id = re.compile(regex_id or ID_PADRAO)
+        except re.error as e:
+            raise RegraInvalida(f"regex do ID inválida: {e}")
+        self.nome_minimo = NOME_MINIMO if nome_minimo is None else nome_minimo
+        self.exigir_recrutador = bool(exigir_recrutador)
+
+    def validar(self, nome, game_id, recrutador, recrutador_existe=None):
+        """
+        Retorna (dados normalizados, erros). recrutador_existe(nome) -> nome
+        canônico do membro registrado ou None; só é chamado se as demais
+        regras passarem e a exigência estiver ativa.
+        """
+        erros = []
+        nome = normalizar(nome)
+        game_id = normalizar(game_id)
+        recrutador = normalizar(recrutador)
+
+        if _letras(nome) < self.nome_minimo:
+            erros.append(f"• **Nome**: informe pelo menos {self.nome_minimo} letras.")
+        if not self.padrao_id.fullmatch(game_id):
+            erros.append("• **ID**: formato inválido para este servidor.")
+        if _letras(recrutador) + sum(c.isdigit() for c in recrutador) == 0:
+            erros.append("• **Recrutador**: informe quem te recrutou.")
+        elif recrutador.casefold() == nome.casefold():
+            erros.append("• **Recrutador**: não pode ser você mesmo.")
+
+        if not erros and self.exigir_recrutador and recrutador_existe:
+            canonico = recrutador_existe(recrutador)
+            if canonico is None:
+                erros.append(f"• **Recrutador**: `{recrutador}` não é um membro registrado (use o nome ou ID do jogo).")
+            else:
+                recrutador = canonico
+
+        return {"nome": nome, "game_id": game_id, "recrutador": recrutador}, erros
+
+
+@functools.lru_cache(maxsize=1024)
+def compilar(regex_id, nome_minimo, exigir_recrutador):
+    """Validador compilado (cache por configuração, ou seja, por servidor)"""
+    return Validador(regex_id, nome_minimo, exigir_recrutador)
+
+
+def validador_de(settings):
+    """Validador das configurações de um servidor (campos do GuildStore)"""
+    return compilar(
+        settings.get("regex_id"),
+        settings.get("nome_minimo"),
+        settings.get("recrutador_registrado", False)
+    )